@@ -1,18 +1,21 @@
 import streamlit as st
-import yfinance as yf
 import pandas as pd
-import numpy as np
-import plotly.graph_objects as go
+import json
 from datetime import datetime
-import time
-from functools import wraps
-from io import BytesIO
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.enums import TA_CENTER
+
+from nyztrade_dcf.comps import LABELS as COMPS_LABELS, blend, implied_prices
+from nyztrade_dcf import timing
+from nyztrade_dcf.data import (default_cache, default_peer_index, default_results, default_search_index,
+                               default_watchlist, fetch_fundamentals_async)
+from nyztrade_dcf.graph import ComputeGraph
+from nyztrade_dcf.montecarlo import run_monte_carlo
+from nyztrade_dcf.retry import yahoo_breaker
+from nyztrade_dcf.sectors import index_version, sector_params
+from nyztrade_dcf.universe import ALL_STOCKS, POPULAR_STOCKS
+from nyztrade_dcf.valuation import (calculate_dcf_value, calculate_fcf_from_financials, calculate_terminal_value,
+                                    calculate_wacc, estimate_base_fcf, manual_wacc_data, project_fcf_drivers,
+                                    project_fcf_multistage, recommendation, reverse_dcf, run_sensitivity_analysis,
+                                    shares_outstanding)
 
 st.set_page_config(page_title="NYZTrade DCF Pro", page_icon="📊", layout="wide")
 
@@ -156,635 +159,12 @@ header {visibility: hidden;}
 </style>
 """, unsafe_allow_html=True)
 
-# ============================================
-# STOCK UNIVERSE
-# ============================================
-POPULAR_STOCKS = {
-    "🔵 Large Cap - Nifty 50": {
-        "RELIANCE.NS": "Reliance Industries", "TCS.NS": "TCS", "HDFCBANK.NS": "HDFC Bank",
-        "INFY.NS": "Infosys", "ICICIBANK.NS": "ICICI Bank", "HINDUNILVR.NS": "Hindustan Unilever",
-        "ITC.NS": "ITC", "SBIN.NS": "State Bank of India", "BHARTIARTL.NS": "Bharti Airtel",
-        "KOTAKBANK.NS": "Kotak Mahindra Bank", "LT.NS": "Larsen & Toubro", "AXISBANK.NS": "Axis Bank",
-        "ASIANPAINT.NS": "Asian Paints", "MARUTI.NS": "Maruti Suzuki", "TITAN.NS": "Titan Company",
-        "BAJFINANCE.NS": "Bajaj Finance", "WIPRO.NS": "Wipro", "SUNPHARMA.NS": "Sun Pharma",
-        "ULTRACEMCO.NS": "UltraTech Cement", "NESTLEIND.NS": "Nestle India", "HCLTECH.NS": "HCL Technologies",
-        "TATAMOTORS.NS": "Tata Motors", "POWERGRID.NS": "Power Grid", "NTPC.NS": "NTPC",
-        "ONGC.NS": "ONGC", "M&M.NS": "Mahindra & Mahindra", "JSWSTEEL.NS": "JSW Steel",
-        "TATASTEEL.NS": "Tata Steel", "ADANIENT.NS": "Adani Enterprises", "ADANIPORTS.NS": "Adani Ports"
-    },
-    "🟢 Mid Cap - Growth": {
-        "JINDALSTEL.NS": "Jindal Steel", "TRENT.NS": "Trent", "PERSISTENT.NS": "Persistent Systems",
-        "PIIND.NS": "PI Industries", "DIXON.NS": "Dixon Technologies", "VOLTAS.NS": "Voltas",
-        "MPHASIS.NS": "Mphasis", "COFORGE.NS": "Coforge", "LTIM.NS": "LTIMindtree",
-        "AUROPHARMA.NS": "Aurobindo Pharma", "TORNTPHARM.NS": "Torrent Pharma", "ALKEM.NS": "Alkem Lab",
-        "POLYCAB.NS": "Polycab India", "HAVELLS.NS": "Havells India", "CROMPTON.NS": "Crompton Greaves",
-        "ASTRAL.NS": "Astral Ltd", "SUPREMEIND.NS": "Supreme Industries", "APLAPOLLO.NS": "APL Apollo"
-    },
-    "🟡 Small Cap - High Growth": {
-        "AMBER.NS": "Amber Enterprises", "AETHER.NS": "Aether Industries", "ANGELONE.NS": "Angel One",
-        "CAMPUS.NS": "Campus Activewear", "DATAPATTNS.NS": "Data Patterns", "EASEMYTRIP.NS": "EaseMyTrip",
-        "FIVESTAR.NS": "Five Star Business", "GLAND.NS": "Gland Pharma", "HAPPSTMNDS.NS": "Happiest Minds",
-        "HOMEFIRST.NS": "Home First Finance", "INDIAMART.NS": "IndiaMART", "JUSTDIAL.NS": "Just Dial",
-        "LATENTVIEW.NS": "LatentView Analytics", "NAZARA.NS": "Nazara Technologies"
-    },
-    "🏦 Banking & Finance": {
-        "HDFCBANK.NS": "HDFC Bank", "ICICIBANK.NS": "ICICI Bank", "SBIN.NS": "SBI",
-        "KOTAKBANK.NS": "Kotak Bank", "AXISBANK.NS": "Axis Bank", "INDUSINDBK.NS": "IndusInd Bank",
-        "BANDHANBNK.NS": "Bandhan Bank", "FEDERALBNK.NS": "Federal Bank", "AUBANK.NS": "AU Small Finance"
-    },
-    "💻 IT & Technology": {
-        "TCS.NS": "TCS", "INFY.NS": "Infosys", "WIPRO.NS": "Wipro", "HCLTECH.NS": "HCL Tech",
-        "TECHM.NS": "Tech Mahindra", "LTIM.NS": "LTIMindtree", "MPHASIS.NS": "Mphasis",
-        "COFORGE.NS": "Coforge", "PERSISTENT.NS": "Persistent", "TATAELXSI.NS": "Tata Elxsi"
-    },
-    "💊 Pharma & Healthcare": {
-        "SUNPHARMA.NS": "Sun Pharma", "DRREDDY.NS": "Dr Reddy's", "CIPLA.NS": "Cipla",
-        "DIVISLAB.NS": "Divi's Labs", "AUROPHARMA.NS": "Aurobindo Pharma", "LUPIN.NS": "Lupin",
-        "TORNTPHARM.NS": "Torrent Pharma", "ALKEM.NS": "Alkem Lab", "BIOCON.NS": "Biocon"
-    }
-}
-
-# Industry parameters
-INDUSTRY_PARAMS = {
-    'Technology': {'beta': 1.15, 'debt_equity': 0.1, 'tax_rate': 0.25, 'terminal_growth': 0.04, 'ev_ebitda': 18},
-    'Financial Services': {'beta': 1.0, 'debt_equity': 0.8, 'tax_rate': 0.25, 'terminal_growth': 0.035, 'ev_ebitda': 12},
-    'Consumer Cyclical': {'beta': 1.2, 'debt_equity': 0.4, 'tax_rate': 0.25, 'terminal_growth': 0.04, 'ev_ebitda': 15},
-    'Consumer Defensive': {'beta': 0.7, 'debt_equity': 0.3, 'tax_rate': 0.25, 'terminal_growth': 0.03, 'ev_ebitda': 20},
-    'Healthcare': {'beta': 0.9, 'debt_equity': 0.2, 'tax_rate': 0.25, 'terminal_growth': 0.04, 'ev_ebitda': 16},
-    'Industrials': {'beta': 1.1, 'debt_equity': 0.5, 'tax_rate': 0.25, 'terminal_growth': 0.035, 'ev_ebitda': 12},
-    'Energy': {'beta': 1.3, 'debt_equity': 0.4, 'tax_rate': 0.25, 'terminal_growth': 0.02, 'ev_ebitda': 8},
-    'Basic Materials': {'beta': 1.25, 'debt_equity': 0.35, 'tax_rate': 0.25, 'terminal_growth': 0.025, 'ev_ebitda': 10},
-    'Real Estate': {'beta': 0.9, 'debt_equity': 0.7, 'tax_rate': 0.25, 'terminal_growth': 0.03, 'ev_ebitda': 14},
-    'Utilities': {'beta': 0.6, 'debt_equity': 0.8, 'tax_rate': 0.25, 'terminal_growth': 0.025, 'ev_ebitda': 10},
-    'Communication Services': {'beta': 1.0, 'debt_equity': 0.5, 'tax_rate': 0.25, 'terminal_growth': 0.035, 'ev_ebitda': 12},
-    'Default': {'beta': 1.0, 'debt_equity': 0.4, 'tax_rate': 0.25, 'terminal_growth': 0.03, 'ev_ebitda': 12}
-}
-
-# ============================================
-# UTILITY FUNCTIONS
-# ============================================
-def retry_with_backoff(retries=5, backoff_in_seconds=3):
-    def decorator(func):
-        @wraps(func)
-        def wrapper(*args, **kwargs):
-            x = 0
-            while True:
-                try:
-                    return func(*args, **kwargs)
-                except Exception as e:
-                    if x == retries:
-                        raise
-                    time.sleep(backoff_in_seconds * 2 ** x)
-                    x += 1
-        return wrapper
-    return decorator
-
-@st.cache_data(ttl=10800)
-@retry_with_backoff(retries=5, backoff_in_seconds=3)
-def fetch_stock_data(ticker):
-    """Fetch stock data"""
-    try:
-        time.sleep(1.5)
-        stock = yf.Ticker(ticker)
-        info = stock.info
-        
-        if not info or len(info) < 5:
-            return None, None, None, "Unable to fetch data"
-        
-        try:
-            income_stmt = stock.income_stmt
-            balance_sheet = stock.balance_sheet
-            cash_flow = stock.cash_flow
-        except:
-            income_stmt = pd.DataFrame()
-            balance_sheet = pd.DataFrame()
-            cash_flow = pd.DataFrame()
-        
-        return info, income_stmt, balance_sheet, cash_flow
-    except Exception as e:
-        error_msg = str(e)
-        if "429" in error_msg or "rate" in error_msg.lower():
-            return None, None, None, "RATE_LIMIT"
-        return None, None, None, str(e)[:100]
-
-def calculate_fcf_from_financials(info, income_stmt, cash_flow):
-    """Calculate FCF - Chronological order"""
-    fcf_data = {}
-    
-    try:
-        if cash_flow is not None and not cash_flow.empty:
-            if 'Free Cash Flow' in cash_flow.index:
-                fcf_row = cash_flow.loc['Free Cash Flow']
-                for col in fcf_row.index[:4]:
-                    year = col.year if hasattr(col, 'year') else str(col)[:4]
-                    val = fcf_row[col]
-                    if pd.notna(val):
-                        fcf_data[str(year)] = float(val)
-            else:
-                ocf_row = None
-                capex_row = None
-                
-                for idx in ['Operating Cash Flow', 'Total Cash From Operating Activities']:
-                    if idx in cash_flow.index:
-                        ocf_row = cash_flow.loc[idx]
-                        break
-                
-                for idx in ['Capital Expenditure', 'Capital Expenditures', 'Purchase Of PPE']:
-                    if idx in cash_flow.index:
-                        capex_row = cash_flow.loc[idx]
-                        break
-                
-                if ocf_row is not None and capex_row is not None:
-                    for col in ocf_row.index[:4]:
-                        year = col.year if hasattr(col, 'year') else str(col)[:4]
-                        ocf = float(ocf_row[col]) if pd.notna(ocf_row[col]) else 0
-                        capex = float(capex_row[col]) if pd.notna(capex_row[col]) else 0
-                        fcf_data[str(year)] = ocf + capex if capex < 0 else ocf - abs(capex)
-    except:
-        pass
-    
-    if not fcf_data:
-        operating_cf = info.get('operatingCashflow', 0) or 0
-        capex = abs(info.get('capitalExpenditures', 0) or 0)
-        if operating_cf > 0:
-            fcf_data['TTM'] = operating_cf - capex
-    
-    return dict(sorted(fcf_data.items(), key=lambda x: x[0]))
-
-def calculate_wacc(info, risk_free_rate=0.07, market_premium=0.06):
-    """WACC using CAPM"""
-    sector = info.get('sector', 'Default')
-    params = INDUSTRY_PARAMS.get(sector, INDUSTRY_PARAMS['Default'])
-    
-    beta = info.get('beta', params['beta']) or params['beta']
-    beta = max(0.5, min(2.0, beta))
-    
-    cost_of_equity = risk_free_rate + beta * market_premium
-    
-    total_debt = info.get('totalDebt', 0) or 0
-    interest_expense = info.get('interestExpense', 0) or 0
-    
-    if total_debt > 0 and interest_expense > 0:
-        cost_of_debt = abs(interest_expense) / total_debt
-    else:
-        cost_of_debt = risk_free_rate + 0.02
-    cost_of_debt = min(cost_of_debt, 0.15)
-    
-    tax_rate = params['tax_rate']
-    market_cap = info.get('marketCap', 0) or 0
-    
-    if market_cap > 0 and total_debt > 0:
-        total_value = market_cap + total_debt
-        equity_weight = market_cap / total_value
-        debt_weight = total_debt / total_value
-    else:
-        debt_equity = params['debt_equity']
-        equity_weight = 1 / (1 + debt_equity)
-        debt_weight = debt_equity / (1 + debt_equity)
-    
-    wacc = (equity_weight * cost_of_equity) + (debt_weight * cost_of_debt * (1 - tax_rate))
-    
-    return {
-        'wacc': wacc,
-        'cost_of_equity': cost_of_equity,
-        'cost_of_debt': cost_of_debt,
-        'beta': beta,
-        'equity_weight': equity_weight,
-        'debt_weight': debt_weight,
-        'tax_rate': tax_rate,
-        'risk_free_rate': risk_free_rate,
-        'market_premium': market_premium
-    }
-
-def project_fcf(base_fcf, growth_rates, years=5):
-    """Project FCF"""
-    projected = []
-    current_fcf = base_fcf
-    
-    for i in range(years):
-        growth = growth_rates[i] if i < len(growth_rates) else growth_rates[-1]
-        current_fcf = current_fcf * (1 + growth)
-        projected.append({'year': i + 1, 'fcf': current_fcf, 'growth_rate': growth})
-    
-    return projected
-
-def calculate_terminal_value_gordon(final_fcf, wacc, terminal_growth):
-    """Gordon Growth Model"""
-    if wacc <= terminal_growth:
-        terminal_growth = wacc - 0.02
-    return final_fcf * (1 + terminal_growth) / (wacc - terminal_growth)
-
-def calculate_terminal_value_exit_multiple(final_ebitda, exit_multiple):
-    """Exit Multiple Method"""
-    return final_ebitda * exit_multiple
-
-def calculate_dcf_value(projected_fcf, terminal_value, wacc, net_debt, shares_outstanding):
-    """Calculate DCF fair value"""
-    pv_fcfs = 0
-    for item in projected_fcf:
-        discount_factor = (1 + wacc) ** item['year']
-        pv_fcfs += item['fcf'] / discount_factor
-    
-    final_year = len(projected_fcf)
-    pv_terminal = terminal_value / ((1 + wacc) ** final_year)
-    
-    enterprise_value = pv_fcfs + pv_terminal
-    equity_value = enterprise_value - net_debt
-    
-    fair_value = equity_value / shares_outstanding if shares_outstanding > 0 else 0
-    
-    return {
-        'pv_fcfs': pv_fcfs,
-        'pv_terminal': pv_terminal,
-        'terminal_value': terminal_value,
-        'enterprise_value': enterprise_value,
-        'equity_value': equity_value,
-        'fair_value': max(0, fair_value)
-    }
-
-def run_sensitivity_analysis(base_fcf, growth_rates, wacc_base, terminal_growth_base, net_debt, shares, years=5):
-    """Sensitivity matrix"""
-    wacc_range = [wacc_base - 0.02, wacc_base - 0.01, wacc_base, wacc_base + 0.01, wacc_base + 0.02]
-    growth_range = [terminal_growth_base - 0.01, terminal_growth_base - 0.005, 
-                    terminal_growth_base, terminal_growth_base + 0.005, terminal_growth_base + 0.01]
-    
-    matrix = []
-    for w in wacc_range:
-        row = []
-        for g in growth_range:
-            if w <= g:
-                row.append(0)
-            else:
-                proj = project_fcf(base_fcf, growth_rates, years)
-                tv = calculate_terminal_value_gordon(proj[-1]['fcf'], w, g)
-                result = calculate_dcf_value(proj, tv, w, net_debt, shares)
-                row.append(result['fair_value'])
-        matrix.append(row)
-    
-    return {'matrix': matrix, 'wacc_range': wacc_range, 'growth_range': growth_range}
-
-# ============================================
-# CHART FUNCTIONS - UNIVERSAL PLOTLY SYNTAX
-# ============================================
-def create_fcf_projection_chart(historical_fcf, projected_fcf):
-    """FCF Bar Chart - Compatible with all Plotly versions"""
-    fig = go.Figure()
-    
-    if historical_fcf:
-        years = list(historical_fcf.keys())
-        values = [v / 10000000 for v in historical_fcf.values()]
-        
-        fig.add_trace(go.Bar(
-            x=years, 
-            y=values,
-            name='Historical FCF',
-            marker_color='#667eea',
-            text=[f'₹{v:,.1f} Cr' for v in values],
-            textposition='outside',
-            textfont_size=11,
-            textfont_color='white'
-        ))
-    
-    if projected_fcf:
-        proj_years = [f'Year {p["year"]}' for p in projected_fcf]
-        proj_values = [p['fcf'] / 10000000 for p in projected_fcf]
-        
-        fig.add_trace(go.Bar(
-            x=proj_years, 
-            y=proj_values,
-            name='Projected FCF',
-            marker_color='#00b894',
-            text=[f'₹{v:,.1f} Cr' for v in proj_values],
-            textposition='outside',
-            textfont_size=11,
-            textfont_color='white'
-        ))
-    
-    # Simple layout without nested dicts - using underscore notation
-    fig.update_layout(
-        title_text='Free Cash Flow: Historical & Projected',
-        title_x=0.5,
-        title_font_size=18,
-        title_font_color='white',
-        xaxis_title='Period',
-        xaxis_title_font_color='rgba(255,255,255,0.7)',
-        xaxis_tickfont_color='white',
-        xaxis_showgrid=False,
-        yaxis_title='FCF (₹ Crores)',
-        yaxis_title_font_color='rgba(255,255,255,0.7)',
-        yaxis_tickfont_color='white',
-        yaxis_gridcolor='rgba(255,255,255,0.1)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        height=450,
-        showlegend=True,
-        legend_orientation='h',
-        legend_yanchor='bottom',
-        legend_y=1.02,
-        legend_xanchor='center',
-        legend_x=0.5,
-        legend_font_color='white',
-        margin_t=80,
-        margin_b=50,
-        margin_l=60,
-        margin_r=40,
-        bargap=0.3
-    )
-    
-    return fig
-
-def create_valuation_waterfall(pv_fcfs, pv_terminal, net_debt, equity_value):
-    """Waterfall Chart"""
-    fig = go.Figure(go.Waterfall(
-        orientation="v",
-        measure=["relative", "relative", "relative", "total"],
-        x=["PV of FCFs", "PV of Terminal Value", "Less: Net Debt", "Equity Value"],
-        y=[pv_fcfs / 10000000, pv_terminal / 10000000, -net_debt / 10000000, 0],
-        text=[f'₹{pv_fcfs/10000000:,.0f} Cr', f'₹{pv_terminal/10000000:,.0f} Cr', 
-              f'-₹{net_debt/10000000:,.0f} Cr', f'₹{equity_value/10000000:,.0f} Cr'],
-        textposition="outside",
-        textfont_color='white',
-        textfont_size=12,
-        connector_line_color='rgba(255,255,255,0.3)',
-        connector_line_width=2,
-        increasing_marker_color='#00b894',
-        decreasing_marker_color='#e17055',
-        totals_marker_color='#667eea'
-    ))
-    
-    fig.update_layout(
-        title_text='DCF Valuation Waterfall',
-        title_x=0.5,
-        title_font_size=18,
-        title_font_color='white',
-        xaxis_tickfont_color='white',
-        xaxis_tickfont_size=11,
-        yaxis_title='Value (₹ Crores)',
-        yaxis_title_font_color='rgba(255,255,255,0.7)',
-        yaxis_tickfont_color='white',
-        yaxis_gridcolor='rgba(255,255,255,0.1)',
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        height=450,
-        showlegend=False,
-        margin_t=80,
-        margin_b=50,
-        margin_l=60,
-        margin_r=40
-    )
-    
-    return fig
-
-def create_sensitivity_heatmap(sensitivity_data):
-    """Sensitivity Heatmap"""
-    matrix = sensitivity_data['matrix']
-    wacc_labels = [f'{w*100:.1f}%' for w in sensitivity_data['wacc_range']]
-    growth_labels = [f'{g*100:.2f}%' for g in sensitivity_data['growth_range']]
-    
-    fig = go.Figure(data=go.Heatmap(
-        z=matrix,
-        x=growth_labels,
-        y=wacc_labels,
-        colorscale=[[0, '#d63031'], [0.25, '#e17055'], [0.5, '#fdcb6e'], [0.75, '#00cec9'], [1, '#00b894']],
-        text=[[f'₹{val:,.0f}' for val in row] for row in matrix],
-        texttemplate='%{text}',
-        textfont_size=12,
-        textfont_color='white',
-        hoverongaps=False,
-        colorbar_title_text='Fair Value',
-        colorbar_title_font_color='white',
-        colorbar_tickfont_color='white'
-    ))
-    
-    fig.update_layout(
-        title_text='Sensitivity Analysis: Fair Value (WACC vs Terminal Growth)',
-        title_x=0.5,
-        title_font_size=18,
-        title_font_color='white',
-        xaxis_title='Terminal Growth Rate',
-        xaxis_title_font_color='rgba(255,255,255,0.7)',
-        xaxis_tickfont_color='white',
-        yaxis_title='WACC',
-        yaxis_title_font_color='rgba(255,255,255,0.7)',
-        yaxis_tickfont_color='white',
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        height=450,
-        margin_t=80,
-        margin_b=60,
-        margin_l=80,
-        margin_r=60
-    )
-    
-    return fig
-
-def create_value_gauge(current_price, fair_value, upside):
-    """Fair Value Gauge"""
-    gauge_color = '#00b894' if upside > 0 else '#e17055'
-    max_val = max(fair_value * 1.5, current_price * 1.5, 100)
-    
-    fig = go.Figure(go.Indicator(
-        mode="gauge+number+delta",
-        value=fair_value,
-        number_prefix="₹",
-        number_font_size=40,
-        number_font_color='white',
-        number_valueformat=",.2f",
-        delta_reference=current_price,
-        delta_relative=True,
-        delta_valueformat='.1%',
-        delta_increasing_color='#00b894',
-        delta_decreasing_color='#e17055',
-        delta_font_size=18,
-        title_text="DCF Fair Value",
-        title_font_size=18,
-        title_font_color='white',
-        gauge_axis_range=[0, max_val],
-        gauge_axis_tickfont_color='rgba(255,255,255,0.7)',
-        gauge_bar_color=gauge_color,
-        gauge_bgcolor='rgba(255,255,255,0.05)',
-        gauge_steps=[
-            {'range': [0, current_price * 0.8], 'color': 'rgba(225, 112, 85, 0.3)'},
-            {'range': [current_price * 0.8, current_price], 'color': 'rgba(253, 203, 110, 0.3)'},
-            {'range': [current_price, current_price * 1.2], 'color': 'rgba(0, 206, 201, 0.3)'},
-            {'range': [current_price * 1.2, max_val], 'color': 'rgba(0, 184, 148, 0.3)'}
-        ],
-        gauge_threshold_line_color='white',
-        gauge_threshold_line_width=4,
-        gauge_threshold_thickness=0.8,
-        gauge_threshold_value=current_price
-    ))
-    
-    fig.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        height=350,
-        margin_t=60,
-        margin_b=60,
-        margin_l=40,
-        margin_r=40
-    )
-    
-    fig.add_annotation(
-        x=0.5, y=-0.15, 
-        xref='paper', yref='paper',
-        text=f'Current Price: ₹{current_price:,.2f}', 
-        showarrow=False,
-        font_size=14,
-        font_color='rgba(255,255,255,0.8)'
-    )
-    
-    return fig
-
-def create_value_composition_donut(pv_fcfs, pv_terminal):
-    """Value Composition Donut"""
-    total_ev = pv_fcfs + pv_terminal
-    
-    fig = go.Figure(data=[go.Pie(
-        labels=['PV of FCFs', 'PV of Terminal Value'],
-        values=[pv_fcfs, pv_terminal],
-        hole=0.65,
-        marker_colors=['#667eea', '#00b894'],
-        textinfo='percent',
-        textfont_size=14,
-        textfont_color='white'
-    )])
-    
-    fig.update_layout(
-        title_text='Enterprise Value Composition',
-        title_x=0.5,
-        title_font_size=18,
-        title_font_color='white',
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        height=350,
-        showlegend=True,
-        legend_orientation='h',
-        legend_y=-0.1,
-        legend_x=0.5,
-        legend_xanchor='center',
-        legend_font_color='white',
-        legend_font_size=11,
-        margin_t=80,
-        margin_b=80,
-        margin_l=40,
-        margin_r=40
-    )
-    
-    fig.add_annotation(
-        text=f'₹{total_ev/10000000:,.0f} Cr', 
-        x=0.5, y=0.5,
-        font_size=16,
-        font_color='white',
-        showarrow=False
-    )
-    
-    return fig
-
-# ============================================
-# PDF REPORT
-# ============================================
-def create_dcf_pdf_report(company, ticker, sector, dcf_results, wacc_data, assumptions):
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=18)
-    styles = getSampleStyleSheet()
-    
-    title_style = ParagraphStyle('Title', parent=styles['Heading1'], fontSize=24, 
-                                  textColor=colors.HexColor('#667eea'), alignment=TA_CENTER)
-    section_style = ParagraphStyle('Section', parent=styles['Heading2'], fontSize=14, 
-                                    textColor=colors.HexColor('#667eea'))
-    
-    story = []
-    story.append(Paragraph("NYZTrade DCF Valuation Report", title_style))
-    story.append(Spacer(1, 20))
-    story.append(Paragraph(f"<b>{company}</b>", styles['Heading2']))
-    story.append(Paragraph(f"Ticker: {ticker} | Sector: {sector} | Date: {datetime.now().strftime('%B %d, %Y')}", styles['Normal']))
-    story.append(Spacer(1, 20))
-    
-    story.append(Paragraph("Valuation Summary", section_style))
-    story.append(Spacer(1, 10))
-    
-    val_data = [
-        ['Metric', 'Value'],
-        ['DCF Fair Value', f"₹{dcf_results['fair_value']:,.2f}"],
-        ['Current Price', f"₹{assumptions['current_price']:,.2f}"],
-        ['Upside/Downside', f"{assumptions['upside']:+.1f}%"],
-        ['Enterprise Value', f"₹{dcf_results['enterprise_value']/10000000:,.0f} Cr"],
-        ['Equity Value', f"₹{dcf_results['equity_value']/10000000:,.0f} Cr"]
-    ]
-    
-    val_table = Table(val_data, colWidths=[3*inch, 2.5*inch])
-    val_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#667eea')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f8f9fa'))
-    ]))
-    story.append(val_table)
-    story.append(Spacer(1, 20))
-    
-    story.append(Paragraph("Key Assumptions", section_style))
-    story.append(Spacer(1, 10))
-    
-    assump_data = [
-        ['Parameter', 'Value'],
-        ['WACC', f"{wacc_data['wacc']*100:.2f}%"],
-        ['Cost of Equity', f"{wacc_data['cost_of_equity']*100:.2f}%"],
-        ['Beta', f"{wacc_data['beta']:.2f}"],
-        ['Terminal Growth', f"{assumptions['terminal_growth']*100:.1f}%"],
-        ['Projection Years', f"{assumptions['projection_years']} Years"]
-    ]
-    
-    assump_table = Table(assump_data, colWidths=[3*inch, 2.5*inch])
-    assump_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1a1a2e')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f8f9fa'))
-    ]))
-    story.append(assump_table)
-    story.append(Spacer(1, 30))
-    
-    story.append(Paragraph("<b>DISCLAIMER:</b> Educational purposes only. Not financial advice.", styles['Normal']))
-    
-    doc.build(story)
-    buffer.seek(0)
-    return buffer
-
 # ============================================
 # MAIN APPLICATION
 # ============================================
 
-st.markdown('''
-<div class="main-header">
-    <h1>📊 DCF VALUATION MODEL</h1>
-    <div class="subtitle">5-Year Growth + Exit Multiple | Investing.com Pro Methodology</div>
-</div>
-''', unsafe_allow_html=True)
-
-st.markdown('''
-<div class="feature-grid">
-    <div class="feature-card">
-        <div class="icon">💰</div>
-        <h3>Intrinsic Valuation</h3>
-        <p>DCF with CAPM-based WACC</p>
-    </div>
-    <div class="feature-card">
-        <div class="icon">📈</div>
-        <h3>5-Year Projections</h3>
-        <p>FCF forecasts + Terminal Value</p>
-    </div>
-    <div class="feature-card">
-        <div class="icon">🎯</div>
-        <h3>Sensitivity Analysis</h3>
-        <p>WACC vs Growth scenarios</p>
-    </div>
-</div>
-''', unsafe_allow_html=True)
+# Filled in once the sidebar has set the projection horizon
+header = st.container()
 
 # Sidebar
 if st.sidebar.button("🚪 Logout", use_container_width=True):
@@ -795,17 +175,14 @@ if st.sidebar.button("🚪 Logout", use_container_width=True):
 st.sidebar.markdown("---")
 st.sidebar.markdown("### 📊 Stock Selection")
 
-all_stocks = {}
-for cat, stocks in POPULAR_STOCKS.items():
-    all_stocks.update(stocks)
-
 category = st.sidebar.selectbox("Category", ["All Stocks"] + list(POPULAR_STOCKS.keys()))
 search = st.sidebar.text_input("🔍 Search", placeholder="Company or ticker...")
 
 if search:
-    filtered = {t: n for t, n in all_stocks.items() if search.upper() in t.upper() or search.upper() in n.upper()}
+    # Ranked, typo-tolerant lookup over the full instrument master, indexed once per process
+    filtered = dict(default_search_index().search(search))
 elif category == "All Stocks":
-    filtered = all_stocks
+    filtered = ALL_STOCKS
 else:
     filtered = POPULAR_STOCKS[category]
 
@@ -822,8 +199,8 @@ custom = st.sidebar.text_input("Custom Ticker", placeholder="e.g., TATAMOTORS.NS
 st.sidebar.markdown("---")
 st.sidebar.markdown("### ⚙️ DCF Assumptions")
 
-with st.sidebar.expander("📈 5-Year Growth Rates", expanded=True):
-    st.caption("Annual FCF Growth (%)")
+with st.sidebar.expander("📈 High-Growth Phase (Years 1-5)", expanded=True):
+    st.caption("Annual FCF Growth (%); revenue growth under Revenue × Margin")
     g1 = st.slider("Year 1", -20, 50, 15, format="%d%%") / 100
     g2 = st.slider("Year 2", -20, 50, 12, format="%d%%") / 100
     g3 = st.slider("Year 3", -20, 50, 10, format="%d%%") / 100
@@ -831,6 +208,15 @@ with st.sidebar.expander("📈 5-Year Growth Rates", expanded=True):
     g5 = st.slider("Year 5", -20, 50, 6, format="%d%%") / 100
     growth_rates = [g1, g2, g3, g4, g5]
 
+with st.sidebar.expander("🗓️ Projection Model"):
+    projection_years = st.select_slider("Horizon (Years)", options=[5, 7, 10, 15, 20], value=5)
+    st.caption("Beyond Year 5, growth fades linearly to terminal growth")
+    projection_model = st.radio("Cash Flow Model", ["Compound FCF", "Revenue × Margin"])
+    if projection_model == "Revenue × Margin":
+        target_margin = st.slider("Target Operating Margin (after tax)", 0.0, 50.0, 15.0, step=0.5,
+                                  format="%.1f%%") / 100
+        sales_to_capital = st.slider("Sales-to-Capital", 0.5, 5.0, 2.0, step=0.25, format="%.2fx")
+
 with st.sidebar.expander("💵 WACC Parameters"):
     risk_free_rate = st.slider("Risk-Free Rate", 4.0, 10.0, 7.0, format="%.1f%%") / 100
     market_premium = st.slider("Equity Risk Premium", 3.0, 10.0, 6.0, format="%.1f%%") / 100
@@ -846,76 +232,266 @@ with st.sidebar.expander("🔮 Terminal Value"):
         exit_multiple = st.slider("Exit EV/EBITDA Multiple", 5.0, 25.0, 10.0, format="%.1fx")
         terminal_growth = 0.03
 
-projection_years = 5
+with st.sidebar.expander("🧮 Comparables"):
+    comps_dcf_weight = st.slider("DCF Weight in Blend", 0, 100, 50, step=5, format="%d%%") / 100
+    st.caption("The rest goes to the mean of the median EV/EBITDA, P/E and P/FCF prices")
+
+with st.sidebar.expander("🎯 Sensitivity Grid"):
+    sens_points = st.select_slider("Grid Resolution", options=[5, 9, 25, 50, 100, 200], value=5)
+    sens_wacc_span = st.slider("WACC Range (±)", 0.5, 5.0, 2.0, step=0.5, format="%.1f%%") / 100
+    sens_growth_span = st.slider("Terminal Growth Range (±)", 0.25, 3.0, 1.0, step=0.25, format="%.2f%%") / 100
+
+with st.sidebar.expander("🎲 Monte Carlo"):
+    run_mc = st.checkbox("Enable Simulation")
+    mc_paths = st.select_slider("Paths", options=[10_000, 50_000, 100_000, 250_000, 500_000], value=100_000)
+    mc_growth_sd = st.slider("Growth Volatility (σ)", 0.0, 10.0, 3.0, step=0.5, format="%.1f%%") / 100
+    mc_beta_sd = st.slider("Beta Volatility (σ)", 0.0, 0.5, 0.15, step=0.05, format="%.2f")
+    mc_premium_sd = st.slider("Risk Premium Volatility (σ)", 0.0, 3.0, 1.0, step=0.25, format="%.2f%%") / 100
+    mc_tg_sd = st.slider("Terminal Growth Volatility (σ)", 0.0, 2.0, 0.5, step=0.25, format="%.2f%%") / 100
+    mc_seed = st.number_input("Random Seed", min_value=0, value=42, step=1)
 
 st.sidebar.markdown("---")
 
 if st.sidebar.button("🚀 RUN DCF ANALYSIS", use_container_width=True, type="primary"):
     st.session_state.analyze = custom.upper() if custom else ticker
+    st.session_state.record_valuation = True
+    # A finished fetch is re-read (cheap from the on-disk cache, and retries failures)
+    if st.session_state.get('pending_fetch') is not None and st.session_state.pending_fetch.done():
+        del st.session_state.pending_fetch
+
+header.markdown(f'''
+<div class="main-header">
+    <h1>📊 DCF VALUATION MODEL</h1>
+    <div class="subtitle">{projection_years}-Year Growth + Exit Multiple | Investing.com Pro Methodology</div>
+</div>
+''', unsafe_allow_html=True)
+
+header.markdown(f'''
+<div class="feature-grid">
+    <div class="feature-card">
+        <div class="icon">💰</div>
+        <h3>Intrinsic Valuation</h3>
+        <p>DCF with CAPM-based WACC</p>
+    </div>
+    <div class="feature-card">
+        <div class="icon">📈</div>
+        <h3>{projection_years}-Year Projections</h3>
+        <p>FCF forecasts + Terminal Value</p>
+    </div>
+    <div class="feature-card">
+        <div class="icon">🎯</div>
+        <h3>Sensitivity Analysis</h3>
+        <p>WACC vs Growth scenarios</p>
+    </div>
+</div>
+''', unsafe_allow_html=True)
+
+# Stage timing and profiling for the analysis below; off (and free) unless asked for
+ADMIN_USERS = {"niyas"}
+admin_timing = False
+if st.session_state.get("authenticated_user") in ADMIN_USERS:
+    with st.sidebar.expander("🛠️ Admin: Request Timing"):
+        admin_timing = st.checkbox("Time analysis stages")
+        profiler = st.selectbox("Profiler", ["cprofile", "pyinstrument"])
+        if st.button("🔬 Profile next analysis", use_container_width=True):
+            st.session_state.profile_next = profiler
+        st.caption("Profiles this script thread from the start of the analysis. Fields load on background "
+                   "threads, so the fetch shows up as `fetch_wait`; per-field times are in the stage table.")
+        admin_slot = st.container()
+tracing = admin_timing or 'profile_next' in st.session_state or timing.logging_requested()
+
+# ============================================
+# WATCHLIST
+# ============================================
+# Precomputed by the background worker (python -m nyztrade_dcf.watchlist worker); nothing is fetched here
+user = st.session_state.get("authenticated_user", "demo")
+watchlist = default_watchlist()
+watch_alerts = watchlist.alerts(user)
+watched = watchlist.latest(user)
+if len(watched):
+    label = f"⭐ Watchlist ({len(watched)})" + (f" · 🔔 {len(watch_alerts)} band changes" if len(watch_alerts) else "")
+    with st.expander(label, expanded=bool(len(watch_alerts))):
+        for _, alert in watch_alerts.iterrows():
+            st.warning(f"🔔 {alert['ticker']}: {alert['previous']} → {alert['current']} "
+                       f"({alert['upside']:+.1f}% upside, {alert['raised_at']:%d %b %H:%M})")
+        if len(watch_alerts) and st.button("Mark alerts as read"):
+            watchlist.acknowledge(user)
+            st.rerun()
+        st.dataframe(watched.rename(columns={'ticker': "Ticker", 'valued_at': "Valued", 'price': "Price",
+                                             'fair_value': "Fair Value", 'upside': "Upside %",
+                                             'recommendation': "Band", 'wacc': "WACC", 'error': "Error"}),
+                     use_container_width=True, hide_index=True)
+        history_ticker = st.selectbox("History", watched['ticker'], key="watch_history")
+        history = watchlist.history(user, history_ticker).dropna(subset=['fair_value'])
+        if len(history):
+            st.line_chart(history.set_index('valued_at')[['fair_value', 'price']])
+        unwatch = st.selectbox("Remove", [""] + list(watched['ticker']), key="watch_remove")
+        if unwatch and st.button(f"Stop watching {unwatch}"):
+            watchlist.remove(user, unwatch)
+            st.rerun()
 
 # ============================================
 # MAIN ANALYSIS
 # ============================================
+def show_chart(fig):
+    with timing.stage('plotly_render'):
+        st.plotly_chart(fig, use_container_width=True)
+
+@st.fragment(run_every=0.5)
+def fetch_progress(pending):
+    """Price and WACC as soon as `info` lands; a full rerun once the statements follow"""
+    if pending.done():
+        st.rerun()
+    
+    info = pending.info
+    if info is None:
+        st.info(f"📊 Fetching {pending.ticker}...")
+        return
+    
+    if use_custom_wacc and manual_wacc:
+        wacc_data = manual_wacc_data(manual_wacc, info, risk_free_rate, market_premium)
+    else:
+        wacc_data = calculate_wacc(info, risk_free_rate, market_premium)
+    price = info.get('currentPrice', 0) or info.get('regularMarketPrice', 0)
+    
+    st.markdown(f"### {info.get('longName', pending.ticker)}")
+    c1, c2, c3 = st.columns(3)
+    c1.metric("Price", f"₹{price:,.2f}")
+    c2.metric("WACC", f"{wacc_data['wacc']*100:.2f}%")
+    c3.metric("Market Cap", f"₹{(info.get('marketCap', 0) or 0)/10000000:,.0f} Cr")
+    st.caption(f"⏳ Loading financial statements ({len(pending.arrived)}/{len(pending.fields)} fields)...")
+
+@st.fragment(run_every=0.5)
+def pdf_progress(future):
+    """Placeholder for the PDF build; a full rerun swaps in the download button once it is done"""
+    if future.done():
+        st.rerun()
+    st.button("⏳ Building PDF Report...", disabled=True, use_container_width=True)
+
+REC_BADGES = {
+    'STRONG BUY': ("rec-strong-buy", "🚀 STRONG BUY"),
+    'BUY': ("rec-buy", "✅ BUY"),
+    'ACCUMULATE': ("rec-buy", "📈 ACCUMULATE"),
+    'HOLD': ("rec-hold", "⏸️ HOLD"),
+    'AVOID': ("rec-avoid", "❌ AVOID")
+}
+
 if 'analyze' in st.session_state:
-    t = st.session_state.analyze
+    # Plotly and ReportLab load only once there are results to render
+    from nyztrade_dcf import charts, report
     
-    with st.spinner(f"📊 Analyzing {t}..."):
-        info, income_stmt, balance_sheet, cash_flow = fetch_stock_data(t)
+    t = st.session_state.analyze
+    # A request interrupted by st.stop() leaves its trace behind; every run starts clean
+    timing.stop()
+    # The profiler runs from here, so the fetch kick-off and wait on this thread are in the profile
+    trace = timing.start(f"analysis_{t}", st.session_state.get('profile_next')) if tracing else None
+    
+    # Switching tickers cancels the old fetch; queued loads and backoff sleeps end at once
+    pending = st.session_state.get('pending_fetch')
+    if pending is None or pending.ticker != t:
+        if pending is not None:
+            pending.cancel()
+        pending = st.session_state.pending_fetch = fetch_fundamentals_async(t)
+    
+    # Cache hits finish well within this; anything slower renders progressively
+    with timing.stage('fetch_wait'):
+        fetched = pending.wait(timeout=0.25)
+    if not fetched:
+        fetch_progress(pending)
+        st.stop()
     
-    if isinstance(cash_flow, str):
-        if cash_flow == "RATE_LIMIT":
-            st.error("⏱️ Rate limit reached. Wait 3-5 minutes.")
+    fundamentals = pending.result()
+    if st.session_state.get('fetch_timed') is not pending:
+        # Reported once, by the run that sees it complete; later reruns reuse the result
+        st.session_state.fetch_timed = pending
+        timing.add('fetch', pending.elapsed)
+    # Only a run that gets past the fetch uses up the request; progressive reruns keep it armed
+    st.session_state.pop('profile_next', None)
+    
+    if fundamentals.rate_limited:
+        circuit = yahoo_breaker().state()
+        if circuit['state'] == 'open':
+            st.error(f"⏱️ Yahoo is rate limiting this server. Requests are paused for {circuit['retry_in']:.0f}s; "
+                     "recently viewed tickers still load from the cache.")
         else:
-            st.error(f"Error: {cash_flow}")
+            st.error("⏱️ Rate limit reached. Wait 3-5 minutes.")
         st.stop()
     
-    if not info:
-        st.error("❌ Failed to fetch data")
+    if not fundamentals.ok:
+        st.error(f"Error: {fundamentals.error}")
         st.stop()
     
+    info = fundamentals.info
+    income_stmt = fundamentals.income_stmt
+    cash_flow = fundamentals.cash_flow
+    
     company = info.get('longName', t)
     sector = info.get('sector', 'Default')
     current_price = info.get('currentPrice', 0) or info.get('regularMarketPrice', 0)
     market_cap = info.get('marketCap', 0) or 0
-    shares = info.get('sharesOutstanding', 1)
+    shares = shares_outstanding(info)
+    if shares is None:
+        st.error(f"No shares outstanding reported for {t}; a per-share fair value cannot be computed.")
+        st.stop()
     total_debt = info.get('totalDebt', 0) or 0
     total_cash = info.get('totalCash', 0) or 0
     net_debt = total_debt - total_cash
     ebitda = info.get('ebitda', 0) or 0
+    revenue = info.get('totalRevenue', 0) or 0
     
-    historical_fcf = calculate_fcf_from_financials(info, income_stmt, cash_flow)
+    # Every stage is memoized on its inputs; a slider move only reruns what depends on it
+    graph = st.session_state.setdefault('compute_graph', ComputeGraph())
+    graph.begin()
     
-    if historical_fcf:
-        base_fcf = list(historical_fcf.values())[-1]
-    else:
-        base_fcf = (info.get('operatingCashflow', 0) or 0) - abs(info.get('capitalExpenditures', 0) or 0)
+    historical_fcf = graph.node('historical_fcf', calculate_fcf_from_financials, info, income_stmt, cash_flow)
+    base_fcf, estimated = graph.node('base_fcf', estimate_base_fcf, info, historical_fcf)
     
-    if base_fcf <= 0:
+    if estimated:
         st.warning("⚠️ Negative FCF. Using EBITDA estimate.")
-        base_fcf = ebitda * 0.5 if ebitda > 0 else market_cap * 0.05
     
+    capm_wacc_data = graph.node('wacc', calculate_wacc, info, risk_free_rate, market_premium)
     if use_custom_wacc and manual_wacc:
-        wacc = manual_wacc
-        wacc_data = {'wacc': wacc, 'cost_of_equity': wacc, 'cost_of_debt': wacc*0.7, 
-                     'beta': info.get('beta', 1.0) or 1.0, 'equity_weight': 0.8, 'debt_weight': 0.2,
-                     'tax_rate': 0.25, 'risk_free_rate': risk_free_rate, 'market_premium': market_premium}
+        wacc_data = graph.node('manual_wacc', manual_wacc_data, manual_wacc, info, risk_free_rate, market_premium)
     else:
-        wacc_data = calculate_wacc(info, risk_free_rate, market_premium)
-        wacc = wacc_data['wacc']
+        wacc_data = capm_wacc_data
+    wacc = wacc_data['wacc']
     
-    projected_fcf = project_fcf(base_fcf, growth_rates, projection_years)
+    use_drivers = projection_model == "Revenue × Margin" and revenue > 0
+    if projection_model == "Revenue × Margin" and not use_drivers:
+        st.warning("⚠️ No revenue data. Using compound FCF.")
     
-    if tv_method == "Gordon Growth Model":
-        tv = calculate_terminal_value_gordon(projected_fcf[-1]['fcf'], wacc, terminal_growth)
+    if use_drivers:
+        start_margin = (info.get('operatingMargins', 0) or 0) * (1 - wacc_data['tax_rate'])
+        projected_fcf = graph.node('projection_drivers', project_fcf_drivers, revenue, growth_rates, terminal_growth,
+                                   start_margin, target_margin, sales_to_capital, projection_years)
     else:
-        final_ebitda = ebitda * np.prod([1 + g for g in growth_rates])
-        tv = calculate_terminal_value_exit_multiple(final_ebitda, exit_multiple)
+        projected_fcf = graph.node('projection', project_fcf_multistage, base_fcf, growth_rates, terminal_growth,
+                                   projection_years)
+    growth_path = [p['growth_rate'] for p in projected_fcf]
     
-    dcf_results = calculate_dcf_value(projected_fcf, tv, wacc, net_debt, shares)
+    tv = graph.node('terminal_value', calculate_terminal_value, projected_fcf, wacc, terminal_growth,
+                    exit_multiple, ebitda, growth_path)
+    if exit_multiple is not None:
+        st.caption(f"Sector median EV/EBITDA ({sector}): {sector_params(sector)['ev_ebitda']:.1f}x "
+                   f"· index {index_version()}")
+    
+    dcf_results = graph.node('dcf', calculate_dcf_value, projected_fcf, tv, wacc, net_debt, shares)
     fair_value = dcf_results['fair_value']
     upside = ((fair_value - current_price) / current_price * 100) if current_price > 0 else 0
     
-    sensitivity = run_sensitivity_analysis(base_fcf, growth_rates, wacc, terminal_growth, net_debt, shares)
+    sensitivity = graph.node('sensitivity', run_sensitivity_analysis, base_fcf, growth_path, wacc, terminal_growth,
+                             net_debt, shares, projection_years, wacc_span=sens_wacc_span,
+                             growth_span=sens_growth_span, wacc_points=sens_points, growth_points=sens_points,
+                             projected_fcf=projected_fcf)
+    
+    if run_mc:
+        mc_drivers = {'base_revenue': revenue, 'margin': [p['margin'] for p in projected_fcf],
+                      'sales_to_capital': sales_to_capital} if use_drivers else None
+        mc_results = graph.node('monte_carlo', run_monte_carlo, base_fcf, growth_path, wacc_data,
+                                terminal_growth, net_debt, shares, current_price, projection_years,
+                                growth_sd=mc_growth_sd, beta_sd=mc_beta_sd, premium_sd=mc_premium_sd,
+                                terminal_growth_sd=mc_tg_sd, n_paths=mc_paths, seed=int(mc_seed),
+                                drivers=mc_drivers)
     
     # Display
     st.markdown(f"## {company}")
@@ -946,11 +522,41 @@ if 'analyze' in st.session_state:
         ''', unsafe_allow_html=True)
     
     assumptions_dict = {'current_price': current_price, 'upside': upside, 'terminal_growth': terminal_growth,
-                        'projection_years': projection_years, 'net_debt': net_debt}
-    pdf = create_dcf_pdf_report(company, t, sector, dcf_results, wacc_data, assumptions_dict)
-    st.download_button("📥 Download PDF Report", data=pdf, 
-                       file_name=f"DCF_{t}_{datetime.now().strftime('%Y%m%d')}.pdf",
-                       mime="application/pdf", use_container_width=True)
+                        'projection_years': projection_years, 'net_debt': net_debt,
+                        'projection_model': "Revenue × Margin" if use_drivers else "Compound FCF",
+                        'projected_fcf': projected_fcf}
+    
+    # The PDF is only built on request, on a background thread, and cached by its inputs
+    pdf_args = (company, t, sector, dcf_results, wacc_data, assumptions_dict)
+    pdf_key = report.report_key(t, dcf_results, wacc_data, assumptions_dict)
+    pdf_slot = st.empty()
+    pdf_future = None
+    if st.session_state.get('pdf_requested') == pdf_key:
+        pdf_future = report.pdf_reports().submit(*pdf_args)
+    elif pdf_slot.button("📄 Generate PDF Report", use_container_width=True):
+        st.session_state.pdf_requested = pdf_key
+        pdf_future = report.pdf_reports().submit(*pdf_args)
+    
+    # Saved with the entry; the worker revalues it with exactly these inputs
+    watch_assumptions = {'growth_rates': growth_rates, 'risk_free_rate': risk_free_rate,
+                         'market_premium': market_premium, 'terminal_growth': terminal_growth,
+                         'projection_years': projection_years, 'exit_multiple': exit_multiple,
+                         'manual_wacc': manual_wacc if use_custom_wacc else None,
+                         'projection_model': projection_model}
+    if projection_model == "Revenue × Margin":
+        watch_assumptions.update(target_margin=target_margin, sales_to_capital=sales_to_capital)
+    if st.button("⭐ Watch with these assumptions", use_container_width=True):
+        watchlist.add(user, t, watch_assumptions)
+        watchlist.record(user, t, {'price': current_price, 'fair_value': fair_value, 'upside': upside,
+                                   'recommendation': recommendation(upside), 'wacc': wacc, 'error': None})
+        st.toast(f"⭐ {t} added to your watchlist")
+    
+    # One row per RUN DCF ANALYSIS click; what-if slider reruns after it are not recorded
+    results = default_results()
+    if st.session_state.pop('record_valuation', False):
+        results.append(t, {**watch_assumptions, **wacc_data, **dcf_results, 'base_fcf': base_fcf, 'net_debt': net_debt,
+                           'shares': shares, 'projected_fcf': projected_fcf, 'price': current_price, 'upside': upside,
+                           'recommendation': recommendation(upside)}, sector=sector, user=user)
     
     st.markdown("<div class='divider'></div>", unsafe_allow_html=True)
     
@@ -963,16 +569,7 @@ if 'analyze' in st.session_state:
     m5.metric("Base FCF", f"₹{base_fcf/10000000:,.1f} Cr")
     m6.metric("WACC", f"{wacc*100:.2f}%")
     
-    if upside > 40:
-        rec_cls, rec_txt = "rec-strong-buy", "🚀 STRONG BUY"
-    elif upside > 20:
-        rec_cls, rec_txt = "rec-buy", "✅ BUY"
-    elif upside > 0:
-        rec_cls, rec_txt = "rec-buy", "📈 ACCUMULATE"
-    elif upside > -15:
-        rec_cls, rec_txt = "rec-hold", "⏸️ HOLD"
-    else:
-        rec_cls, rec_txt = "rec-avoid", "❌ AVOID"
+    rec_cls, rec_txt = REC_BADGES[recommendation(upside)]
     
     st.markdown(f'''
     <div class="rec-badge {rec_cls}">
@@ -981,36 +578,111 @@ if 'analyze' in st.session_state:
     </div>
     ''', unsafe_allow_html=True)
     
+    st.markdown("### 🔁 Reverse DCF")
+    if current_price > 0:
+        implied = graph.node('reverse_dcf', reverse_dcf, current_price, base_fcf, growth_path, wacc,
+                             terminal_growth, net_debt, shares, projection_years)
+        assumed = {'implied_growth': sum(growth_rates) / len(growth_rates),
+                   'implied_terminal_growth': terminal_growth, 'implied_wacc': wacc}
+        labels = {'implied_growth': "Implied Growth (uniform)",
+                  'implied_terminal_growth': "Implied Terminal Growth", 'implied_wacc': "Implied WACC"}
+        for col, key in zip(st.columns(3), labels):
+            value = implied[key]
+            col.metric(labels[key], f"{value*100:.2f}%" if value is not None else "N/A",
+                       f"{(value - assumed[key])*100:+.2f} pp vs assumed" if value is not None else None,
+                       delta_color="off")
+        st.caption("What the current price implies on the compound-FCF model, solving for one input at a time "
+                   "with a Gordon terminal value")
+    else:
+        st.info("No current market price for this ticker, so there is nothing to solve the reverse DCF against.")
+    
+    st.markdown("### 🧮 Comparables")
+    # Built once per process from the cache and updated as single tickers refresh
+    peer_index = default_peer_index()
+    if not peer_index.groups(t):
+        peer_index.update(t, info)
+    groups = peer_index.groups(t)
+    if groups:
+        default_group = peer_index.best_group(t, info)
+        group = st.selectbox("Peer Set", groups, index=groups.index(default_group),
+                             format_func=lambda g: f"Sector: {g[1]}" if g[0] == 'sector' else g[1])
+        comps_table = implied_prices(info, peer_index.stats(group, exclude=t))
+        comps = blend(fair_value, comps_table, comps_dcf_weight)
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Comps Value", f"₹{comps['comps_value']:,.2f}" if comps['comps_value'] is not None else "N/A")
+        c2.metric("Comps Range (Q1-Q3)", f"₹{comps['comps_low']:,.0f} - ₹{comps['comps_high']:,.0f}"
+                  if comps['comps_low'] is not None else "N/A")
+        c3.metric("Blended Value", f"₹{comps['blended_value']:,.2f}",
+                  f"{comps['dcf_weight']:.0%} DCF", delta_color="off")
+        shown = comps_table.rename(index=COMPS_LABELS)
+        shown.columns = ["Peers", "Q1 Multiple", "Median Multiple", "Q3 Multiple", "Q1 Price", "Median Price",
+                         "Q3 Price"]
+        st.dataframe(shown.style.format({"Peers": "{:.0f}", "Q1 Multiple": "{:.1f}x", "Median Multiple": "{:.1f}x",
+                                         "Q3 Multiple": "{:.1f}x", "Q1 Price": "₹{:,.2f}",
+                                         "Median Price": "₹{:,.2f}", "Q3 Price": "₹{:,.2f}"}, na_rep="N/A"),
+                     use_container_width=True)
+    else:
+        st.info("No peer group for this ticker")
+    
     st.markdown("<div class='divider'></div>", unsafe_allow_html=True)
     
-    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📈 FCF Projection", "💧 Waterfall", "🎯 Sensitivity", "🍩 Composition", "📋 Tables"])
+    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["📈 FCF Projection", "💧 Waterfall", "🎯 Sensitivity", "🍩 Composition",
+                                                  "🎲 Monte Carlo", "📋 Tables"])
     
     with tab1:
-        fig = create_fcf_projection_chart(historical_fcf, projected_fcf)
-        st.plotly_chart(fig, use_container_width=True)
+        fig = graph.node('chart_fcf', charts.create_fcf_projection_chart, historical_fcf, projected_fcf)
+        show_chart(fig)
     
     with tab2:
-        fig = create_valuation_waterfall(dcf_results['pv_fcfs'], dcf_results['pv_terminal'], net_debt, dcf_results['equity_value'])
-        st.plotly_chart(fig, use_container_width=True)
+        fig = graph.node('chart_waterfall', charts.create_valuation_waterfall, dcf_results['pv_fcfs'],
+                         dcf_results['pv_terminal'], net_debt, dcf_results['equity_value'])
+        show_chart(fig)
     
     with tab3:
-        fig = create_sensitivity_heatmap(sensitivity)
-        st.plotly_chart(fig, use_container_width=True)
+        fig = graph.node('chart_sensitivity', charts.create_sensitivity_heatmap, sensitivity)
+        show_chart(fig)
         st.info("💡 Green = Higher value, Red = Lower value. Rows: WACC, Columns: Terminal Growth")
     
     with tab4:
         c1, c2 = st.columns(2)
         with c1:
-            fig = create_value_composition_donut(dcf_results['pv_fcfs'], dcf_results['pv_terminal'])
-            st.plotly_chart(fig, use_container_width=True)
+            fig = graph.node('chart_composition', charts.create_value_composition_donut,
+                             dcf_results['pv_fcfs'], dcf_results['pv_terminal'])
+            show_chart(fig)
         with c2:
-            fig = create_value_gauge(current_price, fair_value, upside)
-            st.plotly_chart(fig, use_container_width=True)
+            fig = graph.node('chart_gauge', charts.create_value_gauge, current_price, fair_value, upside)
+            show_chart(fig)
     
     with tab5:
+        if run_mc:
+            mc1, mc2, mc3, mc4 = st.columns(4)
+            mc1.metric("P5 Fair Value", f"₹{mc_results['percentiles'][5]:,.2f}")
+            mc2.metric("Median Fair Value", f"₹{mc_results['percentiles'][50]:,.2f}")
+            mc3.metric("P95 Fair Value", f"₹{mc_results['percentiles'][95]:,.2f}")
+            mc4.metric("Probability of Upside", f"{mc_results['prob_upside']*100:.1f}%")
+            
+            fig = graph.node('chart_monte_carlo', charts.create_monte_carlo_histogram, mc_results, current_price)
+            show_chart(fig)
+            
+            pct_df = pd.DataFrame({
+                'Percentile': [f'P{p}' for p in mc_results['percentiles']],
+                'Fair Value': [f'₹{v:,.2f}' for v in mc_results['percentiles'].values()],
+                'vs Price': [f'{(v / current_price - 1) * 100:+.1f}%' if current_price > 0 else 'N/A'
+                             for v in mc_results['percentiles'].values()]
+            })
+            st.dataframe(pct_df, use_container_width=True, hide_index=True)
+            st.info("💡 WACC varies per path with simulated beta and equity risk premium (CAPM), centred on the "
+                    f"{'manual' if use_custom_wacc and manual_wacc else 'CAPM'} WACC of {wacc*100:.2f}%; "
+                    "terminal value uses Gordon Growth.")
+        else:
+            st.info("💡 Enable **Monte Carlo** in the sidebar to simulate the fair value distribution.")
+    
+    with tab6:
         st.markdown("#### Projected FCF")
         fcf_df = pd.DataFrame([{
             'Year': f'Year {p["year"]}',
+            **({'Revenue (₹ Cr)': f'{p["revenue"]/10000000:,.0f}', 'Margin': f'{p["margin"]*100:.1f}%',
+                'Reinvestment (₹ Cr)': f'{p["reinvestment"]/10000000:,.1f}'} if 'revenue' in p else {}),
             'FCF (₹ Cr)': f'{p["fcf"]/10000000:,.1f}',
             'Growth': f'{p["growth_rate"]*100:.1f}%',
             'PV (₹ Cr)': f'{(p["fcf"]/(1+wacc)**p["year"])/10000000:,.1f}'
@@ -1044,6 +716,65 @@ if 'analyze' in st.session_state:
             <div class="value">{val}</div>
         </div>
         ''', unsafe_allow_html=True)
+    
+    past = results.query([t], columns=['fair_value', 'price', 'upside', 'wacc', 'terminal_growth',
+                                       'projection_model', 'source', 'user'])
+    if len(past) > 1:
+        with st.expander(f"🗂️ Past valuations of {t} ({len(past)})"):
+            st.line_chart(past.set_index('valued_at')[['fair_value', 'price']])
+            st.dataframe(past.iloc[::-1].rename(columns={'valued_at': "Valued", 'fair_value': "Fair Value",
+                                                         'price': "Price", 'upside': "Upside %", 'wacc': "WACC",
+                                                         'terminal_growth': "Terminal g",
+                                                         'projection_model': "Model", 'source': "Source",
+                                                         'user': "User"}),
+                         use_container_width=True, hide_index=True)
+    
+    # The build runs on the report thread; never wait for it here
+    if pdf_future is not None and not pdf_future.done():
+        with pdf_slot:
+            pdf_progress(pdf_future)
+    elif pdf_future is not None and pdf_future.exception() is not None:
+        pdf_slot.error(f"PDF report failed: {pdf_future.exception()}")
+    elif pdf_future is not None:
+        pdf_slot.download_button("📥 Download PDF Report", data=pdf_future.result(),
+                                 file_name=f"DCF_{t}_{datetime.now().strftime('%Y%m%d')}.pdf",
+                                 mime="application/pdf", use_container_width=True)
+    
+    total_stages = len(graph.recomputed) + len(graph.reused)
+    with st.expander(f"⚡ Recomputed {len(graph.recomputed)} of {total_stages} stages"):
+        st.caption("Recomputed: " + (", ".join(f"{n} ({graph.timings[n]*1000:.1f} ms)" for n in graph.recomputed) or "none"))
+        st.caption("Reused: " + (", ".join(graph.reused) or "none"))
+        cache_stats = default_cache().stats()
+        st.caption("Fundamentals cache (all sessions): " + " · ".join(f"{v} {k}" for k, v in cache_stats.items()))
+        circuit = yahoo_breaker().state()
+        st.caption(f"Yahoo circuit: {circuit['state'].replace('_', '-')} · "
+                   f"{circuit['recent_rate_limits']} recent 429s · {circuit['trips']} trips · "
+                   f"{circuit['rejected']} fast-failed")
+    
+    trace = timing.stop()
+    if trace is not None:
+        if timing.logging_requested():
+            timing.enable_logging()
+            trace.log()
+        if admin_timing or trace.profile:
+            totals = trace.totals()
+            with admin_slot:
+                st.caption(f"{trace.name}: {trace.elapsed*1000:,.0f} ms total")
+                st.dataframe(pd.DataFrame({'Stage': list(totals), 'ms': list(totals.values()),
+                                           'Share': [v / (trace.elapsed * 1000) for v in totals.values()]})
+                             .style.format({'ms': "{:,.1f}", 'Share': "{:.0%}"}),
+                             hide_index=True, use_container_width=True)
+                st.caption(" · ".join(f"{k}: {v}" for k, v in sorted(trace.counters.items())) or "No counters")
+                st.download_button("📥 Timing JSON", data=json.dumps(trace.record(), indent=1, default=str),
+                                   file_name=f"{trace.name}.json", mime="application/json",
+                                   use_container_width=True)
+                dump = trace.profile_dump()
+                if dump is not None:
+                    st.download_button(f"📥 Profile ({trace.profile})", data=dump[1], file_name=dump[0],
+                                       use_container_width=True)
+                    st.code(trace.profile_text(limit=20), language=None)
+                elif trace.counters.get('profiler_unavailable'):
+                    st.warning("Profiler unavailable (pyinstrument not installed, or another profiler is active)")
 
 else:
     st.markdown('''
@@ -1053,12 +784,12 @@ else:
     </div>
     ''', unsafe_allow_html=True)
     
-    st.markdown("""
+    st.markdown(f"""
     ### 📐 DCF Methodology (Investing.com Pro Style)
     
-    **5-Year Growth + Terminal Value Model:**
+    **{projection_years}-Year Growth + Terminal Value Model:**
     
-    1. **Forecast FCF** for 5 years with custom growth rates
+    1. **Forecast FCF** for {projection_years} years: your growth rates, then a fade to terminal growth
     2. **Calculate WACC** using CAPM model
     3. **Terminal Value** via Gordon Growth or Exit Multiple
     4. **Discount** all cash flows to present value
@@ -1068,8 +799,9 @@ else:
     ```
     WACC = (E/V × Re) + (D/V × Rd × (1-T))
     Cost of Equity = Rf + β × (Rm - Rf)
-    Terminal Value (Gordon) = FCF₅ × (1+g) / (WACC - g)
-    Terminal Value (Exit) = EBITDA₅ × Exit Multiple
+    Terminal Value (Gordon) = FCFₙ × (1+g) / (WACC - g)
+    Terminal Value (Exit) = EBITDAₙ × Exit Multiple
+    (n = {projection_years}, the final projection year)
     ```
     """)
 
@@ -0,0 +1,19 @@
+"""NYZTrade DCF - valuation core shared by the Streamlit app and batch jobs.
+
+Submodules are imported on first attribute access, so `import nyztrade_dcf`
+costs nothing and a batch job that only touches `nyztrade_dcf.valuation`
+never loads Plotly (`charts`), ReportLab (`report`) or yfinance (`yahoo`).
+"""
+import importlib
+
+__all__ = ['asyncfetch', 'backtest', 'bench', 'cache', 'charts', 'comps', 'data', 'engine', 'fetcher', 'graph',
+           'montecarlo', 'providers', 'report', 'results', 'retry', 'screener', 'search', 'sectors', 'timing',
+           'universe', 'valuation', 'watchlist', 'yahoo']
+
+
+def __getattr__(name):
+    if name in __all__:
+        module = importlib.import_module(f'.{name}', __name__)
+        globals()[name] = module
+        return module
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,139 @@
+"""Non-blocking fundamentals fetch for the Streamlit app.
+
+Each ticker is one provider load on a shared thread pool, driven by one
+asyncio loop on a daemon thread. The load reports each field (`info`, then
+the statements) as it arrives, so the price can render before the
+statements land without a separate upstream call per field. The script
+thread only starts a PendingFetch and polls it, so it is never parked on
+yfinance or on a rate-limit backoff. A fetch for a ticker the user has
+navigated away from is cancelled: a queued load never starts and backoff
+sleeps end immediately. Retries are scheduled here rather than inside the
+provider, so those sleeps stay on the loop where cancellation reaches them.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import CancelledError, ThreadPoolExecutor, TimeoutError
+
+from . import timing
+from .providers import Fundamentals
+from .retry import RetryPolicy
+from .yahoo import FIELDS
+
+_loop = None
+_executor = None
+_lock = threading.Lock()
+
+
+def _background():
+    """Process-wide event loop thread and blocking-load pool, started on first use"""
+    global _loop, _executor
+    with _lock:
+        if _loop is None:
+            _executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="fetch-async")
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name="fetch-async-loop", daemon=True).start()
+    return _loop, _executor
+
+
+async def _load(provider, ticker, fields, on_field, executor, retries, backoff, trace=None):
+    """Every field via one blocking provider.stream, retried under a RetryPolicy with a cancellable backoff"""
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+
+    def arrived(field, value):
+        if trace is not None:
+            trace.add(f'fetch.{field}', time.perf_counter() - start)
+        if on_field is not None:
+            on_field(field, value)
+
+    load = timing.bind(trace, provider.without_retries().stream)
+    policy = RetryPolicy(max_attempts=retries + 1, base=backoff)
+    attempt, slept = 0, 0.0
+    while True:
+        try:
+            return await loop.run_in_executor(executor, load, ticker, fields, arrived)
+        except Exception as e:
+            wait = policy.delay(attempt, e, slept)
+            if wait is None:
+                raise
+            if trace is not None:
+                trace.count('retries')
+            await asyncio.sleep(wait)
+            attempt += 1
+            slept += wait
+
+
+async def fetch_async(provider, ticker, fields=FIELDS, on_field=None, executor=None, retries=3, backoff=3,
+                      trace=None):
+    """Load `fields` in one provider call and return a Fundamentals result.
+
+    `on_field(field, value)` is called as each field arrives, `info` first
+    from Yahoo. A failed `info` fails the whole fetch; a failed statement is
+    left out, as load_fundamentals does. Per-field arrival times, retries
+    and cache counts go to `trace` (a timing.Trace) when given.
+    """
+    data = await _load(provider, ticker, tuple(fields), on_field, executor, retries, backoff, trace)
+    return Fundamentals.from_fields(ticker, data)
+
+
+class PendingFetch:
+    """Handle on a background fetch; every method returns immediately unless given a timeout"""
+
+    def __init__(self, provider, ticker, fields=FIELDS, retries=3, backoff=3):
+        self.ticker = ticker
+        self.fields = tuple(fields)
+        self._arrived = {}
+        self._started = time.perf_counter()
+        self._finished = None
+        loop, executor = _background()
+        # The fetch reports to the trace of the request that started it
+        self._future = asyncio.run_coroutine_threadsafe(
+            fetch_async(provider, ticker, fields, self._arrived.__setitem__, executor, retries, backoff,
+                        timing.current()), loop
+        )
+        self._future.add_done_callback(lambda _: setattr(self, '_finished', time.perf_counter()))
+
+    @property
+    def info(self):
+        """`info` as soon as it has arrived, else None"""
+        return self._arrived.get('info')
+
+    @property
+    def arrived(self):
+        return tuple(f for f in self.fields if f in self._arrived)
+
+    @property
+    def elapsed(self):
+        """Seconds from start to completion, or so far"""
+        return (self._finished or time.perf_counter()) - self._started
+
+    def done(self):
+        return self._future.done()
+
+    def wait(self, timeout=None):
+        """Block up to `timeout` seconds for completion; True when done"""
+        try:
+            self._future.result(timeout)
+        except Exception:
+            pass
+        return self._future.done()
+
+    def result(self, timeout=None):
+        """Fundamentals for the ticker; errors and cancellation are reported in `error`"""
+        try:
+            return self._future.result(timeout)
+        except CancelledError:
+            return Fundamentals(self.ticker, error="Cancelled")
+        except TimeoutError:
+            raise
+        except Exception as e:
+            return Fundamentals.failure(self.ticker, e)
+
+    def cancel(self):
+        return self._future.cancel()
+
+
+def start_fetch(provider, ticker, fields=FIELDS, retries=3, backoff=3):
+    """Begin fetching `ticker` from `provider` in the background"""
+    return PendingFetch(provider, ticker, fields, retries, backoff)
@@ -0,0 +1,266 @@
+"""Point-in-time valuation backtester.
+
+    python -m nyztrade_dcf.backtest snapshots/2026-10 --years 10 --fetch-prices
+
+Replays FCF extraction, CAPM WACC and the DCF at every quarter-end using only
+the statements published by then (period end + a reporting lag) and prices
+up to that day. It then measures forward returns by recommendation band. Each
+stage is one vectorized pass over the whole (date x ticker) panel.
+"""
+import argparse
+import sys
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from .engine import dcf_batch, wacc_batch
+from .screener import DEFAULT_GROWTH
+from .universe import INDUSTRY_PARAMS
+from .valuation import CAPEX_LABELS, FCF_LABELS, OCF_LABELS, RECOMMENDATION_BANDS, recommendations
+
+BANDS = tuple(band for band, _ in RECOMMENDATION_BANDS) + ('AVOID',)
+
+# Panel column -> (statement, yfinance line items in order of preference)
+LINE_ITEMS = {
+    'fcf': ('cash_flow', FCF_LABELS),
+    'ocf': ('cash_flow', OCF_LABELS),
+    'capex': ('cash_flow', CAPEX_LABELS),
+    'ebitda': ('income_stmt', ('EBITDA', 'Normalized EBITDA')),
+    'interest_expense': ('income_stmt', ('Interest Expense',)),
+    'total_debt': ('balance_sheet', ('Total Debt',)),
+    'total_cash': ('balance_sheet', ('Cash Cash Equivalents And Short Term Investments', 'Cash And Cash Equivalents')),
+    'shares': ('balance_sheet', ('Ordinary Shares Number', 'Share Issued'))
+}
+
+
+@dataclass
+class BacktestResult:
+    panel: pd.DataFrame
+    summary: pd.DataFrame
+    timings: dict = field(default_factory=dict)
+    skipped: dict = field(default_factory=dict)
+
+
+@contextmanager
+def _stage(timings, name):
+    start = time.perf_counter()
+    yield
+    timings[name] = time.perf_counter() - start
+
+
+def quarter_ends(prices, years):
+    """Quarter-end dates covering the last `years` of `prices`"""
+    last = prices.index.max()
+    return pd.date_range(last - pd.DateOffset(years=years), last, freq=pd.offsets.QuarterEnd())
+
+
+def statement_panel(statements, lag_days=90):
+    """One row per (ticker, period) with the LINE_ITEMS columns and the date it became public"""
+    wanted = {(statement, item): (column, rank)
+              for column, (statement, items) in LINE_ITEMS.items() for rank, item in enumerate(items)}
+    keys = pd.Series(list(zip(statements['statement'], statements['line_item'])), index=statements.index)
+    matched = keys.map(wanted).dropna()
+
+    rows = statements.loc[matched.index, ['ticker', 'period', 'value']].copy()
+    rows['column'] = matched.str[0]
+    rows['rank'] = matched.str[1]
+    rows = rows.dropna(subset=['value']).sort_values('rank', kind='stable')
+    rows = rows.drop_duplicates(['ticker', 'period', 'column'])
+
+    panel = rows.pivot(index=['ticker', 'period'], columns='column', values='value')
+    panel = panel.reindex(columns=list(LINE_ITEMS)).reset_index()
+    panel['period'] = pd.to_datetime(panel['period'])
+    panel['available_at'] = panel['period'] + pd.Timedelta(days=lag_days)
+    return panel
+
+
+def rolling_beta(prices, window=252, market=None):
+    """Rolling beta of daily returns against `market` (default: equal-weight universe)"""
+    returns = prices.pct_change(fill_method=None)
+    market = returns.mean(axis=1) if market is None else market.pct_change(fill_method=None)
+    cov = returns.rolling(window, min_periods=window // 2).cov(market)
+    var = market.rolling(window, min_periods=window // 2).var()
+    return cov.div(var, axis=0)
+
+
+def _as_of(frame, dates):
+    """Last row of `frame` at or before each date; NaN past the end of the data"""
+    values = frame.reindex(frame.index.union(dates)).ffill().reindex(dates)
+    values.loc[dates > frame.index.max()] = np.nan
+    return values
+
+
+def backtest(statements, prices, sectors=None, years=10, growth_rates=DEFAULT_GROWTH, risk_free_rate=0.07,
+             market_premium=0.06, terminal_growth=0.03, projection_years=5, horizons=(3, 12), lag_days=90,
+             shares=None):
+    """Value every ticker at every quarter-end and report forward returns by recommendation band.
+
+    `statements` is the long snapshot table (see SnapshotProvider.statements),
+    `prices` a (dates x tickers) close frame and `sectors` {ticker: sector}
+    for the sector defaults. Those are the static INDUSTRY_PARAMS: the
+    published sector index is built from today's fundamentals and would leak
+    the future into past quarters. Valuations whose balance sheet has no
+    share count are dropped and counted in `skipped`, as are those without a
+    price. `shares` {ticker: shares outstanding} fills them instead; today's
+    count applied to past quarters is look-ahead, so it is opt-in and the
+    filled rows are flagged in `shares_current`. `horizons` are forward
+    windows in months.
+    """
+    timings = {}
+    skipped = {}
+    sectors = sectors or {}
+    tickers = sorted(set(prices.columns) & set(statements['ticker']))
+    prices = prices[tickers].sort_index()
+
+    with _stage(timings, 'statements'):
+        published = statement_panel(statements[statements['ticker'].isin(tickers)], lag_days)
+
+    with _stage(timings, 'point_in_time'):
+        dates = quarter_ends(prices, years)
+        grid = pd.DataFrame({'date': np.repeat(dates, len(tickers)), 'ticker': np.tile(tickers, len(dates))})
+        panel = pd.merge_asof(grid.sort_values('date'), published.sort_values('available_at'),
+                              left_on='date', right_on='available_at', by='ticker')
+        panel = panel.dropna(subset=['period']).reset_index(drop=True)
+
+    with _stage(timings, 'prices'):
+        at = _as_of(prices, dates)
+        beta = _as_of(rolling_beta(prices), dates)
+        index = pd.MultiIndex.from_frame(panel[['date', 'ticker']])
+        panel['price'] = at.stack().reindex(index).to_numpy()
+        panel['beta'] = beta.stack().reindex(index).to_numpy()
+        for months in horizons:
+            forward = _as_of(prices, dates + pd.DateOffset(months=months))
+            forward.index = dates
+            panel[f'return_{months}m'] = (forward / at - 1).stack().reindex(index).to_numpy()
+        # No per-share value without a share count; a zero fair value would land in AVOID
+        panel['shares_current'] = panel['shares'].isna() & panel['ticker'].isin(list(shares or ()))
+        panel['shares'] = panel['shares'].fillna(panel['ticker'].map(shares or {}))
+        priced, counted = panel['price'] > 0, panel['shares'] > 0
+        skipped['no_price'] = int((~priced).sum())
+        skipped['no_shares'] = int((priced & ~counted).sum())
+        panel = panel[priced & counted].reset_index(drop=True)
+
+    with _stage(timings, 'fcf'):
+        # calculate_fcf_from_financials: reported FCF, else OCF less |capex|
+        fcf = panel['fcf'].fillna(panel['ocf'] - panel['capex'].abs()).to_numpy()
+        share_count = panel['shares'].to_numpy(float)
+        market_cap = panel['price'].to_numpy() * share_count
+        ebitda = np.nan_to_num(panel['ebitda'].to_numpy())
+        # estimate_base_fcf fallback for non-positive FCF
+        estimated = ~(fcf > 0)
+        panel['base_fcf'] = np.where(estimated, np.where(ebitda > 0, ebitda * 0.5, market_cap * 0.05), fcf)
+        panel['fcf_estimated'] = estimated
+
+    with _stage(timings, 'wacc'):
+        static = [INDUSTRY_PARAMS.get(sectors.get(t, 'Default')) or INDUSTRY_PARAMS['Default'] for t in tickers]
+        params = pd.DataFrame(static, index=tickers).reindex(panel['ticker']).reset_index(drop=True)
+        beta = panel['beta'].fillna(params['beta']).to_numpy()
+        debt = np.nan_to_num(panel['total_debt'].to_numpy())
+        interest = np.abs(np.nan_to_num(panel['interest_expense'].to_numpy()))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cost_of_debt = np.where((debt > 0) & (interest > 0), interest / debt, risk_free_rate + 0.02)
+            levered = (market_cap > 0) & (debt > 0)
+            debt_weight = np.where(levered, debt / (market_cap + debt),
+                                   params['debt_equity'] / (1 + params['debt_equity']))
+        panel['wacc'] = wacc_batch(beta, market_premium, risk_free_rate, 1 - debt_weight,
+                                   debt_weight, np.minimum(cost_of_debt, 0.15), params['tax_rate'].to_numpy())
+
+    with _stage(timings, 'dcf'):
+        net_debt = debt - np.nan_to_num(panel['total_cash'].to_numpy())
+        valued = dcf_batch(panel['base_fcf'].to_numpy(), np.asarray(growth_rates, dtype=float),
+                           panel['wacc'].to_numpy(), terminal_growth, net_debt, share_count, projection_years)
+        panel['fair_value'] = valued['fair_value']
+        panel['upside'] = (panel['fair_value'] - panel['price']) / panel['price'] * 100
+        panel['recommendation'] = recommendations(panel['upside'])
+
+    with _stage(timings, 'returns'):
+        summary = band_returns(panel, horizons)
+
+    return BacktestResult(panel, summary, timings, skipped)
+
+
+def band_returns(panel, horizons=(3, 12)):
+    """Per band and horizon: observations, mean / median return, hit rate and mean excess over the universe"""
+    frames = []
+    for months in horizons:
+        column = f'return_{months}m'
+        rows = panel.dropna(subset=[column])
+        excess = rows[column] - rows.groupby('date')[column].transform('mean')
+        stats = rows.assign(excess=excess, hit=rows[column] > 0).groupby('recommendation').agg(
+            observations=(column, 'size'),
+            mean_return=(column, 'mean'),
+            median_return=(column, 'median'),
+            hit_rate=('hit', 'mean'),
+            mean_excess=('excess', 'mean')
+        )
+        frames.append(stats.reindex(BANDS).assign(horizon_months=months))
+    summary = pd.concat(frames).rename_axis('recommendation').reset_index()
+    summary['observations'] = summary['observations'].fillna(0).astype(int)
+    return summary
+
+
+def main(argv=None):
+    from .providers import SnapshotProvider, read_prices, write_prices
+    from .valuation import shares_outstanding
+
+    parser = argparse.ArgumentParser(description="Backtest DCF recommendations against realized returns")
+    parser.add_argument("snapshot", help="Snapshot directory with statements (and prices)")
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--growth", default=",".join(f"{g*100:g}" for g in DEFAULT_GROWTH),
+                        help="Comma-separated FCF growth rates in %%")
+    parser.add_argument("--risk-free", type=float, default=7.0, help="Risk-free rate (%%)")
+    parser.add_argument("--premium", type=float, default=6.0, help="Equity risk premium (%%)")
+    parser.add_argument("--terminal-growth", type=float, default=3.0, help="Perpetual growth (%%)")
+    parser.add_argument("--lag", type=int, default=90, help="Days between period end and publication")
+    parser.add_argument("--fetch-prices", action="store_true", help="Download and store prices when missing")
+    parser.add_argument("--current-shares", action="store_true",
+                        help="Value periods without a reported share count at today's sharesOutstanding "
+                             "(look-ahead: share counts change with buybacks, issues and splits)")
+    parser.add_argument("--csv", help="Write the full (date x ticker) panel here")
+    args = parser.parse_args(argv)
+
+    snapshot = SnapshotProvider(args.snapshot)
+    prices = read_prices(args.snapshot)
+    if prices is None:
+        if not args.fetch_prices:
+            parser.error(f"No prices in {args.snapshot}; pass --fetch-prices")
+        from .yahoo import load_price_history
+        start = pd.Timestamp.today().normalize() - pd.DateOffset(years=args.years + 2)
+        prices = load_price_history(snapshot.tickers, start)
+        write_prices(args.snapshot, prices)
+
+    infos = {t: snapshot.load(t, ('info',))['info'] for t in snapshot.tickers}
+    sectors = {t: info.get('sector', 'Default') for t, info in infos.items()}
+    shares = None
+    if args.current_shares:
+        print("Warning: --current-shares applies today's share counts to past quarters; "
+              "the results carry look-ahead bias", file=sys.stderr)
+        shares = {t: shares_outstanding(info) for t, info in infos.items()}
+        shares = {t: n for t, n in shares.items() if n}
+    result = backtest(
+        snapshot.statements, prices, sectors,
+        shares=shares,
+        years=args.years,
+        growth_rates=[float(g) / 100 for g in args.growth.split(",")],
+        risk_free_rate=args.risk_free / 100,
+        market_premium=args.premium / 100,
+        terminal_growth=args.terminal_growth / 100,
+        lag_days=args.lag
+    )
+
+    if args.csv:
+        result.panel.to_csv(args.csv, index=False)
+    print(result.summary.to_string(index=False, float_format=lambda v: f"{v:,.4f}"))
+    print(f"\n{len(result.panel):,} valuations; " +
+          ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in result.timings.items()))
+    print(f"Skipped {result.skipped['no_shares']:,} without shares outstanding, "
+          f"{result.skipped['no_price']:,} without a price")
+    if args.current_shares:
+        print(f"{int(result.panel['shares_current'].sum()):,} valuations used today's share count")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""Offline benchmarks for the valuation, sensitivity, chart and PDF hot paths.
+
+    python -m nyztrade_dcf.bench                        # run, compare with the baseline, record if it passes
+    python -m nyztrade_dcf.bench --cases chart --scale single --repeat 10
+    python -m nyztrade_dcf.bench --threshold 0.10 --no-record
+    python -m nyztrade_dcf.bench --accept               # record and pin as the baseline even if slower
+
+Every case runs against deterministic fixture fundamentals, for one ticker
+(`single`) and for every universe ticker in turn (`universe`). The wall time
+is the median of `repeat` timed runs. Memory comes from one extra run under
+tracemalloc: the peak above the starting point, and the bytes and blocks
+still held afterwards. Results are appended to a JSON history. A case whose
+median time or peak memory grows past `threshold` relative to the baseline
+makes the command exit non-zero, and the run is not recorded.
+
+The baseline is pinned: the first recorded run, until a run is recorded with
+--pin or --accept. Comparing with the previous run instead would let a
+series of slowdowns, each under the threshold, pass one by one.
+"""
+import argparse
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .universe import universe_tickers
+
+SCHEMA = 1
+SCALES = ('single', 'universe')
+GROWTH = [0.15, 0.12, 0.10, 0.08, 0.06]
+
+# Below these the difference is timer / allocator noise, whatever the ratio
+MIN_DELTA_MS = 0.5
+MIN_DELTA_KB = 64
+
+
+def fixture_fundamentals(tickers, seed=0):
+    """{ticker: {'info', 'income_stmt', 'balance_sheet', 'cash_flow'}} shaped like yfinance output"""
+    rng = np.random.default_rng(seed)
+    periods = pd.to_datetime(['2025-03-31', '2024-03-31', '2023-03-31', '2022-03-31'])
+    data = {}
+    for ticker in tickers:
+        revenue = rng.uniform(5e10, 5e12)
+        margin = rng.uniform(0.08, 0.30)
+        shares = rng.uniform(1e8, 5e9)
+        growth = rng.uniform(0.9, 1.0, 4).cumprod()
+        ocf = revenue * margin * growth
+        capex = -revenue * rng.uniform(0.02, 0.08) * growth
+        price = rng.uniform(100, 4000)
+        data[ticker] = {
+            'info': {'longName': ticker, 'sector': 'Technology', 'currentPrice': price,
+                     'marketCap': price * shares, 'sharesOutstanding': shares, 'beta': rng.uniform(0.6, 1.6),
+                     'totalDebt': revenue * rng.uniform(0, 0.5), 'totalCash': revenue * rng.uniform(0, 0.2),
+                     'ebitda': revenue * margin * 1.3, 'totalRevenue': revenue, 'operatingMargins': margin,
+                     'interestExpense': revenue * 0.01, 'operatingCashflow': ocf[0], 'capitalExpenditures': capex[0]},
+            'income_stmt': pd.DataFrame([revenue * growth, revenue * margin * 1.3 * growth,
+                                         revenue * margin * 0.7 * growth],
+                                        index=['Total Revenue', 'EBITDA', 'Net Income'], columns=periods),
+            'balance_sheet': pd.DataFrame([np.full(4, revenue * 0.3), np.full(4, shares)],
+                                          index=['Total Debt', 'Ordinary Shares Number'], columns=periods),
+            'cash_flow': pd.DataFrame([ocf + capex, ocf, capex],
+                                      index=['Free Cash Flow', 'Operating Cash Flow', 'Capital Expenditure'],
+                                      columns=periods)
+        }
+    return data
+
+
+def prepare(data):
+    """Per-ticker intermediate results, so each case times only its own stage"""
+    from .montecarlo import run_monte_carlo
+    from .valuation import (calculate_dcf_value, calculate_fcf_from_financials, calculate_terminal_value,
+                            calculate_wacc, estimate_base_fcf, project_fcf, run_sensitivity_analysis)
+
+    prepared = []
+    for ticker, fields in data.items():
+        info = fields['info']
+        historical_fcf = calculate_fcf_from_financials(info, fields['income_stmt'], fields['cash_flow'])
+        base_fcf, _ = estimate_base_fcf(info, historical_fcf)
+        wacc_data = calculate_wacc(info)
+        projected = project_fcf(base_fcf, GROWTH)
+        net_debt = info['totalDebt'] - info['totalCash']
+        tv = calculate_terminal_value(projected, wacc_data['wacc'], 0.03)
+        dcf = calculate_dcf_value(projected, tv, wacc_data['wacc'], net_debt, info['sharesOutstanding'])
+        price = info['currentPrice']
+        prepared.append({
+            'ticker': ticker, **fields, 'historical_fcf': historical_fcf, 'base_fcf': base_fcf,
+            'wacc_data': wacc_data, 'projected': projected, 'terminal_value': tv, 'net_debt': net_debt, 'dcf': dcf,
+            'upside': (dcf['fair_value'] - price) / price * 100,
+            'sensitivity': run_sensitivity_analysis(base_fcf, GROWTH, wacc_data['wacc'], 0.03, net_debt,
+                                                    info['sharesOutstanding']),
+            'monte_carlo': run_monte_carlo(base_fcf, GROWTH, wacc_data, 0.03, net_debt, info['sharesOutstanding'],
+                                           price, n_paths=10_000, seed=0),
+            'assumptions': {'current_price': price, 'upside': (dcf['fair_value'] - price) / price * 100,
+                            'terminal_growth': 0.03, 'projection_years': 5, 'net_debt': net_debt,
+                            'projection_model': "Compound FCF", 'projected_fcf': projected}
+        })
+    return prepared
+
+
+def cases():
+    """{name: f(prepared ticker)}; imports happen here so `--cases` never pays for unused modules"""
+    from . import charts
+    from .report import create_dcf_pdf_report
+    from .valuation import (calculate_dcf_value, calculate_fcf_from_financials, calculate_wacc, project_fcf,
+                            run_sensitivity_analysis)
+
+    return {
+        'calculate_fcf_from_financials': lambda p: calculate_fcf_from_financials(p['info'], p['income_stmt'],
+                                                                                 p['cash_flow']),
+        'calculate_wacc': lambda p: calculate_wacc(p['info']),
+        'project_fcf': lambda p: project_fcf(p['base_fcf'], GROWTH),
+        'calculate_dcf_value': lambda p: calculate_dcf_value(p['projected'], p['terminal_value'],
+                                                             p['wacc_data']['wacc'], p['net_debt'],
+                                                             p['info']['sharesOutstanding']),
+        'run_sensitivity_analysis': lambda p: run_sensitivity_analysis(p['base_fcf'], GROWTH, p['wacc_data']['wacc'],
+                                                                       0.03, p['net_debt'],
+                                                                       p['info']['sharesOutstanding']),
+        'create_fcf_projection_chart': lambda p: charts.create_fcf_projection_chart(p['historical_fcf'],
+                                                                                    p['projected']),
+        'create_valuation_waterfall': lambda p: charts.create_valuation_waterfall(
+            p['dcf']['pv_fcfs'], p['dcf']['pv_terminal'], p['net_debt'], p['dcf']['equity_value']),
+        'create_sensitivity_heatmap': lambda p: charts.create_sensitivity_heatmap(p['sensitivity']),
+        'create_value_gauge': lambda p: charts.create_value_gauge(p['info']['currentPrice'], p['dcf']['fair_value'],
+                                                                  p['upside']),
+        'create_value_composition_donut': lambda p: charts.create_value_composition_donut(p['dcf']['pv_fcfs'],
+                                                                                          p['dcf']['pv_terminal']),
+        'create_monte_carlo_histogram': lambda p: charts.create_monte_carlo_histogram(p['monte_carlo'],
+                                                                                      p['info']['currentPrice']),
+        'create_dcf_pdf_report': lambda p: create_dcf_pdf_report(p['info']['longName'], p['ticker'],
+                                                                 p['info']['sector'], p['dcf'], p['wacc_data'],
+                                                                 p['assumptions'])
+    }
+
+
+def measure(func, items, repeat=5):
+    """Median / min wall time over `repeat` passes of `func` over `items`, then one traced pass for memory"""
+    func(items[0])  # warm-up: first-call imports and caches are not the hot path
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        times.append((time.perf_counter() - start) * 1000)
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    blocks = sys.getallocatedblocks()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    results = [func(item) for item in items]
+    current, peak = tracemalloc.get_traced_memory()
+    retained_blocks = sys.getallocatedblocks() - blocks
+    del results
+    if not tracing:
+        tracemalloc.stop()
+    return {'n': len(items), 'median_ms': statistics.median(times), 'min_ms': min(times),
+            'peak_kb': (peak - before) / 1024, 'retained_kb': (current - before) / 1024,
+            'retained_blocks': retained_blocks}
+
+
+def run(patterns=None, scales=SCALES, repeat=5, seed=0, progress=None):
+    """[{'case', 'scale', ...measure()}] for every case matching any of `patterns` (fnmatch, default all)"""
+    tickers = universe_tickers()
+    prepared = prepare(fixture_fundamentals(tickers, seed))
+    sizes = {'single': prepared[:1], 'universe': prepared}
+    selected = {name: func for name, func in cases().items()
+                if not patterns or any(fnmatch.fnmatch(name, f"*{p}*") for p in patterns)}
+    results = []
+    for name, func in selected.items():
+        for scale in scales:
+            result = {'case': name, 'scale': scale, **measure(func, sizes[scale], repeat)}
+            results.append(result)
+            if progress is not None:
+                progress(result)
+    return results
+
+
+def _commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=5,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def load_history(path):
+    """Recorded runs, oldest first; empty when the file is missing or from another schema"""
+    try:
+        with open(path) as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return payload.get('runs', []) if payload.get('schema') == SCHEMA else []
+
+
+def pinned_baseline(history):
+    """The most recently pinned run, else the oldest one; None for an empty history"""
+    for entry in reversed(history):
+        if entry.get('pinned'):
+            return entry
+    return history[0] if history else None
+
+
+def record(path, results, repeat, pinned=False):
+    """Append one run to the history at `path`, `pinned` as the baseline for later runs; returns it"""
+    runs = load_history(path)
+    entry = {'run_at': datetime.now().isoformat(timespec='seconds'), 'commit': _commit(),
+             'python': platform.python_version(), 'machine': platform.node(), 'repeat': repeat, 'results': results,
+             'pinned': pinned}
+    runs.append(entry)
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump({'schema': SCHEMA, 'runs': runs}, f, indent=1)
+    os.replace(tmp, path)
+    return entry
+
+
+def compare(results, baseline, threshold=0.20, memory_threshold=None):
+    """Per (case, scale) change against a baseline run's results; `regressed` marks growth past the thresholds"""
+    memory_threshold = threshold if memory_threshold is None else memory_threshold
+    current = pd.DataFrame(results).set_index(['case', 'scale'])
+    frame = current[['median_ms', 'peak_kb']]
+    if baseline:
+        base = pd.DataFrame(baseline).set_index(['case', 'scale'])[['median_ms', 'peak_kb']]
+        frame = frame.join(base, rsuffix='_base')
+    else:
+        frame = frame.assign(median_ms_base=np.nan, peak_kb_base=np.nan)
+    frame['time_change'] = frame['median_ms'] / frame['median_ms_base'] - 1
+    frame['memory_change'] = frame['peak_kb'] / frame['peak_kb_base'] - 1
+    slower = (frame['time_change'] > threshold) & (frame['median_ms'] - frame['median_ms_base'] > MIN_DELTA_MS)
+    larger = (frame['memory_change'] > memory_threshold) & (frame['peak_kb'] - frame['peak_kb_base'] > MIN_DELTA_KB)
+    frame['regressed'] = slower | larger
+    return frame.reset_index()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the valuation, chart and PDF hot paths offline")
+    parser.add_argument("--cases", help="Comma-separated substrings or globs of case names (default: all)")
+    parser.add_argument("--scale", default=",".join(SCALES), help="single, universe or both")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed passes per case")
+    parser.add_argument("--seed", type=int, default=0, help="Fixture seed")
+    parser.add_argument("--history", default="bench_history.json", help="JSON history to compare with and append to")
+    parser.add_argument("--baseline", type=int, default=None,
+                        help="History index to compare with (default: the pinned baseline)")
+    parser.add_argument("--threshold", type=float, default=0.20, help="Allowed slowdown, as a fraction")
+    parser.add_argument("--memory-threshold", type=float, default=None, help="Allowed peak memory growth")
+    parser.add_argument("--no-record", action="store_true", help="Compare only; leave the history untouched")
+    parser.add_argument("--pin", action="store_true", help="Pin this run as the baseline if it passes")
+    parser.add_argument("--accept", action="store_true",
+                        help="Record and pin this run even if it regressed (an intended trade-off)")
+    args = parser.parse_args(argv)
+
+    scales = [s.strip() for s in args.scale.split(",")]
+    unknown = set(scales) - set(SCALES)
+    if unknown:
+        parser.error(f"Unknown scale: {', '.join(sorted(unknown))}")
+
+    def progress(r):
+        print(f"{r['case']:<32} {r['scale']:<9} {r['n']:>4} × {r['median_ms']:>10.2f} ms  "
+              f"peak {r['peak_kb']:>9,.0f} KB", flush=True)
+
+    results = run(args.cases.split(",") if args.cases else None, scales, args.repeat, args.seed, progress)
+    if not results:
+        parser.error(f"No case matches {args.cases!r}; cases: {', '.join(cases())}")
+    history = load_history(args.history)
+    if args.baseline is None:
+        baseline = pinned_baseline(history)
+    else:
+        try:
+            baseline = history[args.baseline]
+        except IndexError:
+            parser.error(f"No run {args.baseline} in {args.history} ({len(history)} recorded)")
+    report = compare(results, baseline['results'] if baseline else None, args.threshold, args.memory_threshold)
+    regressed = report[report['regressed']]
+
+    if baseline:
+        print(f"\nvs {baseline['run_at']} ({baseline.get('commit') or 'unknown commit'}):")
+        shown = report[['case', 'scale', 'median_ms', 'median_ms_base', 'time_change', 'peak_kb', 'memory_change',
+                        'regressed']]
+        print(shown.to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+    if not args.no_record:
+        if len(regressed) and not args.accept:
+            print(f"\nNot recorded to {args.history}: fix the regression, or pass --accept to make it the baseline")
+        else:
+            pin = args.pin or args.accept or not history
+            record(args.history, results, args.repeat, pinned=pin)
+            print(f"\nRecorded to {args.history}" + (" as the pinned baseline" if pin else ""))
+
+    if len(regressed) and not args.accept:
+        print(f"\n{len(regressed)} regression(s) past {args.threshold:.0%}: " +
+              ", ".join(f"{c}[{s}]" for c, s in zip(regressed['case'], regressed['scale'])))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
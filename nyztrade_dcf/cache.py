@@ -0,0 +1,284 @@
+"""Persistent fundamentals cache shared by all worker processes.
+
+Entries are stored per (ticker, field) in a SQLite file, so `info` (prices)
+and the annual statements each get their own TTL. An entry past its TTL but
+within its stale window is served immediately while a background thread
+refreshes it (stale-while-revalidate); past the stale window it is refetched
+synchronously.
+
+Upstream fetches are single-flight per (ticker, field): concurrent requests
+in this process wait for the one already in flight, and a per-field file
+lock does the same across processes sharing the cache file.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: coalescing stays in-process
+    fcntl = None
+
+from . import timing
+from .retry import is_rate_limit
+from .yahoo import FIELDS
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+# Prices in `info` move intraday; annual statements change quarterly at most
+DEFAULT_TTLS = {'info': 3 * HOUR, 'income_stmt': 7 * DAY, 'balance_sheet': 7 * DAY, 'cash_flow': 7 * DAY}
+DEFAULT_STALE = {'info': 1 * DAY, 'income_stmt': 90 * DAY, 'balance_sheet': 90 * DAY, 'cash_flow': 90 * DAY}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fundamentals (
+    ticker TEXT NOT NULL,
+    field TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (ticker, field)
+)
+"""
+
+
+# In-flight upstream fetches, shared by every FundamentalsCache on the same file
+_flights = {}
+_flights_lock = threading.Lock()
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+
+
+def default_cache_path():
+    """$NYZTRADE_CACHE_DIR/fundamentals.sqlite3, else under ~/.cache/nyztrade_dcf"""
+    root = os.environ.get('NYZTRADE_CACHE_DIR') or os.path.join(os.path.expanduser('~'), '.cache', 'nyztrade_dcf')
+    return os.path.join(root, 'fundamentals.sqlite3')
+
+
+class FundamentalsCache:
+    """SQLite-backed cache of `info`, `income_stmt`, `balance_sheet` and `cash_flow`"""
+
+    def __init__(self, path=None, ttls=None, stale=None, process_lock=True, clock=time.time):
+        self.path = path or default_cache_path()
+        self._clock = clock
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self.stale = {**DEFAULT_STALE, **(stale or {})}
+        self.process_lock = process_lock and fcntl is not None
+        self._local = threading.local()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'coalesced': 0, 'served_expired': 0}
+        self._listeners = []
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(_SCHEMA)
+        conn.commit()
+
+    def _connect(self):
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def entries(self, ticker, fields=FIELDS):
+        """{field: (value, fetched_at)} for the cached fields of one ticker"""
+        marks = ','.join('?' * len(fields))
+        rows = self._connect().execute(
+            f"SELECT field, fetched_at, payload FROM fundamentals WHERE ticker = ? AND field IN ({marks})",
+            (ticker, *fields)
+        ).fetchall()
+        return {field: (pickle.loads(payload), fetched_at) for field, fetched_at, payload in rows}
+
+    def missing(self, tickers, fields=FIELDS):
+        """Tickers with any of `fields` absent or past its stale window"""
+        now = self._clock()
+        usable = {}
+        for ticker, field, fetched_at in self._connect().execute(
+                "SELECT ticker, field, fetched_at FROM fundamentals"):
+            if field in self.ttls and now - fetched_at <= self.ttls[field] + self.stale[field]:
+                usable.setdefault(ticker, set()).add(field)
+        needed = set(fields)
+        return [t for t in tickers if not needed <= usable.get(t, set())]
+
+    def put(self, ticker, values, fetched_at=None):
+        """Store {field: value} for one ticker"""
+        fetched_at = self._clock() if fetched_at is None else fetched_at
+        conn = self._connect()
+        conn.executemany(
+            "INSERT OR REPLACE INTO fundamentals (ticker, field, fetched_at, payload) VALUES (?, ?, ?, ?)",
+            [(ticker, field, fetched_at, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+             for field, value in values.items()]
+        )
+        conn.commit()
+        for listener in self._listeners:
+            try:
+                listener(ticker, values)
+            except Exception:
+                pass
+
+    def subscribe(self, listener):
+        """Call `listener(ticker, values)` after every put through this instance, e.g. to keep an index current"""
+        self._listeners.append(listener)
+
+    def invalidate(self, ticker=None):
+        """Drop one ticker, or everything"""
+        conn = self._connect()
+        if ticker is None:
+            conn.execute("DELETE FROM fundamentals")
+        else:
+            conn.execute("DELETE FROM fundamentals WHERE ticker = ?", (ticker,))
+        conn.commit()
+
+    def get(self, ticker, loader, fields=FIELDS, revalidate=True):
+        """Return {field: value}, calling `loader(ticker, fields)` only for what is missing or expired.
+
+        Fields within their stale window are returned as-is and refreshed on a
+        background thread when `revalidate` is set. Loader errors propagate
+        only from the synchronous path, except rate limits (including an open
+        circuit breaker): expired values still on disk are served instead, and
+        fields never cached are left out, as a partial upstream load would.
+        """
+        now = self._clock()
+        cached = self.entries(ticker, fields)
+        result, stale, expired = {}, [], []
+
+        for field in fields:
+            if field not in cached:
+                expired.append(field)
+                continue
+            value, fetched_at = cached[field]
+            age = now - fetched_at
+            if age <= self.ttls[field]:
+                result[field] = value
+            elif age <= self.ttls[field] + self.stale[field]:
+                result[field] = value
+                stale.append(field)
+            else:
+                expired.append(field)
+
+        if expired:
+            # Piggy-back stale fields on the synchronous fetch
+            try:
+                result.update(self._fetch(ticker, loader, tuple(expired + stale)))
+            except Exception as e:
+                # While upstream is rate limiting us, old data beats an error page
+                kept = {field: cached[field][0] for field in expired if field in cached}
+                if not is_rate_limit(e) or not kept:
+                    raise
+                result.update(kept)
+                self._count('served_expired')
+        else:
+            self._count('hits')
+            if stale and revalidate:
+                self._revalidate(ticker, loader, tuple(stale))
+
+        return result
+
+    def stats(self):
+        """{'hits', 'misses', 'coalesced', 'served_expired'}: gets served from the cache,
+        upstream loader calls, gets answered by another thread's or process's fetch,
+        and expired entries served because upstream was rate limiting"""
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, name):
+        with self._lock:
+            self._stats[name] += 1
+        timing.count(f'cache_{name}')
+
+    def _fetch(self, ticker, loader, fields):
+        """Single-flight upstream fetch of `fields`; joins fetches already in flight"""
+        mine, theirs = [], []
+        with _flights_lock:
+            for field in fields:
+                key = (self.path, ticker, field)
+                if key in _flights:
+                    theirs.append(_flights[key])
+                else:
+                    _flights[key] = _Flight()
+                    mine.append(field)
+
+        fresh, error = {}, None
+        try:
+            if mine:
+                fresh = self._lead(ticker, loader, mine)
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            with _flights_lock:
+                for field in mine:
+                    flight = _flights.pop((self.path, ticker, field))
+                    flight.error = error
+                    flight.done.set()
+
+        if theirs:
+            for flight in theirs:
+                flight.done.wait()
+                if flight.error is not None:
+                    raise flight.error
+            self._count('coalesced')
+            joined = [f for f in fields if f not in mine]
+            fresh.update({field: value for field, (value, _) in self.entries(ticker, joined).items()})
+        return fresh
+
+    def _lead(self, ticker, loader, fields):
+        with self._process_locks(ticker, fields):
+            # Another process may have fetched these while we waited on its lock
+            reused = {}
+            if self.process_lock:
+                now = self._clock()
+                reused = {field: value for field, (value, fetched_at) in self.entries(ticker, fields).items()
+                          if now - fetched_at <= self.ttls[field]}
+                if reused:
+                    self._count('coalesced')
+            remaining = tuple(f for f in fields if f not in reused)
+            if not remaining:
+                return reused
+            self._count('misses')
+            fresh = loader(ticker, remaining)
+            self.put(ticker, fresh)
+            return {**reused, **fresh}
+
+    @contextmanager
+    def _process_locks(self, ticker, fields):
+        """Exclusive flock per (ticker, field), taken in sorted order"""
+        with ExitStack() as stack:
+            if self.process_lock:
+                directory = f"{self.path}.locks"
+                os.makedirs(directory, exist_ok=True)
+                for field in sorted(fields):
+                    name = f"{ticker}.{field}".replace(os.sep, '_')
+                    handle = stack.enter_context(open(os.path.join(directory, name), 'a'))
+                    fcntl.flock(handle, fcntl.LOCK_EX)
+            yield
+
+    def _revalidate(self, ticker, loader, fields):
+        key = (ticker, fields)
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                self._fetch(ticker, loader, fields)
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=refresh, name=f"revalidate-{ticker}", daemon=True).start()
@@ -0,0 +1,321 @@
+"""Plotly chart builders for the results tabs"""
+import numpy as np
+import plotly.graph_objects as go
+
+
+def create_fcf_projection_chart(historical_fcf, projected_fcf):
+    """FCF Bar Chart - Compatible with all Plotly versions"""
+    fig = go.Figure()
+
+    if historical_fcf:
+        years = list(historical_fcf.keys())
+        values = [v / 10000000 for v in historical_fcf.values()]
+
+        fig.add_trace(go.Bar(
+            x=years,
+            y=values,
+            name='Historical FCF',
+            marker_color='#667eea',
+            text=[f'₹{v:,.1f} Cr' for v in values],
+            textposition='outside',
+            textfont_size=11,
+            textfont_color='white'
+        ))
+
+    if projected_fcf:
+        proj_years = [f'Year {p["year"]}' for p in projected_fcf]
+        proj_values = [p['fcf'] / 10000000 for p in projected_fcf]
+
+        fig.add_trace(go.Bar(
+            x=proj_years,
+            y=proj_values,
+            name='Projected FCF',
+            marker_color='#00b894',
+            text=[f'₹{v:,.1f} Cr' for v in proj_values],
+            textposition='outside',
+            textfont_size=11,
+            textfont_color='white'
+        ))
+
+    # Simple layout without nested dicts - using underscore notation
+    fig.update_layout(
+        title_text='Free Cash Flow: Historical & Projected',
+        title_x=0.5,
+        title_font_size=18,
+        title_font_color='white',
+        xaxis_title='Period',
+        xaxis_title_font_color='rgba(255,255,255,0.7)',
+        xaxis_tickfont_color='white',
+        xaxis_showgrid=False,
+        yaxis_title='FCF (₹ Crores)',
+        yaxis_title_font_color='rgba(255,255,255,0.7)',
+        yaxis_tickfont_color='white',
+        yaxis_gridcolor='rgba(255,255,255,0.1)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        height=450,
+        showlegend=True,
+        legend_orientation='h',
+        legend_yanchor='bottom',
+        legend_y=1.02,
+        legend_xanchor='center',
+        legend_x=0.5,
+        legend_font_color='white',
+        margin_t=80,
+        margin_b=50,
+        margin_l=60,
+        margin_r=40,
+        bargap=0.3
+    )
+
+    return fig
+
+
+def create_valuation_waterfall(pv_fcfs, pv_terminal, net_debt, equity_value):
+    """Waterfall Chart"""
+    fig = go.Figure(go.Waterfall(
+        orientation="v",
+        measure=["relative", "relative", "relative", "total"],
+        x=["PV of FCFs", "PV of Terminal Value", "Less: Net Debt", "Equity Value"],
+        y=[pv_fcfs / 10000000, pv_terminal / 10000000, -net_debt / 10000000, 0],
+        text=[f'₹{pv_fcfs/10000000:,.0f} Cr', f'₹{pv_terminal/10000000:,.0f} Cr',
+              f'-₹{net_debt/10000000:,.0f} Cr', f'₹{equity_value/10000000:,.0f} Cr'],
+        textposition="outside",
+        textfont_color='white',
+        textfont_size=12,
+        connector_line_color='rgba(255,255,255,0.3)',
+        connector_line_width=2,
+        increasing_marker_color='#00b894',
+        decreasing_marker_color='#e17055',
+        totals_marker_color='#667eea'
+    ))
+
+    fig.update_layout(
+        title_text='DCF Valuation Waterfall',
+        title_x=0.5,
+        title_font_size=18,
+        title_font_color='white',
+        xaxis_tickfont_color='white',
+        xaxis_tickfont_size=11,
+        yaxis_title='Value (₹ Crores)',
+        yaxis_title_font_color='rgba(255,255,255,0.7)',
+        yaxis_tickfont_color='white',
+        yaxis_gridcolor='rgba(255,255,255,0.1)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        height=450,
+        showlegend=False,
+        margin_t=80,
+        margin_b=50,
+        margin_l=60,
+        margin_r=40
+    )
+
+    return fig
+
+
+def create_sensitivity_heatmap(sensitivity_data):
+    """Sensitivity Heatmap"""
+    matrix = sensitivity_data['matrix']
+
+    # Fine grids get numeric axes and hover values instead of per-cell labels
+    if np.size(matrix) <= 100:
+        heatmap_args = dict(
+            x=[f'{g*100:.2f}%' for g in sensitivity_data['growth_range']],
+            y=[f'{w*100:.1f}%' for w in sensitivity_data['wacc_range']],
+            text=[[f'₹{val:,.0f}' for val in row] for row in matrix],
+            texttemplate='%{text}',
+            textfont_size=12,
+            textfont_color='white'
+        )
+    else:
+        heatmap_args = dict(
+            x=np.asarray(sensitivity_data['growth_range']) * 100,
+            y=np.asarray(sensitivity_data['wacc_range']) * 100,
+            hovertemplate='Growth %{x:.2f}%<br>WACC %{y:.2f}%<br>₹%{z:,.0f}<extra></extra>'
+        )
+
+    fig = go.Figure(data=go.Heatmap(
+        z=matrix,
+        colorscale=[[0, '#d63031'], [0.25, '#e17055'], [0.5, '#fdcb6e'], [0.75, '#00cec9'], [1, '#00b894']],
+        hoverongaps=False,
+        colorbar_title_text='Fair Value',
+        colorbar_title_font_color='white',
+        colorbar_tickfont_color='white',
+        **heatmap_args
+    ))
+
+    fig.update_layout(
+        title_text='Sensitivity Analysis: Fair Value (WACC vs Terminal Growth)',
+        title_x=0.5,
+        title_font_size=18,
+        title_font_color='white',
+        xaxis_title='Terminal Growth Rate',
+        xaxis_title_font_color='rgba(255,255,255,0.7)',
+        xaxis_tickfont_color='white',
+        yaxis_title='WACC',
+        yaxis_title_font_color='rgba(255,255,255,0.7)',
+        yaxis_tickfont_color='white',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        height=450,
+        margin_t=80,
+        margin_b=60,
+        margin_l=80,
+        margin_r=60
+    )
+
+    return fig
+
+
+def create_value_gauge(current_price, fair_value, upside):
+    """Fair Value Gauge"""
+    gauge_color = '#00b894' if upside > 0 else '#e17055'
+    max_val = max(fair_value * 1.5, current_price * 1.5, 100)
+
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number+delta",
+        value=fair_value,
+        number_prefix="₹",
+        number_font_size=40,
+        number_font_color='white',
+        number_valueformat=",.2f",
+        delta_reference=current_price,
+        delta_relative=True,
+        delta_valueformat='.1%',
+        delta_increasing_color='#00b894',
+        delta_decreasing_color='#e17055',
+        delta_font_size=18,
+        title_text="DCF Fair Value",
+        title_font_size=18,
+        title_font_color='white',
+        gauge_axis_range=[0, max_val],
+        gauge_axis_tickfont_color='rgba(255,255,255,0.7)',
+        gauge_bar_color=gauge_color,
+        gauge_bgcolor='rgba(255,255,255,0.05)',
+        gauge_steps=[
+            {'range': [0, current_price * 0.8], 'color': 'rgba(225, 112, 85, 0.3)'},
+            {'range': [current_price * 0.8, current_price], 'color': 'rgba(253, 203, 110, 0.3)'},
+            {'range': [current_price, current_price * 1.2], 'color': 'rgba(0, 206, 201, 0.3)'},
+            {'range': [current_price * 1.2, max_val], 'color': 'rgba(0, 184, 148, 0.3)'}
+        ],
+        gauge_threshold_line_color='white',
+        gauge_threshold_line_width=4,
+        gauge_threshold_thickness=0.8,
+        gauge_threshold_value=current_price
+    ))
+
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        height=350,
+        margin_t=60,
+        margin_b=60,
+        margin_l=40,
+        margin_r=40
+    )
+
+    fig.add_annotation(
+        x=0.5, y=-0.15,
+        xref='paper', yref='paper',
+        text=f'Current Price: ₹{current_price:,.2f}',
+        showarrow=False,
+        font_size=14,
+        font_color='rgba(255,255,255,0.8)'
+    )
+
+    return fig
+
+
+def create_value_composition_donut(pv_fcfs, pv_terminal):
+    """Value Composition Donut"""
+    total_ev = pv_fcfs + pv_terminal
+
+    fig = go.Figure(data=[go.Pie(
+        labels=['PV of FCFs', 'PV of Terminal Value'],
+        values=[pv_fcfs, pv_terminal],
+        hole=0.65,
+        marker_colors=['#667eea', '#00b894'],
+        textinfo='percent',
+        textfont_size=14,
+        textfont_color='white'
+    )])
+
+    fig.update_layout(
+        title_text='Enterprise Value Composition',
+        title_x=0.5,
+        title_font_size=18,
+        title_font_color='white',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        height=350,
+        showlegend=True,
+        legend_orientation='h',
+        legend_y=-0.1,
+        legend_x=0.5,
+        legend_xanchor='center',
+        legend_font_color='white',
+        legend_font_size=11,
+        margin_t=80,
+        margin_b=80,
+        margin_l=40,
+        margin_r=40
+    )
+
+    fig.add_annotation(
+        text=f'₹{total_ev/10000000:,.0f} Cr',
+        x=0.5, y=0.5,
+        font_size=16,
+        font_color='white',
+        showarrow=False
+    )
+
+    return fig
+
+
+def create_monte_carlo_histogram(mc_results, current_price):
+    """Monte Carlo Fair Value Distribution"""
+    fair_values = mc_results['fair_values']
+    counts, edges = np.histogram(fair_values, bins=60)
+    centers = (edges[:-1] + edges[1:]) / 2
+    bar_colors = ['#00b894' if c > current_price else '#e17055' for c in centers]
+
+    fig = go.Figure(go.Bar(
+        x=centers,
+        y=counts / fair_values.size * 100,
+        width=np.diff(edges),
+        marker_color=bar_colors,
+        hovertemplate='₹%{x:,.0f}<br>%{y:.2f}% of paths<extra></extra>'
+    ))
+
+    for p, dash in [(5, 'dot'), (50, 'dash'), (95, 'dot')]:
+        fig.add_vline(x=mc_results['percentiles'][p], line_dash=dash, line_color='rgba(255,255,255,0.6)',
+                      annotation_text=f'P{p}', annotation_font_color='white')
+    fig.add_vline(x=current_price, line_color='#fdcb6e', line_width=3,
+                  annotation_text='Price', annotation_font_color='#fdcb6e', annotation_position='top left')
+
+    fig.update_layout(
+        title_text=f'Monte Carlo Fair Value ({mc_results["n_paths"]:,} paths)',
+        title_x=0.5,
+        title_font_size=18,
+        title_font_color='white',
+        xaxis_title='Fair Value (₹)',
+        xaxis_title_font_color='rgba(255,255,255,0.7)',
+        xaxis_tickfont_color='white',
+        xaxis_showgrid=False,
+        yaxis_title='% of Paths',
+        yaxis_title_font_color='rgba(255,255,255,0.7)',
+        yaxis_tickfont_color='white',
+        yaxis_gridcolor='rgba(255,255,255,0.1)',
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        height=450,
+        showlegend=False,
+        bargap=0,
+        margin_t=80,
+        margin_b=50,
+        margin_l=60,
+        margin_r=40
+    )
+
+    return fig
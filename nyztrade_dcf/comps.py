@@ -0,0 +1,235 @@
+"""Comparables valuation: peer multiples, implied price ranges and a DCF blend.
+
+    python -m nyztrade_dcf.comps TCS.NS
+    python -m nyztrade_dcf.comps TCS.NS --group "💻 IT & Technology" --dcf 3650
+
+Peers are the tickers sharing a sector or a POPULAR_STOCKS category. A
+PeerIndex keeps each group's multiples pre-sorted; `update` replaces one
+ticker's row and re-sorts only the groups it belongs to, so refreshing a
+ticker never rescans the universe and a page view is a lookup plus a few
+quantiles.
+"""
+import argparse
+import threading
+
+import numpy as np
+import pandas as pd
+
+from .cache import FundamentalsCache
+from .sectors import MIN_PEERS
+from .universe import POPULAR_STOCKS, universe_tickers
+
+MULTIPLES = ('ev_ebitda', 'pe', 'p_fcf')
+LABELS = {'ev_ebitda': "EV/EBITDA", 'pe': "P/E", 'p_fcf': "P/FCF"}
+QUANTILES = (0.25, 0.5, 0.75)
+
+# Multiples outside these ranges are data errors or loss-makers, not peers
+VALID_RANGES = {'ev_ebitda': (0.0, 100.0), 'pe': (0.0, 200.0), 'p_fcf': (0.0, 200.0)}
+
+_CATEGORIES = {}
+for _category, _stocks in POPULAR_STOCKS.items():
+    for _ticker in _stocks:
+        _CATEGORIES.setdefault(_ticker, []).append(_category)
+
+
+def _number(info, key):
+    value = info.get(key)
+    return float(value) if isinstance(value, (int, float)) and np.isfinite(value) else 0.0
+
+
+def fundamentals_per_share(info):
+    """EBITDA, net debt, earnings and FCF the multiples are applied to"""
+    shares = _number(info, 'sharesOutstanding')
+    eps = _number(info, 'trailingEps') or (_number(info, 'netIncomeToCommon') / shares if shares else 0.0)
+    fcf = _number(info, 'freeCashflow') or (_number(info, 'operatingCashflow') -
+                                            abs(_number(info, 'capitalExpenditures')))
+    return {'ebitda': _number(info, 'ebitda'), 'net_debt': _number(info, 'totalDebt') - _number(info, 'totalCash'),
+            'shares': shares, 'eps': eps, 'fcf': fcf}
+
+
+def ticker_multiples(info):
+    """{multiple: value} for one `info`, NaN where the base is non-positive or out of VALID_RANGES"""
+    base = fundamentals_per_share(info)
+    price = _number(info, 'currentPrice') or _number(info, 'regularMarketPrice')
+    market_cap = _number(info, 'marketCap') or price * base['shares']
+    ev = _number(info, 'enterpriseValue') or market_cap + base['net_debt']
+    multiples = {
+        'ev_ebitda': ev / base['ebitda'] if base['ebitda'] > 0 else np.nan,
+        'pe': price / base['eps'] if base['eps'] > 0 else np.nan,
+        'p_fcf': market_cap / base['fcf'] if base['fcf'] > 0 else np.nan
+    }
+    return {m: v if VALID_RANGES[m][0] < v <= VALID_RANGES[m][1] else np.nan for m, v in multiples.items()}
+
+
+def peer_groups(ticker, info):
+    """Groups `ticker` belongs to: ('sector', name) and one ('category', name) per POPULAR_STOCKS category"""
+    groups = [('category', category) for category in _CATEGORIES.get(ticker, ())]
+    sector = info.get('sector')
+    return [('sector', sector)] + groups if sector else groups
+
+
+class PeerIndex:
+    """Per-group sorted peer multiples, maintained incrementally and safe to share across threads"""
+
+    def __init__(self, min_peers=MIN_PEERS):
+        self.min_peers = min_peers
+        self._multiples = {}
+        self._groups = {}
+        self._members = {}
+        self._sorted = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, infos, min_peers=MIN_PEERS):
+        """Index over {ticker: info} with one sort per group"""
+        index = cls(min_peers)
+        with index._lock:
+            for ticker, info in infos.items():
+                index._set(ticker, info)
+            for group in index._members:
+                index._resort(group)
+        return index
+
+    def update(self, ticker, info):
+        """Replace one ticker's multiples and re-sort only the groups it leaves or joins"""
+        with self._lock:
+            touched = set(self._groups.get(ticker, ()))
+            self._set(ticker, info)
+            for group in touched | set(self._groups[ticker]):
+                self._resort(group)
+
+    def _set(self, ticker, info):
+        for group in self._groups.get(ticker, ()):
+            self._members[group].discard(ticker)
+        self._multiples[ticker] = ticker_multiples(info)
+        self._groups[ticker] = peer_groups(ticker, info)
+        for group in self._groups[ticker]:
+            self._members.setdefault(group, set()).add(ticker)
+
+    def _resort(self, group):
+        rows = [self._multiples[t] for t in self._members.get(group, ())]
+        values = np.array([[row[m] for m in MULTIPLES] for row in rows], dtype=float).reshape(-1, len(MULTIPLES))
+        self._sorted[group] = {m: np.sort(column[~np.isnan(column)]) for m, column in zip(MULTIPLES, values.T)}
+
+    def groups(self, ticker):
+        """Groups `ticker` is indexed under, sector first"""
+        return list(self._groups.get(ticker, ()))
+
+    def peers(self, group):
+        return sorted(self._members.get(group, ()))
+
+    def stats(self, group, exclude=None):
+        """DataFrame indexed by multiple with peers and the QUANTILES, leaving out `exclude`'s own value.
+
+        Multiples with fewer than `min_peers` values are NaN.
+        """
+        with self._lock:
+            values = self._sorted.get(group, {m: np.array([]) for m in MULTIPLES})
+            own = self._multiples.get(exclude) if exclude in self._members.get(group, ()) else None
+        rows = {}
+        for m in MULTIPLES:
+            peers = values[m]
+            if own is not None and not np.isnan(own[m]):
+                peers = np.delete(peers, np.searchsorted(peers, own[m]))
+            enough = len(peers) >= self.min_peers
+            rows[m] = [len(peers)] + (list(np.quantile(peers, QUANTILES)) if enough else [np.nan] * len(QUANTILES))
+        return pd.DataFrame.from_dict(rows, orient='index', columns=['peers'] + [f'q{int(q * 100)}' for q in QUANTILES])
+
+    def best_group(self, ticker, info=None):
+        """Sector when it has enough peers, else the smallest qualifying category, else the sector anyway"""
+        groups = self.groups(ticker) or peer_groups(ticker, info or {})
+        sizes = {g: len(self._members.get(g, ())) - (ticker in self._members.get(g, ())) for g in groups}
+        usable = [g for g in groups if sizes[g] >= self.min_peers]
+        if not usable:
+            return groups[0] if groups else None
+        sector = [g for g in usable if g[0] == 'sector']
+        return sector[0] if sector else min(usable, key=sizes.get)
+
+
+def implied_prices(info, stats):
+    """Price per share each peer quantile implies for `info`, one row per multiple (NaN where not meaningful)"""
+    base = fundamentals_per_share(info)
+    shares = base['shares']
+    quantiles = [c for c in stats.columns if c != 'peers']
+    multiples = stats[quantiles].to_numpy(float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        prices = np.vstack([
+            (multiples[0] * base['ebitda'] - base['net_debt']) / shares if base['ebitda'] > 0 and shares else
+            np.full(len(quantiles), np.nan),
+            multiples[1] * base['eps'] if base['eps'] > 0 else np.full(len(quantiles), np.nan),
+            multiples[2] * base['fcf'] / shares if base['fcf'] > 0 and shares else np.full(len(quantiles), np.nan)
+        ])
+    frame = pd.DataFrame(np.where(prices > 0, prices, np.nan), index=list(MULTIPLES),
+                         columns=[f'price_{q}' for q in quantiles])
+    return stats.join(frame)
+
+
+def blend(dcf_fair_value, implied, dcf_weight=0.5):
+    """DCF fair value blended with the mean of the median comps prices; comps-only or DCF-only when one is missing"""
+    medians = implied['price_q50'].dropna()
+    comps_value = float(medians.mean()) if len(medians) else None
+    low = float(implied['price_q25'].min()) if implied['price_q25'].notna().any() else None
+    high = float(implied['price_q75'].max()) if implied['price_q75'].notna().any() else None
+    if comps_value is None:
+        dcf_weight = 1.0
+    elif dcf_fair_value is None or not dcf_fair_value > 0:
+        dcf_weight, dcf_fair_value = 0.0, 0.0
+    blended = dcf_weight * dcf_fair_value + (1 - dcf_weight) * (comps_value or 0.0)
+    return {'comps_value': comps_value, 'comps_low': low, 'comps_high': high, 'blended_value': blended,
+            'dcf_weight': dcf_weight}
+
+
+def build_from_cache(cache=None, tickers=None, min_peers=MIN_PEERS):
+    """PeerIndex over whatever `info` the cache holds for `tickers` (default: the universe)"""
+    cache = cache or FundamentalsCache()
+    infos = {}
+    for ticker in tickers or universe_tickers():
+        entry = cache.entries(ticker, ('info',)).get('info')
+        if entry and entry[0]:
+            infos[ticker] = entry[0]
+    return PeerIndex.build(infos, min_peers)
+
+
+def watch(index, cache):
+    """Keep `index` current: every `info` written to `cache` updates that one ticker"""
+    def on_put(ticker, values):
+        if values.get('info'):
+            index.update(ticker, values['info'])
+    cache.subscribe(on_put)
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Peer multiples and implied prices for one ticker")
+    parser.add_argument("ticker")
+    parser.add_argument("--group", help="Sector or POPULAR_STOCKS category (default: the best-populated one)")
+    parser.add_argument("--dcf", type=float, help="DCF fair value to blend with")
+    parser.add_argument("--dcf-weight", type=float, default=0.5)
+    parser.add_argument("--min-peers", type=int, default=MIN_PEERS)
+    args = parser.parse_args(argv)
+
+    cache = FundamentalsCache()
+    index = build_from_cache(cache, min_peers=args.min_peers)
+    entry = cache.entries(args.ticker, ('info',)).get('info')
+    if not entry:
+        parser.error(f"{args.ticker} is not cached")
+    info = entry[0]
+    index.update(args.ticker, info)
+
+    if args.group:
+        group = next((g for g in index.groups(args.ticker) if g[1] == args.group), ('category', args.group))
+    else:
+        group = index.best_group(args.ticker, info)
+    implied = implied_prices(info, index.stats(group, exclude=args.ticker))
+    print(f"{args.ticker} vs {group[0]} {group[1]!r}\n")
+    print(implied.rename(index=LABELS).to_string(float_format=lambda v: f"{v:,.2f}"))
+    result = blend(args.dcf, implied, args.dcf_weight)
+    if result['comps_value'] is not None:
+        print(f"\nComps value {result['comps_value']:,.2f} "
+              f"(range {result['comps_low']:,.2f} - {result['comps_high']:,.2f})")
+    if args.dcf is not None:
+        print(f"Blended value {result['blended_value']:,.2f} at {result['dcf_weight']:.0%} DCF")
+
+
+if __name__ == "__main__":
+    main()
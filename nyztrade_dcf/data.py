@@ -0,0 +1,79 @@
+"""Fundamentals access for the app.
+
+The provider is Yahoo behind the persistent cache, or a frozen snapshot when
+$NYZTRADE_SNAPSHOT_DIR is set.
+"""
+import os
+
+from .asyncfetch import start_fetch
+from .cache import FundamentalsCache
+from .providers import SnapshotProvider, YahooProvider
+
+_cache = None
+_provider = None
+_peer_index = None
+_watchlist = None
+_results = None
+_search_index = None
+
+
+def default_cache():
+    """Process-wide FundamentalsCache, opened on first use"""
+    global _cache
+    if _cache is None:
+        _cache = FundamentalsCache()
+    return _cache
+
+
+def default_provider():
+    """Process-wide DataProvider, opened on first use"""
+    global _provider
+    if _provider is None:
+        snapshot = os.environ.get('NYZTRADE_SNAPSHOT_DIR')
+        _provider = SnapshotProvider(snapshot) if snapshot else YahooProvider(default_cache())
+    return _provider
+
+
+def fetch_fundamentals_async(ticker):
+    """PendingFetch for one ticker; fields load concurrently off the caller's thread"""
+    return start_fetch(default_provider(), ticker)
+
+
+def default_peer_index():
+    """Process-wide comps PeerIndex over the provider's tickers, kept current as the cache is refreshed"""
+    global _peer_index
+    if _peer_index is None:
+        from .comps import PeerIndex, build_from_cache, watch
+        provider = default_provider()
+        if isinstance(provider, SnapshotProvider):
+            _peer_index = PeerIndex.build({t: provider.load(t, ('info',))['info'] for t in provider.tickers})
+        else:
+            _peer_index = watch(build_from_cache(default_cache()), default_cache())
+    return _peer_index
+
+
+def default_watchlist():
+    """Process-wide Watchlist store, opened on first use"""
+    global _watchlist
+    if _watchlist is None:
+        from .watchlist import Watchlist
+        _watchlist = Watchlist()
+    return _watchlist
+
+
+def default_results():
+    """Process-wide ResultStore, opened on first use and flushed at exit"""
+    global _results
+    if _results is None:
+        from .results import ResultStore, flush_at_exit
+        _results = flush_at_exit(ResultStore())
+    return _results
+
+
+def default_search_index():
+    """Process-wide ticker SearchIndex over the instrument master, loaded on first use"""
+    global _search_index
+    if _search_index is None:
+        from .search import load_index
+        _search_index = load_index()
+    return _search_index
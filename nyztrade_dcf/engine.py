@@ -0,0 +1,269 @@
+"""Vectorized DCF engine.
+
+Every function broadcasts over leading batch dimensions so a whole screen of
+(ticker, scenario) combinations is valued in one call. The scalar helpers in
+the Streamlit app are thin wrappers over these.
+"""
+import numpy as np
+
+
+def growth_path(growth_rates, years=5):
+    """Pad/trim growth rates along the last axis to `years`, reusing the last rate"""
+    growth = np.asarray(growth_rates, dtype=float)
+    if growth.ndim == 0:
+        growth = growth[None]
+    n = growth.shape[-1]
+    if n >= years:
+        return growth[..., :years]
+    pad = np.repeat(growth[..., -1:], years - n, axis=-1)
+    return np.concatenate([growth, pad], axis=-1)
+
+
+def linear_path(start, end, years):
+    """Straight line from `start` (year 0) reaching `end` in the final year, shape (..., years)"""
+    start = np.asarray(start, dtype=float)[..., None]
+    end = np.asarray(end, dtype=float)[..., None]
+    return start + (end - start) * np.arange(1, years + 1) / years
+
+
+def fade_growth_path(growth_rates, terminal_growth, years, high_years=None):
+    """High-growth phase from `growth_rates`, then a linear fade reaching `terminal_growth` in the final year.
+
+    The high-growth phase lasts `high_years` (default: one year per rate). With
+    a horizon no longer than that this is growth_path(growth_rates, years).
+    """
+    growth = np.asarray(growth_rates, dtype=float)
+    high_years = growth.shape[-1] if high_years is None else high_years
+    if years <= high_years:
+        return growth_path(growth, years)
+
+    high = growth_path(growth, high_years)
+    fade = linear_path(high[..., -1], terminal_growth, years - high_years)
+    batch = np.broadcast_shapes(high.shape[:-1], fade.shape[:-1])
+    return np.concatenate([np.broadcast_to(high, batch + high.shape[-1:]),
+                           np.broadcast_to(fade, batch + fade.shape[-1:])], axis=-1)
+
+
+def project_drivers_batch(base_revenue, revenue_growth, margin, sales_to_capital):
+    """Revenue x after-tax operating margin - reinvestment, each of shape (..., years).
+
+    Reinvestment funds each year's revenue increase at `sales_to_capital`
+    rupees of revenue per rupee invested. `revenue_growth` and `margin` are
+    per-year paths.
+    """
+    base = np.asarray(base_revenue, dtype=float)[..., None]
+    revenue = base * np.cumprod(1 + np.asarray(revenue_growth, dtype=float), axis=-1)
+    prior = np.concatenate([np.broadcast_to(base, revenue.shape[:-1] + (1,)), revenue[..., :-1]], axis=-1)
+    operating = revenue * np.asarray(margin, dtype=float)
+    reinvestment = (revenue - prior) / np.asarray(sales_to_capital, dtype=float)[..., None]
+    return {'revenue': revenue, 'operating_income': operating, 'reinvestment': reinvestment,
+            'fcf': operating - reinvestment}
+
+
+def project_fcf_batch(base_fcf, growth_rates, years=5):
+    """Projected FCF array of shape (..., years)"""
+    base = np.asarray(base_fcf, dtype=float)
+    growth = growth_path(growth_rates, years)
+    return base[..., None] * np.cumprod(1 + growth, axis=-1)
+
+
+def terminal_value_gordon_batch(final_fcf, wacc, terminal_growth):
+    """Gordon Growth Model; growth is capped at WACC - 2% where WACC <= g"""
+    final_fcf = np.asarray(final_fcf, dtype=float)
+    wacc = np.asarray(wacc, dtype=float)
+    g = np.asarray(terminal_growth, dtype=float)
+    g = np.where(wacc <= g, wacc - 0.02, g)
+    return final_fcf * (1 + g) / (wacc - g)
+
+
+def discount_factors(wacc, years):
+    """(1 + wacc) ** -t for t = 1..years, shape (..., years)"""
+    wacc = np.asarray(wacc, dtype=float)
+    t = np.arange(1, years + 1, dtype=float)
+    return (1 + wacc[..., None]) ** -t
+
+
+def value_dcf_batch(projected_fcf, terminal_value, wacc, net_debt, shares_outstanding):
+    """Discount projected FCFs and terminal value to per-share fair values"""
+    projected = np.asarray(projected_fcf, dtype=float)
+    years = projected.shape[-1]
+    factors = discount_factors(wacc, years)
+
+    pv_fcfs = (projected * factors).sum(axis=-1)
+    terminal_value = np.asarray(terminal_value, dtype=float)
+    pv_terminal = terminal_value * factors[..., -1]
+
+    enterprise_value = pv_fcfs + pv_terminal
+    equity_value = enterprise_value - np.asarray(net_debt, dtype=float)
+
+    shares = np.asarray(shares_outstanding, dtype=float)
+    safe_shares = np.where(shares > 0, shares, 1.0)
+    fair_value = np.where(shares > 0, equity_value / safe_shares, 0.0)
+
+    return {
+        'pv_fcfs': pv_fcfs,
+        'pv_terminal': pv_terminal,
+        'terminal_value': np.broadcast_to(terminal_value, pv_terminal.shape),
+        'enterprise_value': enterprise_value,
+        'equity_value': equity_value,
+        'fair_value': np.maximum(0, fair_value)
+    }
+
+
+def dcf_batch(base_fcf, growth_rates, wacc, terminal_growth, net_debt, shares_outstanding, years=5):
+    """Project, Gordon terminal value and discount in one broadcasted call.
+
+    `growth_rates` has shape (..., n) and broadcasts against the other inputs'
+    batch shape; e.g. base FCF (tickers, 1) with WACC (1, scenarios).
+    """
+    projected = project_fcf_batch(base_fcf, growth_rates, years)
+    tv = terminal_value_gordon_batch(projected[..., -1], wacc, terminal_growth)
+    return value_dcf_batch(projected, tv, wacc, net_debt, shares_outstanding)
+
+
+def solve_bracketed(func, lo, hi, tol=1e-10, max_iter=100):
+    """Elementwise root of a monotonic `func` on [lo, hi] by Illinois false position.
+
+    `func` maps an array of candidates to residuals of the same shape; every
+    element is iterated in lockstep. Elements without a sign change over
+    their bracket come back as NaN.
+    """
+    a, b = (np.array(x, dtype=float) for x in np.broadcast_arrays(lo, hi))
+    fa, fb = func(a), func(b)
+    a, b, fa, fb = np.broadcast_arrays(a, b, fa, fb)
+    a, b, fa, fb = a.copy(), b.copy(), fa.copy(), fb.copy()
+
+    root = np.where(fa == 0, a, np.where(fb == 0, b, np.nan))
+    active = np.isnan(root) & np.isfinite(fa) & np.isfinite(fb) & (np.sign(fa) != np.sign(fb))
+    side = np.zeros(a.shape)
+    c = np.where(active, (a + b) / 2, np.nan)
+
+    with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+        for _ in range(max_iter):
+            if not active.any():
+                break
+            c_new = np.where(active, (a * fb - b * fa) / (fb - fa), c)
+            fc = func(c_new)
+
+            # c replaces the endpoint whose residual has the same sign; halving the
+            # residual kept twice in a row stops false position stalling on one side
+            replace_b = active & (np.sign(fc) == np.sign(fb))
+            replace_a = active & ~replace_b
+            fa = np.where(replace_b & (side == -1), fa / 2, fa)
+            fb = np.where(replace_a & (side == 1), fb / 2, fb)
+            b, fb = np.where(replace_b, c_new, b), np.where(replace_b, fc, fb)
+            a, fa = np.where(replace_a, c_new, a), np.where(replace_a, fc, fa)
+            side = np.where(replace_b, -1, np.where(replace_a, 1, side))
+
+            converged = active & ((np.abs(c_new - c) <= tol * (1 + np.abs(c_new))) | (fc == 0))
+            root = np.where(converged, c_new, root)
+            active &= ~converged
+            c = c_new
+
+    return np.where(active, c, root)
+
+
+def _value_per_share(result, shares):
+    shares = np.asarray(shares, dtype=float)
+    return np.where(shares > 0, result['equity_value'] / np.where(shares > 0, shares, 1.0), np.nan)
+
+
+def _quoted(price):
+    """Prices as floats, NaN where not positive: there is nothing to solve against then"""
+    price = np.asarray(price, dtype=float)
+    return np.where(price > 0, price, np.nan)
+
+
+def implied_growth_batch(price, base_fcf, wacc, terminal_growth, net_debt, shares_outstanding, years=5,
+                         bounds=(-0.5, 1.0)):
+    """Uniform annual FCF growth at which the DCF value per share equals `price`"""
+    price = _quoted(price)
+
+    def residual(g):
+        result = dcf_batch(base_fcf, g[..., None], wacc, terminal_growth, net_debt, shares_outstanding, years)
+        return _value_per_share(result, shares_outstanding) - price
+
+    shape = np.broadcast_shapes(price.shape, np.shape(base_fcf), np.shape(wacc), np.shape(shares_outstanding))
+    return solve_bracketed(residual, np.full(shape, bounds[0]), np.full(shape, bounds[1]))
+
+
+def implied_terminal_growth_batch(price, base_fcf, growth_rates, wacc, net_debt, shares_outstanding, years=5,
+                                  lower=-0.05):
+    """Perpetual growth at which the DCF value per share equals `price`; searched below WACC"""
+    price = _quoted(price)
+    wacc = np.asarray(wacc, dtype=float)
+    projected = project_fcf_batch(base_fcf, growth_rates, years)
+
+    def residual(g):
+        tv = terminal_value_gordon_batch(projected[..., -1], wacc, g)
+        result = value_dcf_batch(projected, tv, wacc, net_debt, shares_outstanding)
+        return _value_per_share(result, shares_outstanding) - price
+
+    shape = np.broadcast_shapes(price.shape, projected.shape[:-1], wacc.shape, np.shape(shares_outstanding))
+    return solve_bracketed(residual, np.full(shape, lower), np.broadcast_to(wacc - 1e-6, shape))
+
+
+def implied_wacc_batch(price, base_fcf, growth_rates, terminal_growth, net_debt, shares_outstanding, years=5,
+                       upper=1.0):
+    """Discount rate at which the DCF value per share equals `price`; searched above terminal growth"""
+    price = _quoted(price)
+    terminal_growth = np.asarray(terminal_growth, dtype=float)
+    projected = project_fcf_batch(base_fcf, growth_rates, years)
+
+    def residual(w):
+        tv = terminal_value_gordon_batch(projected[..., -1], w, terminal_growth)
+        result = value_dcf_batch(projected, tv, w, net_debt, shares_outstanding)
+        return _value_per_share(result, shares_outstanding) - price
+
+    shape = np.broadcast_shapes(price.shape, projected.shape[:-1], terminal_growth.shape,
+                                np.shape(shares_outstanding))
+    return solve_bracketed(residual, np.broadcast_to(terminal_growth + 1e-6, shape), np.full(shape, upper))
+
+
+def wacc_batch(beta, market_premium, risk_free_rate, equity_weight, debt_weight, cost_of_debt, tax_rate):
+    """CAPM WACC over arrays of betas / premiums; beta is clipped to [0.5, 2.0] like calculate_wacc"""
+    beta = np.clip(np.asarray(beta, dtype=float), 0.5, 2.0)
+    cost_of_equity = risk_free_rate + beta * np.asarray(market_premium, dtype=float)
+    return equity_weight * cost_of_equity + debt_weight * cost_of_debt * (1 - tax_rate)
+
+
+def sensitivity_axis(center, span, points):
+    """`points` evenly spaced values over center +/- span"""
+    if points <= 1:
+        return np.array([center], dtype=float)
+    return np.linspace(center - span, center + span, points)
+
+
+def sensitivity_grid(base_fcf, growth_rates, wacc_range, growth_range, net_debt, shares, years=5, projected=None):
+    """Fair value over a WACC x terminal-growth grid, shape (len(wacc_range), len(growth_range)).
+
+    `projected` (an FCF path) replaces the base FCF / growth projection. The
+    FCF projection is computed once and each WACC gets one discount-factor
+    vector. Using (1 + g) / (w - g) = (1 + w) / (w - g) - 1, every cell is
+    a_i + b_i / (w_i - g_j), so the grid is a single outer division with
+    per-row constants. Cells where WACC <= terminal growth are 0.
+    """
+    w = np.asarray(wacc_range, dtype=float)
+    g = np.asarray(growth_range, dtype=float)
+    if shares <= 0:
+        return np.zeros((w.size, g.size))
+
+    if projected is None:
+        projected = project_fcf_batch(base_fcf, growth_rates, years)
+    projected = np.asarray(projected, dtype=float)
+    factors = discount_factors(w, projected.shape[-1])
+    pv_fcfs = factors @ projected
+    final_pv = projected[-1] * factors[:, -1]
+
+    a = (pv_fcfs - final_pv - net_debt) / shares
+    b = final_pv * (1 + w) / shares
+
+    grid = np.subtract.outer(w, g)
+    invalid = grid <= 0 if w.min() <= g.max() else None
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.divide(b[:, None], grid, out=grid)
+    grid += a[:, None]
+    np.maximum(grid, 0, out=grid)
+    if invalid is not None:
+        np.copyto(grid, 0.0, where=invalid)
+    return grid
@@ -0,0 +1,161 @@
+"""Concurrent, rate-limit-aware batch fetching of fundamentals.
+
+A bounded thread pool pulls tickers through a shared token bucket. When any
+worker hits a 429 every worker pauses on a shared cooldown instead of each
+backing off independently. Unknown tickers are not retried, and an open
+circuit breaker or a Retry-After hint sets the length of the cooldown.
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+
+import pandas as pd
+
+from .providers import YahooProvider
+from .retry import OPEN, PERMANENT, RATE_LIMIT, classify, is_rate_limit, retry_after
+from .yahoo import FIELDS
+
+
+class TokenBucket:
+    """Allow `rate` acquisitions per second with bursts of up to `burst`"""
+
+    def __init__(self, rate, burst=1, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            self._sleep(wait)
+
+
+class Cooldown:
+    """Process-wide pause shared by all workers after a rate limit"""
+
+    def __init__(self, clock=time.monotonic, sleep=time.sleep):
+        self._clock = clock
+        self._sleep = sleep
+        self._until = 0.0
+        self._lock = threading.Lock()
+
+    def trip(self, seconds):
+        with self._lock:
+            self._until = max(self._until, self._clock() + seconds)
+
+    def remaining(self):
+        return max(0.0, self._until - self._clock())
+
+    def wait(self):
+        remaining = self.remaining()
+        while remaining > 0:
+            self._sleep(remaining)
+            remaining = self.remaining()
+
+
+@dataclass
+class FetchReport:
+    """Outcome of fetching one ticker"""
+    ticker: str
+    data: dict = None
+    error: str = None
+    latency: float = 0.0
+    retries: int = 0
+    rate_limited: int = 0
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+class BatchFetcher:
+    """Fetch many tickers through a bounded pool, a token bucket and a shared 429 cooldown.
+
+    `loader(ticker, fields)` returns {field: value}; any DataProvider works.
+    The default is Yahoo without its fixed pause or its own retries, since
+    pacing and retrying are this class's job.
+    With a FundamentalsCache, fresh tickers are served from disk and never
+    touch the bucket. `clock` and `sleep` drive the bucket, the cooldown and
+    the backoff, so tests can run them on a fake clock.
+    """
+
+    def __init__(self, loader=None, cache=None, max_workers=4, rate=2.0, burst=4,
+                 max_retries=3, cooldown=30.0, backoff=1.0, max_backoff=8.0, clock=time.monotonic,
+                 sleep=time.sleep):
+        self.loader = loader or YahooProvider(pause=0).without_retries()
+        self.cache = cache
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.cooldown_seconds = cooldown
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._sleep = sleep
+        self.bucket = TokenBucket(rate, burst, clock, sleep)
+        self.cooldown = Cooldown(clock, sleep)
+
+    def _load(self, report, ticker, fields):
+        attempt = 0
+        while True:
+            self.cooldown.wait()
+            self.bucket.acquire()
+            try:
+                return self.loader(ticker, fields)
+            except Exception as e:
+                kind = classify(e)
+                if attempt == self.max_retries or kind == PERMANENT:
+                    raise
+                attempt += 1
+                report.retries += 1
+                # An open circuit is a rate limit refused locally: counted and cooled down alike
+                if kind in (RATE_LIMIT, OPEN):
+                    report.rate_limited += 1
+                    self.cooldown.trip(max(self.cooldown_seconds, retry_after(e) or 0.0))
+                else:
+                    self._sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** (attempt - 1))))
+
+    def fetch_one(self, ticker, fields=FIELDS):
+        report = FetchReport(ticker)
+        load = partial(self._load, report)
+        start = time.perf_counter()
+        try:
+            if self.cache is not None:
+                report.data = self.cache.get(ticker, load, fields)
+            else:
+                report.data = load(ticker, fields)
+        except Exception as e:
+            report.error = "RATE_LIMIT" if is_rate_limit(e) else str(e)[:100]
+        report.latency = time.perf_counter() - start
+        return report
+
+    def fetch_many(self, tickers, fields=FIELDS):
+        """{ticker: FetchReport}; duplicate tickers are fetched once"""
+        unique = list(dict.fromkeys(tickers))
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="fetch") as pool:
+            reports = pool.map(partial(self.fetch_one, fields=fields), unique)
+            return dict(zip(unique, reports))
+
+
+def reports_frame(reports):
+    """Per-ticker latency / retry table for a fetch_many result"""
+    return pd.DataFrame([{
+        'ticker': r.ticker,
+        'ok': r.ok,
+        'latency_s': r.latency,
+        'retries': r.retries,
+        'rate_limited': r.rate_limited,
+        'error': r.error
+    } for r in reports.values()])
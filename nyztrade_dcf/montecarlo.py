@@ -0,0 +1,77 @@
+"""Monte Carlo valuation: simulate growth, WACC and terminal growth paths in chunks"""
+import numpy as np
+
+from .engine import (dcf_batch, growth_path, project_drivers_batch, terminal_value_gordon_batch, value_dcf_batch,
+                     wacc_batch)
+
+PERCENTILES = (5, 10, 25, 50, 75, 90, 95)
+
+
+def simulate_fair_values(base_fcf, growth_rates, wacc_data, terminal_growth, net_debt, shares, years=5,
+                         growth_sd=0.03, beta_sd=0.15, premium_sd=0.01, terminal_growth_sd=0.005,
+                         n_paths=100_000, chunk_size=25_000, seed=None, drivers=None):
+    """Simulated per-share fair values, one per path.
+
+    Each year's growth, beta, equity risk premium and terminal growth are drawn
+    from normals centred on the point-estimate inputs; WACC is rebuilt from
+    the CAPM components in `wacc_data` and shifted so that the unperturbed
+    path lands on `wacc_data['wacc']`. That shift is zero for calculate_wacc
+    output, and centres the paths on the override for manual_wacc_data. Paths
+    are valued `chunk_size` at a time so working memory stays bounded; the
+    same seed and chunk size reproduce the same draws.
+
+    With `drivers` ({'base_revenue', 'margin', 'sales_to_capital'}, margin
+    being a per-year path) the simulated growth is revenue growth and FCF
+    comes from project_drivers_batch instead of compounding `base_fcf`.
+    """
+    rng = np.random.default_rng(seed)
+    mean_growth = growth_path(growth_rates, years)
+    fair_values = np.empty(n_paths)
+    capm = (wacc_data['risk_free_rate'], wacc_data['equity_weight'], wacc_data['debt_weight'],
+            wacc_data['cost_of_debt'], wacc_data['tax_rate'])
+    wacc_shift = wacc_data['wacc'] - float(wacc_batch(wacc_data['beta'], wacc_data['market_premium'], *capm))
+
+    for start in range(0, n_paths, chunk_size):
+        n = min(chunk_size, n_paths - start)
+
+        growth = mean_growth + growth_sd * rng.standard_normal((n, years))
+        np.maximum(growth, -0.99, out=growth)
+
+        beta = wacc_data['beta'] + beta_sd * rng.standard_normal(n)
+        premium = np.maximum(wacc_data['market_premium'] + premium_sd * rng.standard_normal(n), 0)
+        wacc = wacc_batch(beta, premium, *capm) + wacc_shift
+
+        tg = terminal_growth + terminal_growth_sd * rng.standard_normal(n)
+
+        if drivers is None:
+            result = dcf_batch(base_fcf, growth, wacc, tg, net_debt, shares, years)
+        else:
+            fcf = project_drivers_batch(drivers['base_revenue'], growth, drivers['margin'],
+                                        drivers['sales_to_capital'])['fcf']
+            tv = terminal_value_gordon_batch(fcf[..., -1], wacc, tg)
+            result = value_dcf_batch(fcf, tv, wacc, net_debt, shares)
+        fair_values[start:start + n] = result['fair_value']
+
+    return fair_values
+
+
+def summarize_simulation(fair_values, current_price, percentiles=PERCENTILES):
+    """Percentiles, mean and probability of upside vs current price"""
+    values = np.percentile(fair_values, percentiles)
+    return {
+        'percentiles': {p: float(v) for p, v in zip(percentiles, values)},
+        'mean': float(fair_values.mean()),
+        'std': float(fair_values.std()),
+        'prob_upside': float((fair_values > current_price).mean()) if current_price > 0 else 0.0,
+        'n_paths': int(fair_values.size)
+    }
+
+
+def run_monte_carlo(base_fcf, growth_rates, wacc_data, terminal_growth, net_debt, shares, current_price,
+                    years=5, **kwargs):
+    """Simulate and summarize; the raw fair values are kept under 'fair_values'"""
+    fair_values = simulate_fair_values(base_fcf, growth_rates, wacc_data, terminal_growth,
+                                       net_debt, shares, years, **kwargs)
+    summary = summarize_simulation(fair_values, current_price)
+    summary['fair_values'] = fair_values
+    return summary
@@ -0,0 +1,369 @@
+"""Pluggable fundamentals providers with a typed result.
+
+- YahooProvider: live yfinance, optionally behind the persistent cache
+- SnapshotProvider: a frozen universe in two columnar files, read into memory once
+- InMemoryProvider: fixed payloads with injectable latency and failures
+
+Every provider is also a `loader(ticker, fields)` callable, so it plugs into
+FundamentalsCache.get and BatchFetcher unchanged.
+
+    python -m nyztrade_dcf.providers snapshots/2026-10 --category IT
+"""
+import argparse
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from .retry import NO_RETRY, RateLimitError, RetryPolicy, is_rate_limit, yahoo_breaker
+from .yahoo import FIELDS, STATEMENT_FIELDS, load_fundamentals
+
+STATEMENT_COLUMNS = ('ticker', 'statement', 'line_item', 'period', 'value')
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Fundamentals:
+    """Everything the valuation needs for one ticker, or why it is missing"""
+    ticker: str
+    info: dict = None
+    income_stmt: pd.DataFrame = field(default_factory=pd.DataFrame)
+    balance_sheet: pd.DataFrame = field(default_factory=pd.DataFrame)
+    cash_flow: pd.DataFrame = field(default_factory=pd.DataFrame)
+    error: str = None
+    rate_limited: bool = False
+
+    @property
+    def ok(self):
+        return self.error is None
+
+    @classmethod
+    def from_fields(cls, ticker, data):
+        info = data.get('info')
+        if not info or len(info) < 5:
+            return cls(ticker, error="Unable to fetch data")
+        statements = {f: data[f] for f in STATEMENT_FIELDS if data.get(f) is not None}
+        return cls(ticker, info=info, **statements)
+
+    @classmethod
+    def failure(cls, ticker, exc):
+        if is_rate_limit(exc):
+            return cls(ticker, error="RATE_LIMIT", rate_limited=True)
+        return cls(ticker, error=str(exc)[:100])
+
+
+class DataProvider:
+    """Base class; subclasses implement load(ticker, fields) -> {field: value}"""
+    policy = NO_RETRY
+
+    def without_retries(self):
+        """This provider making a single attempt per load, for callers that schedule their own retries"""
+        return self
+
+    def load(self, ticker, fields=FIELDS):
+        raise NotImplementedError
+
+    def stream(self, ticker, fields=FIELDS, on_field=None):
+        """load() that also calls `on_field(field, value)` as each field becomes available"""
+        data = self.load(ticker, fields)
+        if on_field is not None:
+            for f in fields:
+                if f in data:
+                    on_field(f, data[f])
+        return data
+
+    def __call__(self, ticker, fields=FIELDS):
+        return self.load(ticker, fields)
+
+    def fetch(self, ticker):
+        """Fundamentals for one ticker; never raises"""
+        try:
+            return Fundamentals.from_fields(ticker, self.load(ticker, FIELDS))
+        except Exception as e:
+            return Fundamentals.failure(ticker, e)
+
+    def fetch_many(self, tickers):
+        return {t: self.fetch(t) for t in dict.fromkeys(tickers)}
+
+
+class YahooProvider(DataProvider):
+    """Live Yahoo Finance; with a FundamentalsCache, only missing/expired fields go upstream.
+
+    Upstream calls retry under `policy` and go through the process-wide
+    circuit breaker, so once Yahoo rate-limits us every session fails fast.
+    """
+
+    def __init__(self, cache=None, pause=1.5, policy=None, breaker=None):
+        self.cache = cache
+        self.pause = pause
+        self.policy = policy or RetryPolicy()
+        self.breaker = breaker or yahoo_breaker()
+
+    def without_retries(self):
+        return YahooProvider(self.cache, self.pause, NO_RETRY, self.breaker)
+
+    def _upstream(self, ticker, fields, on_field=None):
+        return self.policy.call(load_fundamentals, ticker, fields, pause=self.pause, on_field=on_field,
+                                breaker=self.breaker)
+
+    def load(self, ticker, fields=FIELDS):
+        return self.stream(ticker, fields)
+
+    def stream(self, ticker, fields=FIELDS, on_field=None):
+        """One upstream call for every missing field, each reported as Yahoo returns it"""
+        if self.cache is None:
+            return self._upstream(ticker, fields, on_field)
+        sent, done = set(), threading.Event()
+
+        def report(field, value):
+            if not done.is_set():  # a background revalidation after we returned reports nothing
+                sent.add(field)
+                on_field(field, value)
+
+        data = self.cache.get(ticker, partial(self._upstream, on_field=report if on_field else None), fields)
+        done.set()
+        if on_field is not None:
+            # Fields served from the cache (or by another caller's fetch) arrive all at once
+            for f in fields:
+                if f in data and f not in sent:
+                    on_field(f, data[f])
+        return data
+
+
+@dataclass
+class InMemoryProvider(DataProvider):
+    """Fixed payloads with artificial latency and injectable failures.
+
+    `rate_limit_first` maps ticker -> number of leading calls that raise
+    RateLimitError; `missing` tickers always raise ValueError. Tickers without
+    a payload get a small synthetic one.
+    """
+    data: dict = field(default_factory=dict)
+    latency: float = 0.0
+    rate_limit_first: dict = field(default_factory=dict)
+    missing: tuple = ()
+    calls: dict = field(default_factory=dict)
+
+    def __post_init__(self):
+        self._lock = threading.Lock()
+
+    def load(self, ticker, fields=FIELDS):
+        with self._lock:
+            n = self.calls[ticker] = self.calls.get(ticker, 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+        if n <= self.rate_limit_first.get(ticker, 0):
+            raise RateLimitError(f"429 Too Many Requests: {ticker}")
+        if ticker in self.missing:
+            raise ValueError("Unable to fetch data")
+        payload = self.data.get(ticker) or _synthetic_payload(ticker)
+        return {f: payload[f] for f in fields if f in payload}
+
+
+def _synthetic_payload(ticker):
+    info = {'symbol': ticker, 'longName': ticker, 'sector': 'Default', 'currentPrice': 100.0,
+            'marketCap': 1e11, 'sharesOutstanding': 1e9, 'operatingCashflow': 8e9, 'capitalExpenditures': -3e9}
+    return {'info': info, 'income_stmt': pd.DataFrame(), 'balance_sheet': pd.DataFrame(), 'cash_flow': pd.DataFrame()}
+
+
+# ============================================
+# SNAPSHOTS
+# ============================================
+# A snapshot directory holds two long-format tables:
+#   info.<ext>        ticker, key, number, text
+#   statements.<ext>  ticker, statement, line_item, period, value
+# sorted by ticker so each ticker is one contiguous slice. An optional
+#   prices.<ext>      ticker, date, close
+# holds the daily closes the backtester replays against.
+
+def _read_table(path):
+    if path.endswith('.parquet'):
+        import pyarrow.parquet as pq
+        return pq.read_table(path).to_pandas()
+    frame = pd.read_csv(path)
+    if 'period' in frame:
+        frame['period'] = pd.to_datetime(frame['period'])
+    return frame
+
+
+def long_statement(ticker, statement, frame):
+    """One (line_item x period) statement as {column: array} of long snapshot rows, values as-is"""
+    n_items, n_periods = frame.shape
+    return {
+        'ticker': np.full(frame.size, ticker, dtype=object),
+        'statement': np.full(frame.size, statement, dtype=object),
+        'line_item': np.repeat(frame.index.astype(str).to_numpy(), n_periods),
+        'period': np.tile(pd.to_datetime(frame.columns).to_numpy(), n_items),
+        'value': frame.to_numpy().ravel()
+    }
+
+
+def stack_statements(parts):
+    """One long statements frame from long_statement() column dicts"""
+    if not parts:
+        return pd.DataFrame(columns=STATEMENT_COLUMNS)
+    return pd.DataFrame({c: np.concatenate([part[c] for part in parts]) for c in STATEMENT_COLUMNS})
+
+
+def _slices(tickers):
+    """{ticker: slice} for a column sorted by ticker"""
+    values, starts = np.unique(tickers, return_index=True)
+    stops = np.append(starts[1:], len(tickers))
+    return {t: slice(a, b) for t, a, b in zip(values, starts, stops)}
+
+
+class SnapshotProvider(DataProvider):
+    """Frozen universe loaded once from `root`; per-ticker loads are an O(1) slice lookup"""
+
+    def __init__(self, root):
+        self.root = root
+        ext = 'parquet' if os.path.exists(os.path.join(root, 'info.parquet')) else 'csv'
+        info = _read_table(os.path.join(root, f'info.{ext}')).sort_values('ticker', kind='stable')
+        statements = _read_table(os.path.join(root, f'statements.{ext}')).sort_values('ticker', kind='stable')
+
+        self._info = info.reset_index(drop=True)
+        self._statements = statements.reset_index(drop=True)
+        self._info_slices = _slices(self._info['ticker'].to_numpy())
+        self._statement_slices = _slices(self._statements['ticker'].to_numpy())
+        self._statement_arrays = {c: self._statements[c].to_numpy() for c in STATEMENT_COLUMNS}
+
+    @property
+    def tickers(self):
+        return list(self._info_slices)
+
+    @property
+    def statements(self):
+        """Every statement line as one long (ticker, statement, line_item, period, value) frame"""
+        return self._statements
+
+    def statement_rows(self, ticker):
+        """This ticker's slice of `statements`"""
+        return self._statements.iloc[self._statement_slices.get(ticker, slice(0, 0))]
+
+    def statement_columns(self, ticker):
+        """statement_rows() as {column: array}, the long_statement() layout"""
+        span = self._statement_slices.get(ticker, slice(0, 0))
+        return {c: self._statement_arrays[c][span] for c in STATEMENT_COLUMNS}
+
+    def _info_dict(self, ticker):
+        rows = self._info.iloc[self._info_slices[ticker]]
+        info = {}
+        for key, number, text in zip(rows['key'], rows['number'], rows['text']):
+            if isinstance(text, str):
+                info[key] = text
+            elif not pd.isna(number):
+                info[key] = number.item() if hasattr(number, 'item') else number
+        return info
+
+    def _statement(self, ticker, statement):
+        rows = self.statement_rows(ticker)
+        rows = rows[rows['statement'] == statement]
+        if rows.empty:
+            return pd.DataFrame()
+        # A line item repeated for a period (e.g. appended snapshots) keeps its last value
+        rows = rows.drop_duplicates(['line_item', 'period'], keep='last')
+        table = rows.pivot(index='line_item', columns='period', values='value')
+        # yfinance order: most recent period first
+        return table[sorted(table.columns, reverse=True)]
+
+    def load(self, ticker, fields=FIELDS):
+        if ticker not in self._info_slices:
+            raise ValueError("Unable to fetch data")
+        data = {}
+        for f in fields:
+            data[f] = self._info_dict(ticker) if f == 'info' else self._statement(ticker, f)
+        return data
+
+
+def write_snapshot(root, data, fmt='parquet'):
+    """Write {ticker: {field: value}} as a snapshot directory readable by SnapshotProvider.
+
+    Only scalar `info` values are stored; lists and dicts (e.g.
+    companyOfficers) are dropped, and how many is logged.
+    """
+    info_rows, statement_frames, dropped = [], [], {}
+    for ticker, fields in data.items():
+        for key, value in (fields.get('info') or {}).items():
+            if isinstance(value, bool):
+                value = int(value)
+            if isinstance(value, (int, float, np.number)):
+                info_rows.append((ticker, key, float(value), None))
+            elif isinstance(value, str):
+                info_rows.append((ticker, key, np.nan, value))
+            elif value is not None:
+                dropped[key] = dropped.get(key, 0) + 1
+
+        for statement in STATEMENT_FIELDS:
+            frame = fields.get(statement)
+            if frame is None or frame.empty:
+                continue
+            statement_frames.append(long_statement(ticker, statement, frame))
+
+    if dropped:
+        logger.warning("Snapshot %s: dropped %d non-scalar info values (%s)", root, sum(dropped.values()),
+                       ", ".join(f"{key} x{n}" for key, n in sorted(dropped.items())))
+    info = pd.DataFrame(info_rows, columns=['ticker', 'key', 'number', 'text'])
+    statements = stack_statements(statement_frames)
+    statements['value'] = pd.to_numeric(statements['value'], errors='coerce')
+
+    os.makedirs(root, exist_ok=True)
+    for name, frame in (('info', info), ('statements', statements)):
+        frame = frame.sort_values('ticker', kind='stable')
+        if fmt == 'parquet':
+            frame.to_parquet(os.path.join(root, f'{name}.parquet'), index=False)
+        else:
+            frame.to_csv(os.path.join(root, f'{name}.csv'), index=False)
+
+
+def write_prices(root, prices, fmt='parquet'):
+    """Store a (dates x tickers) close frame as prices.<fmt> (ticker, date, close) next to a snapshot"""
+    frame = prices.rename_axis(index='date', columns='ticker').stack().rename('close').reset_index()
+    frame = frame[['ticker', 'date', 'close']].sort_values(['ticker', 'date'], kind='stable')
+    os.makedirs(root, exist_ok=True)
+    if fmt == 'parquet':
+        frame.to_parquet(os.path.join(root, 'prices.parquet'), index=False)
+    else:
+        frame.to_csv(os.path.join(root, 'prices.csv'), index=False)
+
+
+def read_prices(root):
+    """(dates x tickers) closes from a snapshot directory, or None when it has none"""
+    for ext in ('parquet', 'csv'):
+        path = os.path.join(root, f'prices.{ext}')
+        if os.path.exists(path):
+            frame = _read_table(path)
+            frame['date'] = pd.to_datetime(frame['date'])
+            return frame.pivot(index='date', columns='ticker', values='close').sort_index()
+    return None
+
+
+def main(argv=None):
+    from .cache import FundamentalsCache
+    from .screener import resolve_tickers
+
+    parser = argparse.ArgumentParser(description="Freeze cached fundamentals into a snapshot directory")
+    parser.add_argument("root", help="Snapshot directory to write")
+    parser.add_argument("--category", help="Substring of a POPULAR_STOCKS category")
+    parser.add_argument("--tickers", help="Comma-separated tickers (overrides --category)")
+    parser.add_argument("--format", choices=["parquet", "csv"], default="parquet")
+    args = parser.parse_args(argv)
+
+    cache = FundamentalsCache()
+    tickers = resolve_tickers(args.category, args.tickers.split(",") if args.tickers else None)
+    data = {}
+    for ticker in tickers:
+        fields = {f: value for f, (value, _) in cache.entries(ticker).items()}
+        if fields.get('info'):
+            data[ticker] = fields
+    write_snapshot(args.root, data, args.format)
+    print(f"Wrote {len(data)} of {len(tickers)} tickers to {args.root}")
+
+
+if __name__ == "__main__":
+    main()
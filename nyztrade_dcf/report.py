@@ -0,0 +1,255 @@
+"""PDF valuation report (ReportLab)"""
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import zipfile
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from contextlib import ExitStack
+from datetime import datetime
+from functools import lru_cache
+from io import BytesIO
+
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+from . import timing
+
+
+@lru_cache(maxsize=None)
+def report_styles():
+    """Paragraph and table styles, built once per process and shared by every report"""
+    styles = getSampleStyleSheet()
+    table_base = [
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+        ('BACKGROUND', (0, 1), (-1, -1), colors.HexColor('#f8f9fa'))
+    ]
+    return {
+        'title': ParagraphStyle('Title', parent=styles['Heading1'], fontSize=24,
+                                textColor=colors.HexColor('#667eea'), alignment=TA_CENTER),
+        'section': ParagraphStyle('Section', parent=styles['Heading2'], fontSize=14,
+                                  textColor=colors.HexColor('#667eea')),
+        'heading': styles['Heading2'],
+        'normal': styles['Normal'],
+        'valuation_table': TableStyle([('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#667eea'))] + table_base),
+        'assumptions_table': TableStyle([('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1a1a2e'))] + table_base),
+        'projection_table': TableStyle([('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#667eea')),
+                                        ('FONTSIZE', (0, 0), (-1, -1), 8)] + table_base)
+    }
+
+
+def create_dcf_pdf_report(company, ticker, sector, dcf_results, wacc_data, assumptions, output=None):
+    """Build the report into `output` (a path or binary file object); returns it, by default a BytesIO"""
+    buffer = BytesIO() if output is None else output
+    doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=30, leftMargin=30, topMargin=30, bottomMargin=18)
+    styles = report_styles()
+
+    story = []
+    story.append(Paragraph("NYZTrade DCF Valuation Report", styles['title']))
+    story.append(Spacer(1, 20))
+    story.append(Paragraph(f"<b>{company}</b>", styles['heading']))
+    story.append(Paragraph(f"Ticker: {ticker} | Sector: {sector} | Date: {datetime.now().strftime('%B %d, %Y')}", styles['normal']))
+    story.append(Spacer(1, 20))
+
+    story.append(Paragraph("Valuation Summary", styles['section']))
+    story.append(Spacer(1, 10))
+
+    val_data = [
+        ['Metric', 'Value'],
+        ['DCF Fair Value', f"₹{dcf_results['fair_value']:,.2f}"],
+        ['Current Price', f"₹{assumptions['current_price']:,.2f}"],
+        ['Upside/Downside', f"{assumptions['upside']:+.1f}%"],
+        ['Enterprise Value', f"₹{dcf_results['enterprise_value']/10000000:,.0f} Cr"],
+        ['Equity Value', f"₹{dcf_results['equity_value']/10000000:,.0f} Cr"]
+    ]
+
+    val_table = Table(val_data, colWidths=[3*inch, 2.5*inch])
+    val_table.setStyle(styles['valuation_table'])
+    story.append(val_table)
+    story.append(Spacer(1, 20))
+
+    story.append(Paragraph("Key Assumptions", styles['section']))
+    story.append(Spacer(1, 10))
+
+    assump_data = [
+        ['Parameter', 'Value'],
+        ['WACC', f"{wacc_data['wacc']*100:.2f}%"],
+        ['Cost of Equity', f"{wacc_data['cost_of_equity']*100:.2f}%"],
+        ['Beta', f"{wacc_data['beta']:.2f}"],
+        ['Terminal Growth', f"{assumptions['terminal_growth']*100:.1f}%"],
+        ['Projection Years', f"{assumptions['projection_years']} Years"]
+    ]
+    if 'projection_model' in assumptions:
+        assump_data.append(['Cash Flow Model', assumptions['projection_model']])
+
+    assump_table = Table(assump_data, colWidths=[3*inch, 2.5*inch])
+    assump_table.setStyle(styles['assumptions_table'])
+    story.append(assump_table)
+    story.append(Spacer(1, 30))
+
+    projected = assumptions.get('projected_fcf')
+    if projected:
+        story.append(Paragraph("Projected Free Cash Flow", styles['section']))
+        story.append(Spacer(1, 10))
+        drivers = 'revenue' in projected[0]
+        header = ['Year'] + (['Revenue (Cr)', 'Margin', 'Reinvestment (Cr)'] if drivers else []) + ['Growth', 'FCF (Cr)']
+        rows = [[f"Year {p['year']}"] +
+                ([f"{p['revenue']/10000000:,.0f}", f"{p['margin']*100:.1f}%", f"{p['reinvestment']/10000000:,.1f}"]
+                 if drivers else []) +
+                [f"{p['growth_rate']*100:.1f}%", f"{p['fcf']/10000000:,.1f}"] for p in projected]
+        proj_table = Table([header] + rows, repeatRows=1)
+        proj_table.setStyle(styles['projection_table'])
+        story.append(proj_table)
+        story.append(Spacer(1, 30))
+
+    story.append(Paragraph("<b>DISCLAIMER:</b> Educational purposes only. Not financial advice.", styles['normal']))
+
+    doc.build(story)
+    if output is None:
+        buffer.seek(0)
+    return buffer
+
+
+def report_key(ticker, dcf_results, wacc_data, assumptions):
+    """Stable hash of everything the report renders; the date is included since it is printed"""
+    payload = [ticker, dcf_results, wacc_data, assumptions, datetime.now().strftime('%Y-%m-%d')]
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=float).encode()).hexdigest()
+
+
+class PdfReportCache:
+    """On-demand PDF builds, cached by report_key.
+
+    Builds run on a single background thread (ReportLab is not thread-safe)
+    so callers can submit early, keep rendering, and collect the bytes from
+    the returned Future when they need them.
+    """
+
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self._futures = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf-report")
+
+    def submit(self, company, ticker, sector, dcf_results, wacc_data, assumptions):
+        """Future resolving to the PDF bytes; identical requests share one build"""
+        key = report_key(ticker, dcf_results, wacc_data, assumptions)
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None and not (future.done() and future.exception()):
+                self._futures.move_to_end(key)
+                timing.count('pdf_reused')
+                return future
+            future = self._executor.submit(timing.bind(timing.current(), _render_bytes), company, ticker, sector,
+                                           dcf_results, wacc_data, assumptions)
+            self._futures[key] = future
+            while len(self._futures) > self.max_entries:
+                self._futures.popitem(last=False)
+        return future
+
+    def get(self, company, ticker, sector, dcf_results, wacc_data, assumptions, timeout=None):
+        """PDF bytes, building them if needed"""
+        return self.submit(company, ticker, sector, dcf_results, wacc_data, assumptions).result(timeout)
+
+
+def _render_bytes(company, ticker, sector, dcf_results, wacc_data, assumptions):
+    with timing.stage('pdf_render'):
+        return create_dcf_pdf_report(company, ticker, sector, dcf_results, wacc_data, assumptions).getvalue()
+
+
+_pdf_reports = None
+_pdf_reports_lock = threading.Lock()
+
+
+def pdf_reports():
+    """Process-wide PdfReportCache shared by all sessions"""
+    global _pdf_reports
+    with _pdf_reports_lock:
+        if _pdf_reports is None:
+            _pdf_reports = PdfReportCache()
+        return _pdf_reports
+
+
+def report_inputs(row):
+    """create_dcf_pdf_report arguments for one row of a screener result"""
+    dcf_results = {k: row[k] for k in ('fair_value', 'enterprise_value', 'equity_value')}
+    wacc_data = {k: row[k] for k in ('wacc', 'cost_of_equity', 'beta')}
+    assumptions = {'current_price': row['price'], 'upside': row['upside'], 'terminal_growth': row['terminal_growth'],
+                   'projection_years': int(row['projection_years']), 'net_debt': row['net_debt']}
+    return row['company'], row['ticker'], row['sector'], dcf_results, wacc_data, assumptions
+
+
+def report_filename(ticker, date=None):
+    return f"DCF_{ticker}_{(date or datetime.now()).strftime('%Y%m%d')}.pdf"
+
+
+def _write_report(job):
+    """(ticker, file path, None) for a written report, or (ticker, None, error) when this one failed"""
+    directory, args = job
+    path = os.path.join(directory, report_filename(args[1]))
+    try:
+        create_dcf_pdf_report(*args, output=path)
+    except Exception as e:
+        if os.path.exists(path):
+            os.remove(path)
+        return args[1], None, str(e)[:100]
+    return args[1], path, None
+
+
+def write_reports(screen, destination, processes=None):
+    """Render a report for every valued row of a screener result.
+
+    `destination` is a directory, or a path ending in .zip. Each worker
+    process writes its PDF straight to disk; for a zip the files are
+    streamed into the archive as they complete and removed, so no more than
+    one report is ever held in memory. A row that fails to render is
+    skipped, not fatal. Returns (written file names, [(ticker, error)]).
+    """
+    rows = screen[screen['error'].isna()] if 'error' in screen else screen
+    jobs_args = [report_inputs(row) for row in rows.to_dict('records')]
+    to_zip = destination.lower().endswith('.zip')
+    directory = tempfile.mkdtemp(prefix='dcf-reports-') if to_zip else destination
+    os.makedirs(directory, exist_ok=True)
+    jobs = [(directory, args) for args in jobs_args]
+
+    processes = min(os.cpu_count() or 1, 8) if processes is None else processes
+    written, failed = [], []
+    try:
+        with ExitStack() as stack:
+            archive = stack.enter_context(zipfile.ZipFile(destination, 'w', zipfile.ZIP_DEFLATED)) if to_zip else None
+            if processes <= 1:
+                outcomes = map(_write_report, jobs)
+            else:
+                pool = stack.enter_context(ProcessPoolExecutor(max_workers=processes))
+                futures = {pool.submit(_write_report, job): job[1][1] for job in jobs}
+                outcomes = (_outcome(f, futures[f]) for f in as_completed(futures))
+            for ticker, path, error in outcomes:
+                if error is not None:
+                    failed.append((ticker, error))
+                    continue
+                name = os.path.basename(path)
+                if archive is not None:
+                    archive.write(path, name)
+                    os.remove(path)
+                written.append(name)
+    finally:
+        if to_zip:
+            shutil.rmtree(directory, ignore_errors=True)
+    return written, failed
+
+
+def _outcome(future, ticker):
+    """_write_report's result, or the worker failure itself (e.g. a crashed process) as this ticker's error"""
+    try:
+        return future.result()
+    except Exception as e:
+        return ticker, None, str(e)[:100]
@@ -0,0 +1,324 @@
+"""Append-only columnar store of valuation results and the inputs behind them.
+
+    python -m nyztrade_dcf.results query --ticker TCS.NS --since 2026-10-01
+    python -m nyztrade_dcf.results query --sector Technology --columns ticker,valued_at,fair_value,upside
+    python -m nyztrade_dcf.results compact
+
+Each valuation is one row: ticker, sector, time, who ran it and from where,
+every input (WACC breakdown, growth path, terminal assumptions) and every
+output (EV split, fair value, upside, band). Rows are buffered and written
+as immutable Parquet part files, one per flush, so writers in different
+processes never touch the same file. `_index.json` records each file's rows,
+time span, tickers and sectors. A query only opens the files the index says
+can match, reads them memory-mapped and pushes the remaining filters down
+to Parquet row groups. `compact` rewrites the parts into one file per month,
+sorted by ticker and time, so the row-group statistics can skip most rows.
+"""
+import argparse
+import atexit
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: index updates are only serialized in-process
+    fcntl = None
+
+from .cache import default_cache_path
+
+INDEX = '_index.json'
+ROW_GROUP = 4096
+
+# column -> arrow type name; the schema every part file is written with
+COLUMNS = {
+    'valued_at': 'timestamp', 'ticker': 'string', 'sector': 'string', 'user': 'string', 'source': 'string',
+    'price': 'float64', 'fair_value': 'float64', 'upside': 'float64', 'recommendation': 'string',
+    'enterprise_value': 'float64', 'equity_value': 'float64', 'pv_fcfs': 'float64', 'pv_terminal': 'float64',
+    'terminal_value': 'float64', 'wacc': 'float64', 'cost_of_equity': 'float64', 'cost_of_debt': 'float64',
+    'beta': 'float64', 'tax_rate': 'float64', 'equity_weight': 'float64', 'debt_weight': 'float64',
+    'risk_free_rate': 'float64', 'market_premium': 'float64', 'base_fcf': 'float64', 'net_debt': 'float64',
+    'shares': 'float64', 'terminal_growth': 'float64', 'projection_years': 'int32', 'projection_model': 'string',
+    'exit_multiple': 'float64', 'manual_wacc': 'float64', 'target_margin': 'float64',
+    'sales_to_capital': 'float64', 'growth_rates': 'list', 'projected_fcf': 'list'
+}
+
+
+def default_results_path():
+    """$NYZTRADE_RESULTS_DIR, else results/ next to the fundamentals cache"""
+    return os.environ.get('NYZTRADE_RESULTS_DIR') or os.path.join(os.path.dirname(default_cache_path()), 'results')
+
+
+def schema():
+    import pyarrow as pa
+    types = {'timestamp': pa.timestamp('ms'), 'string': pa.string(), 'float64': pa.float64(), 'int32': pa.int32(),
+             'list': pa.list_(pa.float64())}
+    return pa.schema([(name, types[kind]) for name, kind in COLUMNS.items()])
+
+
+def _number_list(values):
+    if values is None:
+        return None
+    return [float(v['fcf'] if isinstance(v, dict) else v) for v in values]
+
+
+def _row(ticker, values, sector, user, source, valued_at):
+    row = {name: values.get(name) for name in COLUMNS}
+    row.update(ticker=ticker, sector=sector, user=user, source=source,
+               valued_at=pd.Timestamp(round(valued_at * 1000), unit='ms'),
+               growth_rates=_number_list(values.get('growth_rates')),
+               projected_fcf=_number_list(values.get('projected_fcf')))
+    return row
+
+
+class ResultStore:
+    """Parquet part files plus a JSON index under `root`; appends are buffered and thread-safe"""
+
+    def __init__(self, root=None, flush_rows=64, flush_seconds=60.0):
+        self.root = root or default_results_path()
+        self.flush_rows = flush_rows
+        self.flush_seconds = flush_seconds
+        self._buffer = []
+        self._buffered_since = None
+        self._lock = threading.Lock()
+        self._parts = 0
+        os.makedirs(self.root, exist_ok=True)
+
+    def append(self, ticker, values, sector=None, user=None, source='app', valued_at=None):
+        """Buffer one valuation; `values` holds inputs and outputs by COLUMNS name, other keys are ignored"""
+        row = _row(ticker, values, sector, user, source, time.time() if valued_at is None else valued_at)
+        with self._lock:
+            self._buffer.append(row)
+            self._buffered_since = self._buffered_since or time.monotonic()
+            due = (len(self._buffer) >= self.flush_rows or
+                   time.monotonic() - self._buffered_since >= self.flush_seconds)
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write buffered rows as one part file and index it; returns the file name or None"""
+        with self._lock:
+            rows, self._buffer, self._buffered_since = self._buffer, [], None
+            self._parts += 1
+            part = self._parts
+        if not rows:
+            return None
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        frame = pd.DataFrame(rows, columns=list(COLUMNS))
+        table = pa.Table.from_pandas(frame, schema=schema(), preserve_index=False)
+        name = f"part-{time.strftime('%Y%m%d%H%M%S')}-{os.getpid()}-{part}.parquet"
+        tmp = os.path.join(self.root, f".{name}.tmp")
+        pq.write_table(table, tmp, row_group_size=ROW_GROUP)
+        os.replace(tmp, os.path.join(self.root, name))
+        with self._index_lock():
+            index = self._read_index()
+            index[name] = _describe(frame)
+            self._write_index(index)
+        return name
+
+    def index(self):
+        """{file: {'rows', 'start', 'end', 'tickers', 'sectors'}} for every indexed file"""
+        return self._read_index()
+
+    def query(self, tickers=None, start=None, end=None, sectors=None, columns=None):
+        """Rows matching every given filter, oldest first, including rows not flushed yet.
+
+        `start` / `end` are anything pd.Timestamp accepts and bound `valued_at`
+        inclusively; `columns` limits what is read from disk.
+        """
+        import pyarrow.dataset as ds
+        from pyarrow import fs
+
+        start = None if start is None else pd.Timestamp(start)
+        end = None if end is None else pd.Timestamp(end)
+        tickers = None if tickers is None else set(tickers)
+        sectors = None if sectors is None else set(sectors)
+        wanted = list(COLUMNS) if columns is None else list(dict.fromkeys(['valued_at', *columns]))
+
+        frames = []
+        for attempt in range(2):
+            files = [os.path.join(self.root, name) for name, meta in sorted(self._read_index().items())
+                     if _may_match(meta, tickers, start, end, sectors)]
+            if not files:
+                break
+            try:
+                dataset = ds.dataset(files, schema=schema(), format='parquet',
+                                     filesystem=fs.LocalFileSystem(use_mmap=True))
+                frames.append(dataset.to_table(columns=wanted, filter=_expression(tickers, start, end, sectors))
+                              .to_pandas())
+                break
+            except FileNotFoundError:
+                # A concurrent compact replaced the files between reading the index and opening them
+                if attempt:
+                    raise
+        with self._lock:
+            pending = pd.DataFrame(self._buffer, columns=list(COLUMNS))
+        if len(pending):
+            frames.append(_filter(pending, tickers, start, end, sectors)[wanted])
+        if not frames:
+            return pd.DataFrame(columns=wanted)
+        frame = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        return frame.sort_values('valued_at', kind='stable', ignore_index=True)
+
+    def latest(self, tickers=None, sectors=None, columns=None):
+        """Most recent row per ticker"""
+        frame = self.query(tickers, sectors=sectors, columns=None if columns is None else ['ticker', *columns])
+        return frame.drop_duplicates('ticker', keep='last').reset_index(drop=True)
+
+    def compact(self):
+        """Rewrite all indexed files as one sorted file per month; returns (files before, files after)"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.flush()
+        with self._index_lock():
+            index = self._read_index()
+            if not index:
+                return 0, 0
+            table = pa.concat_tables(pq.read_table(os.path.join(self.root, name), schema=schema())
+                                     for name in sorted(index))
+            frame = table.to_pandas()
+            months = frame['valued_at'].dt.strftime('%Y%m')
+            stamp = time.strftime('%Y%m%d%H%M%S')
+            compacted = {}
+            for month, rows in frame.groupby(months, sort=True):
+                rows = rows.sort_values(['ticker', 'valued_at'], kind='stable')
+                name = f"month-{month}-{stamp}.parquet"
+                tmp = os.path.join(self.root, f".{name}.tmp")
+                pq.write_table(pa.Table.from_pandas(rows, schema=schema(), preserve_index=False), tmp,
+                               row_group_size=ROW_GROUP)
+                os.replace(tmp, os.path.join(self.root, name))
+                compacted[name] = _describe(rows)
+            self._write_index(compacted)
+            for name in index:
+                if name not in compacted:
+                    os.remove(os.path.join(self.root, name))
+        return len(index), len(compacted)
+
+    def reindex(self):
+        """Rebuild the index from the part files on disk (after a crash between write and index update)"""
+        import pyarrow.parquet as pq
+        with self._index_lock():
+            index = {}
+            for name in sorted(os.listdir(self.root)):
+                if name.endswith('.parquet') and not name.startswith('.'):
+                    index[name] = _describe(pq.read_table(os.path.join(self.root, name)).to_pandas())
+            self._write_index(index)
+        return len(index)
+
+    @contextmanager
+    def _index_lock(self):
+        with open(os.path.join(self.root, f"{INDEX}.lock"), 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _read_index(self):
+        try:
+            with open(os.path.join(self.root, INDEX)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write_index(self, index):
+        tmp = os.path.join(self.root, f".{INDEX}.{os.getpid()}.tmp")
+        with open(tmp, 'w') as f:
+            json.dump(index, f)
+        os.replace(tmp, os.path.join(self.root, INDEX))
+
+
+def _describe(frame):
+    return {'rows': len(frame), 'start': frame['valued_at'].min().isoformat(),
+            'end': frame['valued_at'].max().isoformat(), 'tickers': sorted(frame['ticker'].dropna().unique()),
+            'sectors': sorted(frame['sector'].dropna().unique())}
+
+
+def _may_match(meta, tickers, start, end, sectors):
+    if start is not None and pd.Timestamp(meta['end']) < start:
+        return False
+    if end is not None and pd.Timestamp(meta['start']) > end:
+        return False
+    if tickers is not None and tickers.isdisjoint(meta['tickers']):
+        return False
+    return sectors is None or not sectors.isdisjoint(meta['sectors'])
+
+
+def _expression(tickers, start, end, sectors):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    conditions = []
+    if tickers is not None:
+        conditions.append(ds.field('ticker').isin(sorted(tickers)))
+    if sectors is not None:
+        conditions.append(ds.field('sector').isin(sorted(sectors)))
+    if start is not None:
+        conditions.append(ds.field('valued_at') >= pa.scalar(start.value, pa.timestamp('ns')))
+    if end is not None:
+        conditions.append(ds.field('valued_at') <= pa.scalar(end.value, pa.timestamp('ns')))
+    expression = None
+    for condition in conditions:
+        expression = condition if expression is None else expression & condition
+    return expression
+
+
+def _filter(frame, tickers, start, end, sectors):
+    mask = pd.Series(True, index=frame.index)
+    if tickers is not None:
+        mask &= frame['ticker'].isin(tickers)
+    if sectors is not None:
+        mask &= frame['sector'].isin(sectors)
+    if start is not None:
+        mask &= frame['valued_at'] >= start
+    if end is not None:
+        mask &= frame['valued_at'] <= end
+    return frame[mask]
+
+
+def flush_at_exit(store):
+    """Write `store`'s buffer when the process exits; returns the store"""
+    atexit.register(store.flush)
+    return store
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Query or compact the valuation result store")
+    parser.add_argument("--root", help="Store directory (default: results/ next to the fundamentals cache)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    query = commands.add_parser("query", help="Print matching valuations")
+    query.add_argument("--ticker", action="append", help="Repeat for several tickers")
+    query.add_argument("--sector", action="append", help="Repeat for several sectors")
+    query.add_argument("--since", help="Earliest valuation time, e.g. 2026-10-01")
+    query.add_argument("--until", help="Latest valuation time")
+    query.add_argument("--columns", default="valued_at,ticker,sector,price,fair_value,upside,recommendation,wacc",
+                       help="Comma-separated columns")
+    query.add_argument("--latest", action="store_true", help="Only the most recent row per ticker")
+    commands.add_parser("compact", help="Merge part files into one sorted file per month")
+    commands.add_parser("reindex", help="Rebuild the index from the files on disk")
+    args = parser.parse_args(argv)
+
+    store = ResultStore(args.root)
+    if args.command == "query":
+        columns = [c for c in args.columns.split(",") if c]
+        unknown = set(columns) - set(COLUMNS)
+        if unknown:
+            parser.error(f"Unknown columns: {', '.join(sorted(unknown))}")
+        if args.latest:
+            frame = store.latest(args.ticker, args.sector, columns)[columns]
+        else:
+            frame = store.query(args.ticker, args.since, args.until, args.sector, columns)[columns]
+        print(frame.to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+    elif args.command == "compact":
+        before, after = store.compact()
+        print(f"Compacted {before} files into {after}")
+    else:
+        print(f"Indexed {store.reindex()} files")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Retry policy and circuit breaker for upstream (Yahoo) calls.
+
+Failures are classified first. An unknown ticker or empty `info` is
+permanent and never retried. Rate limits and transient network errors back
+off exponentially with full jitter, honoring a Retry-After hint, within a
+total sleep budget that bounds tail latency.
+
+Repeated rate limits open a process-wide CircuitBreaker. While it is open,
+upstream calls fail fast with CircuitOpenError, so other sessions do not
+pile on, and the fundamentals cache serves what it has instead. After the
+cooldown a single probe is let through: success closes the breaker, another
+rate limit re-opens it for twice as long.
+"""
+import random
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+
+from . import timing
+
+RATE_LIMIT = 'rate_limit'
+TRANSIENT = 'transient'
+PERMANENT = 'permanent'
+OPEN = 'circuit_open'
+
+_TRANSIENT_MARKERS = ('timed out', 'timeout', 'connection', 'temporarily', 'reset by peer', 'remote end closed',
+                      ' 500', ' 502', ' 503', ' 504', 'bad gateway', 'service unavailable')
+_PERMANENT_MARKERS = ('404', 'not found', 'no data found', 'delisted', 'unable to fetch data', 'invalid ticker')
+# Whole words only: "generate", "accurate" or "corporate" in an error is not a rate limit
+_RATE_LIMIT_PATTERN = re.compile(r'429|too many requests|\brate[ _-]?limit', re.IGNORECASE)
+
+
+class RateLimitError(Exception):
+    """Upstream answered with HTTP 429 / too many requests"""
+
+    def __init__(self, message="Too many requests", retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(RateLimitError):
+    """Refused locally: the breaker is open after repeated rate limits"""
+
+
+def is_rate_limit(exc):
+    """RateLimitError, or an error whose message says HTTP 429 / too many requests / rate limit"""
+    return isinstance(exc, RateLimitError) or _RATE_LIMIT_PATTERN.search(str(exc)) is not None
+
+
+def classify(exc):
+    """RATE_LIMIT, TRANSIENT, PERMANENT or OPEN; unrecognized errors count as transient"""
+    if isinstance(exc, CircuitOpenError):
+        return OPEN
+    if is_rate_limit(exc):
+        return RATE_LIMIT
+    if isinstance(exc, (ConnectionError, TimeoutError)):
+        return TRANSIENT
+    msg = f" {exc}".lower()
+    if any(marker in msg for marker in _TRANSIENT_MARKERS):
+        return TRANSIENT
+    if isinstance(exc, (ValueError, KeyError, LookupError)) or any(marker in msg for marker in _PERMANENT_MARKERS):
+        return PERMANENT
+    return TRANSIENT
+
+
+def retry_after(exc):
+    """Seconds the server asked us to wait, from `exc.retry_after` or a Retry-After header, else None"""
+    value = getattr(exc, 'retry_after', None)
+    if value is None:
+        headers = getattr(getattr(exc, 'response', None), 'headers', None) or {}
+        value = headers.get('Retry-After') if hasattr(headers, 'get') else None
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(str(value)).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class CircuitBreaker:
+    """Opens after `threshold` rate limits within `window` seconds; thread-safe and shared per process"""
+
+    def __init__(self, threshold=3, window=60.0, cooldown=60.0, max_cooldown=600.0, clock=time.monotonic):
+        self.threshold = threshold
+        self.window = window
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._recent = deque()
+        self._state = 'closed'
+        self._open_until = 0.0
+        self._current_cooldown = cooldown
+        self._probing = False
+        self._counts = {'trips': 0, 'rejected': 0}
+
+    def before(self):
+        """Raise CircuitOpenError unless a call may go upstream now"""
+        with self._lock:
+            if self._state == 'closed':
+                return
+            now = self._clock()
+            if self._state == 'open' and now >= self._open_until:
+                self._state = 'half_open'
+            if self._state == 'half_open' and not self._probing:
+                self._probing = True
+                return
+            self._counts['rejected'] += 1
+            wait = max(0.0, self._open_until - now)
+        raise CircuitOpenError(f"Yahoo rate limit circuit open; retry in {wait:.0f}s", retry_after=wait)
+
+    def success(self):
+        with self._lock:
+            if self._state != 'closed':
+                self._state = 'closed'
+                self._current_cooldown = self.cooldown
+                self._recent.clear()
+            self._probing = False
+
+    def failure(self, kind, hint=None):
+        """Record a failed call of `kind`; only rate limits move the breaker"""
+        with self._lock:
+            probe = self._probing
+            self._probing = False
+            if kind != RATE_LIMIT:
+                return
+            now = self._clock()
+            if probe or self._state == 'half_open':
+                self._current_cooldown = min(self._current_cooldown * 2, self.max_cooldown)
+                self._trip(now, hint)
+                return
+            self._recent.append(now)
+            while self._recent and now - self._recent[0] > self.window:
+                self._recent.popleft()
+            if self._state == 'closed' and len(self._recent) >= self.threshold:
+                self._trip(now, hint)
+
+    def _trip(self, now, hint):
+        self._state = 'open'
+        self._open_until = now + max(self._current_cooldown, hint or 0.0)
+        self._counts['trips'] += 1
+
+    def state(self):
+        """{'state', 'retry_in', 'recent_rate_limits', 'trips', 'rejected'} for display"""
+        with self._lock:
+            now = self._clock()
+            state = 'half_open' if self._state == 'open' and now >= self._open_until else self._state
+            return {'state': state, 'retry_in': max(0.0, self._open_until - now) if state == 'open' else 0.0,
+                    'recent_rate_limits': sum(1 for t in self._recent if now - t <= self.window), **self._counts}
+
+    def reset(self):
+        with self._lock:
+            self._state = 'closed'
+            self._recent.clear()
+            self._probing = False
+            self._current_cooldown = self.cooldown
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Attempts, jittered exponential backoff and a total sleep budget per call"""
+    max_attempts: int = 3
+    base: float = 1.0
+    cap: float = 10.0
+    budget: float = 20.0
+
+    def delay(self, attempt, exc, slept=0.0, rng=random):
+        """Seconds to sleep before retry number `attempt` (0-based) after `exc`, or None to give up.
+
+        A Retry-After hint is not bound by `cap`, only clamped to what is
+        left of the budget.
+        """
+        kind = classify(exc)
+        left = self.budget - slept
+        if kind in (PERMANENT, OPEN) or attempt + 1 >= self.max_attempts or left <= 0:
+            return None
+        hinted = retry_after(exc)
+        if hinted is not None:
+            return min(hinted, left)
+        wait = rng.uniform(0, min(self.cap, self.base * 2 ** attempt))
+        return wait if wait <= left else None
+
+    def call(self, func, *args, breaker=None, sleep=time.sleep, **kwargs):
+        """func(*args, **kwargs) under this policy and, when given, a CircuitBreaker"""
+        attempt, slept = 0, 0.0
+        while True:
+            if breaker is not None:
+                breaker.before()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                if breaker is not None:
+                    breaker.failure(classify(e), retry_after(e))
+                wait = self.delay(attempt, e, slept)
+                if wait is None:
+                    raise
+                timing.count('retries')
+                with timing.stage('retry_backoff'):
+                    sleep(wait)
+                attempt += 1
+                slept += wait
+                continue
+            if breaker is not None:
+                breaker.success()
+            return result
+
+
+NO_RETRY = RetryPolicy(max_attempts=1)
+
+_breaker = CircuitBreaker()
+
+
+def yahoo_breaker():
+    """The process-wide breaker guarding Yahoo"""
+    return _breaker
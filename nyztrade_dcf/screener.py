@@ -0,0 +1,245 @@
+"""Headless screener: value a category or the whole universe in one pass.
+
+    python -m nyztrade_dcf.screener --category "IT" --top 20
+    python -m nyztrade_dcf.screener --offline --csv screen.csv
+    python -m nyztrade_dcf.screener --category "Pharma" --reports pharma.zip
+
+Fundamentals are read straight from the on-disk cache (or a snapshot); FCF
+is extracted for all tickers in one extract_fcf_bulk pass and the DCF is one
+dcf_batch call.
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from .cache import FundamentalsCache
+from .engine import dcf_batch, fade_growth_path, implied_growth_batch, implied_wacc_batch
+from .fetcher import BatchFetcher
+from .providers import SnapshotProvider, long_statement, stack_statements
+from .universe import POPULAR_STOCKS, universe_tickers
+from .valuation import calculate_wacc, estimate_base_fcf, extract_fcf_bulk, recommendations, shares_outstanding
+
+# Below this many tickers a process pool costs more than it saves. Workers
+# only read and unpickle (~0.5 ms a ticker from the cache), while results
+# cost ~0.1 ms a ticker to ship back and the pool ~50 ms to start. Snapshot
+# reads are ~0.25 ms and every worker would reload the snapshot, so
+# snapshots are always read in-process unless `processes` is given.
+POOL_MIN_TICKERS = 1000
+# Sidebar defaults of the Streamlit app
+DEFAULT_GROWTH = (0.15, 0.12, 0.10, 0.08, 0.06)
+SCREEN_FIELDS = ('info', 'income_stmt', 'cash_flow')
+INPUT_COLUMNS = ('ticker', 'company', 'sector', 'price', 'base_fcf', 'fcf_estimated', 'net_debt', 'shares',
+                 'wacc', 'cost_of_equity', 'beta', 'error')
+
+_worker_source = None
+
+
+def resolve_tickers(category=None, tickers=None):
+    """Explicit tickers, else the categories whose name contains `category`, else the whole universe"""
+    if tickers:
+        return list(dict.fromkeys(tickers))
+    if category is None:
+        return universe_tickers()
+    matches = [c for c in POPULAR_STOCKS if category.lower() in c.lower()]
+    if not matches:
+        raise ValueError(f"No category matches {category!r}")
+    return universe_tickers(matches)
+
+
+def prepare_inputs(ticker, info, historical_fcf, risk_free_rate=0.07, market_premium=0.06):
+    """Scalar DCF inputs for one ticker, mirroring the Streamlit analysis block.
+
+    `historical_fcf` is {year: fcf} as from calculate_fcf_from_financials;
+    only the latest year is used.
+    """
+    base_fcf, estimated = estimate_base_fcf(info, historical_fcf)
+    wacc_data = calculate_wacc(info, risk_free_rate, market_premium)
+    shares = shares_outstanding(info)
+    total_debt = info.get('totalDebt', 0) or 0
+    total_cash = info.get('totalCash', 0) or 0
+
+    return {
+        'ticker': ticker,
+        'company': info.get('longName', ticker),
+        'sector': info.get('sector', 'Default'),
+        'price': info.get('currentPrice', 0) or info.get('regularMarketPrice', 0) or 0,
+        'base_fcf': base_fcf,
+        'fcf_estimated': estimated,
+        'net_debt': total_debt - total_cash,
+        'shares': shares,
+        'wacc': wacc_data['wacc'],
+        'cost_of_equity': wacc_data['cost_of_equity'],
+        'beta': wacc_data['beta'],
+        'error': None if shares else 'No shares outstanding'
+    }
+
+
+def _open_source(source):
+    """Per-worker reader for a ('cache', path) or ('snapshot', root) source"""
+    global _worker_source
+    if _worker_source is None or _worker_source[0] != source:
+        kind, path = source
+        _worker_source = (source, FundamentalsCache(path) if kind == 'cache' else SnapshotProvider(path))
+    return _worker_source[1]
+
+
+def _load_cached(job):
+    """(ticker, info, long cash-flow columns, error) for one ticker from the worker's source"""
+    source, ticker = job
+    try:
+        reader = _open_source(source)
+        if source[0] == 'cache':
+            data = {field: value for field, (value, _) in reader.entries(ticker, SCREEN_FIELDS).items()}
+            cash_flow = data.get('cash_flow')
+            rows = None if cash_flow is None or cash_flow.empty else long_statement(ticker, 'cash_flow', cash_flow)
+        else:
+            data = reader.load(ticker, ('info',))
+            rows = reader.statement_columns(ticker)
+        if not data.get('info'):
+            return ticker, None, None, 'Not cached'
+        return ticker, data['info'], rows, None
+    except Exception as e:
+        return ticker, None, None, str(e)[:100]
+
+
+def _latest_fcf(fcf):
+    """{ticker: {year: fcf}} holding each ticker's most recent extracted year, {} where there is none"""
+    values = fcf.to_numpy(float)
+    present = ~np.isnan(values)
+    last = values.shape[1] - 1 - present[:, ::-1].argmax(axis=1) if values.shape[1] else np.zeros(len(fcf), int)
+    return {t: {fcf.columns[j]: values[i, j]} if present[i].any() else {}
+            for i, (t, j) in enumerate(zip(fcf.index, last))}
+
+
+def screen(tickers=None, category=None, cache=None, fetch=True, fetcher=None, growth_rates=DEFAULT_GROWTH,
+           risk_free_rate=0.07, market_premium=0.06, terminal_growth=0.03, years=5, processes=None,
+           snapshot=None, fade=False):
+    """Value every ticker and return a DataFrame ranked by upside.
+
+    With `fetch`, tickers missing from `cache` are fetched first through
+    `fetcher` (a BatchFetcher writing to the same cache). Inputs are read
+    in-process unless `processes` > 1, or it is None and at least
+    POOL_MIN_TICKERS tickers come from the cache. Tickers that could not be
+    valued, including those without shares outstanding, are kept at the
+    bottom with their `error`. Base FCF comes from one extract_fcf_bulk pass
+    over all tickers, which also adds `fcf_path` / `fcf_issue`. A `snapshot`
+    directory (see providers.write_snapshot) replaces the cache and disables
+    fetching. With `fade`, years beyond `growth_rates` fade linearly to
+    `terminal_growth` instead of repeating the last rate.
+    """
+    tickers = resolve_tickers(category, tickers)
+    if snapshot is not None:
+        source = ('snapshot', str(snapshot))
+    else:
+        cache = cache or FundamentalsCache()
+        source = ('cache', cache.path)
+
+    if fetch and snapshot is None:
+        missing = cache.missing(tickers, SCREEN_FIELDS)
+        if missing:
+            (fetcher or BatchFetcher(cache=cache)).fetch_many(missing, SCREEN_FIELDS)
+
+    jobs = [(source, t) for t in tickers]
+    if processes is None:
+        pooled = source[0] == 'cache' and len(jobs) >= POOL_MIN_TICKERS
+        processes = min(os.cpu_count() or 1, 8) if pooled else 1
+    if processes <= 1 or len(jobs) < 2:
+        loaded = [_load_cached(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=processes) as pool:
+            loaded = list(pool.map(_load_cached, jobs, chunksize=max(1, len(jobs) // (4 * processes))))
+
+    # FCF for every ticker in one extract_fcf_bulk pass over the stacked cash-flow rows
+    infos = {t: info for t, info, _, error in loaded if error is None}
+    parts = [rows for t, _, rows, error in loaded if error is None and rows is not None]
+    fcf, diagnostics = extract_fcf_bulk(stack_statements(parts), infos)
+    historical = _latest_fcf(fcf)
+    rows = [prepare_inputs(t, info, historical[t], risk_free_rate, market_premium) if error is None else
+            {'ticker': t, 'error': error} for t, info, _, error in loaded]
+
+    frame = pd.DataFrame(rows, columns=INPUT_COLUMNS)
+    diagnostics = diagnostics[['path', 'issue']].rename(columns={'path': 'fcf_path', 'issue': 'fcf_issue'})
+    frame = frame.join(diagnostics, on='ticker')
+    valued = frame[frame['error'].isna()].copy()
+    failed = frame[frame['error'].notna()]
+
+    if fade:
+        growth_rates = fade_growth_path(growth_rates, terminal_growth, years)
+    results = dcf_batch(valued['base_fcf'].to_numpy(float), growth_rates, valued['wacc'].to_numpy(float),
+                        terminal_growth, valued['net_debt'].to_numpy(float), valued['shares'].to_numpy(float), years)
+    for key in ('fair_value', 'enterprise_value', 'equity_value', 'pv_fcfs', 'pv_terminal'):
+        valued[key] = results[key]
+
+    price = valued['price'].to_numpy(float)
+    valued['upside'] = np.where(price > 0, (valued['fair_value'] - price) / np.where(price > 0, price, 1) * 100, 0.0)
+    valued['recommendation'] = recommendations(valued['upside'])
+    # Reverse DCF: what the market price implies, solved for every ticker at once
+    valued['implied_growth'] = implied_growth_batch(price, valued['base_fcf'].to_numpy(float),
+                                                    valued['wacc'].to_numpy(float), terminal_growth,
+                                                    valued['net_debt'].to_numpy(float),
+                                                    valued['shares'].to_numpy(float), years)
+    valued['implied_wacc'] = implied_wacc_batch(price, valued['base_fcf'].to_numpy(float), growth_rates,
+                                                terminal_growth, valued['net_debt'].to_numpy(float),
+                                                valued['shares'].to_numpy(float), years)
+    valued['terminal_growth'] = terminal_growth
+    valued['projection_years'] = years
+
+    valued = valued.sort_values('upside', ascending=False)
+    ranked = pd.concat([valued, failed], ignore_index=True) if len(failed) else valued.reset_index(drop=True)
+    ranked.insert(0, 'rank', np.arange(1, len(ranked) + 1))
+    return ranked
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Value every ticker in a category or the whole universe")
+    parser.add_argument("--category", help="Substring of a POPULAR_STOCKS category, e.g. 'IT' or 'Pharma'")
+    parser.add_argument("--tickers", help="Comma-separated tickers (overrides --category)")
+    parser.add_argument("--growth", default=",".join(f"{g*100:g}" for g in DEFAULT_GROWTH),
+                        help="Yearly FCF growth in percent, comma-separated")
+    parser.add_argument("--risk-free", type=float, default=7.0, help="Risk-free rate (%%)")
+    parser.add_argument("--premium", type=float, default=6.0, help="Equity risk premium (%%)")
+    parser.add_argument("--terminal-growth", type=float, default=3.0, help="Perpetual growth (%%)")
+    parser.add_argument("--years", type=int, default=5, help="Projection horizon")
+    parser.add_argument("--fade", action="store_true", help="Fade growth to terminal growth beyond --growth")
+    parser.add_argument("--processes", type=int, default=None,
+                        help=f"Worker processes (default: in-process below {POOL_MIN_TICKERS} cached tickers)")
+    parser.add_argument("--offline", action="store_true", help="Only use cached fundamentals")
+    parser.add_argument("--snapshot", help="Read fundamentals from this snapshot directory instead of the cache")
+    parser.add_argument("--top", type=int, default=None, help="Print only the top N")
+    parser.add_argument("--csv", help="Write the full ranked table here")
+    parser.add_argument("--reports", help="Write a PDF per valued ticker into this directory or .zip")
+    args = parser.parse_args(argv)
+
+    ranked = screen(
+        tickers=args.tickers.split(",") if args.tickers else None,
+        category=args.category,
+        fetch=not args.offline,
+        growth_rates=[float(g) / 100 for g in args.growth.split(",")],
+        risk_free_rate=args.risk_free / 100,
+        market_premium=args.premium / 100,
+        terminal_growth=args.terminal_growth / 100,
+        years=args.years,
+        fade=args.fade,
+        processes=args.processes,
+        snapshot=args.snapshot
+    )
+
+    if args.csv:
+        ranked.to_csv(args.csv, index=False)
+    if args.reports:
+        from .report import write_reports
+        written, failed = write_reports(ranked, args.reports, processes=args.processes)
+        print(f"Wrote {len(written)} reports to {args.reports}")
+        for ticker, error in failed:
+            print(f"  report failed for {ticker}: {error}")
+    shown = ranked.head(args.top) if args.top else ranked
+    columns = ['rank', 'ticker', 'company', 'price', 'fair_value', 'upside', 'recommendation', 'wacc',
+               'implied_growth', 'implied_wacc', 'error']
+    print(shown[[c for c in columns if c in shown]].to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+
+
+if __name__ == "__main__":
+    main()
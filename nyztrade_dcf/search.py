@@ -0,0 +1,347 @@
+"""Ranked, typo-tolerant ticker search over the instrument master.
+
+    python -m nyztrade_dcf.search build EQUITY_L.csv
+    python -m nyztrade_dcf.search query "tata mot"
+
+The master is a CSV of NSE/BSE listings, e.g. NSE's EQUITY_L.csv ("SYMBOL",
+"NAME OF COMPANY") or a file with symbol, name and exchange columns. It is
+read from $NYZTRADE_INSTRUMENTS, else instruments.csv next to the fundamentals
+cache. POPULAR_STOCKS is always included, so the search works without one.
+
+Every symbol and name word is a key in one sorted list, so a prefix is two
+bisections. A substring is an intersection of the keys' trigram postings. A
+typo (one substituted, swapped, extra or missing letter; the first letter
+may only be swapped or extra) is checked with array operations against the
+few keys starting with a letter pair the typo leaves in place. The slower
+tiers only run while the cheaper ones find fewer than `limit` matches. The
+built index is pickled next to the master and rebuilt only when the master
+changes.
+"""
+import argparse
+import csv
+import os
+import pickle
+import re
+import threading
+import time
+from bisect import bisect_left
+from collections import OrderedDict
+
+import numpy as np
+
+from .cache import default_cache_path
+from .universe import ALL_STOCKS
+
+SUFFIXES = {'NSE': '.NS', 'BSE': '.BO'}
+STOP_WORDS = {'LIMITED', 'LTD', 'THE', 'OF', 'AND', 'CO', 'INC'}
+MEMO_SIZE = 512
+
+_SYMBOL_COLUMNS = ('SYMBOL', 'TICKER', 'SECURITY ID', 'SECURITY_ID', 'SCRIP ID')
+_NAME_COLUMNS = ('NAME OF COMPANY', 'NAME', 'COMPANY NAME', 'SECURITY NAME', 'ISSUER NAME')
+
+# Match kinds, best first
+EXACT_SYMBOL, SYMBOL_PREFIX, EXACT_WORD, WORD_PREFIX, SUBSTRING, FUZZY = range(6)
+
+
+def default_instruments_path():
+    """$NYZTRADE_INSTRUMENTS, else instruments.csv next to the fundamentals cache"""
+    return (os.environ.get('NYZTRADE_INSTRUMENTS') or
+            os.path.join(os.path.dirname(default_cache_path()), 'instruments.csv'))
+
+
+def normalize(text):
+    return re.sub(r"[^A-Z0-9&]+", " ", text.upper()).split()
+
+
+def _bare(ticker):
+    return ticker.rsplit('.', 1)[0] if ticker.endswith(('.NS', '.BO')) else ticker
+
+
+def load_instruments(path):
+    """[(ticker, name)] from a listings CSV; NSE symbols get .NS and BSE ones .BO unless already suffixed"""
+    rows = []
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        columns = {c.strip().upper(): c for c in reader.fieldnames or ()}
+        symbol = next((columns[c] for c in _SYMBOL_COLUMNS if c in columns), None)
+        name = next((columns[c] for c in _NAME_COLUMNS if c in columns), None)
+        exchange = columns.get('EXCHANGE')
+        if symbol is None:
+            raise ValueError(f"{path}: no symbol column (expected one of {', '.join(_SYMBOL_COLUMNS)})")
+        for row in reader:
+            ticker = (row[symbol] or '').strip().upper()
+            if not ticker:
+                continue
+            if '.' not in ticker:
+                ticker += SUFFIXES.get((row[exchange] or 'NSE').strip().upper() if exchange else 'NSE', '.NS')
+            rows.append((ticker, (row[name] or '').strip() if name else ''))
+    return rows
+
+
+def _trigrams(key):
+    return {key[i:i + 3] for i in range(len(key) - 2)}
+
+
+def _codes(text, width):
+    raw = text.encode('ascii', 'ignore')[:width]
+    return np.frombuffer(raw.ljust(width, b'\0'), dtype=np.uint8)
+
+
+def _last_mismatch(keys, q, shift):
+    """Per row, the last t with keys[row, t + shift] != q[t] (t >= 1 when shift < 0), or -1"""
+    m = len(q)
+    match = keys[:, shift:shift + m] == q if shift >= 0 else keys[:, :m - 1] == q[1:]
+    last = match.shape[1] - 1 - np.argmin(match[:, ::-1], axis=1)
+    last = np.where(match.all(axis=1), -1, last)
+    return last + 1 if shift < 0 else last
+
+
+def _one_edit_prefix(codes, lengths, word):
+    """Whether `word` is one substitution, adjacent swap, extra or missing letter away from a prefix of each key.
+
+    The edit can always be placed at the first difference, so each case is
+    a comparison against the common-prefix length, with no per-row loop.
+    """
+    n, m = len(codes), len(word)
+    q = _codes(word, m)
+    keys = np.zeros((n, m + 2), dtype=np.uint8)
+    keys[:, :min(m + 2, codes.shape[1])] = codes[:, :m + 2]
+    aligned = keys[:, :m] == q
+    p = np.where(aligned.all(axis=1), m, np.argmin(aligned, axis=1))
+    rows = np.arange(n)
+    same, skip_key, skip_word = (_last_mismatch(keys, q, shift) for shift in (0, 1, -1))
+    substituted = (same <= p) & (lengths >= m)
+    swapped = ((p + 1 < m) & (keys[rows, np.minimum(p, m - 1)] == q[np.minimum(p + 1, m - 1)]) &
+               (keys[rows, p + 1] == q[np.minimum(p, m - 1)]) & (same <= p + 1) & (lengths >= m))
+    extra_letter = (skip_word <= p) & (lengths >= m - 1)
+    missing_letter = (skip_key < p) & (lengths >= m + 1)
+    return (p < m) & (substituted | swapped | extra_letter | missing_letter)
+
+
+class SearchIndex:
+    """Sorted keys with flat entry postings, trigram postings and a padded code matrix; thread-safe to query"""
+
+    WIDTH = 16
+    NONE = 99
+
+    def __init__(self, instruments, popular=()):
+        names = {}
+        aliases = {}
+        for ticker, name in instruments:
+            names.setdefault(ticker, name or ticker)
+            aliases.setdefault(ticker, set()).add(name)
+        # Curated names are shorter and read better in the picker; the listed name stays searchable
+        for ticker, name in popular:
+            names[ticker] = name
+            aliases.setdefault(ticker, set()).add(name)
+        popular_set = {ticker for ticker, _ in popular}
+
+        self.tickers = list(names)
+        self.names = [names[t] for t in self.tickers]
+        self.symbols = [_bare(t) for t in self.tickers]
+
+        postings = {}
+        for entry, ticker in enumerate(self.tickers):
+            postings.setdefault(self.symbols[entry], {})[entry] = True
+            for alias in aliases[ticker]:
+                for word in normalize(alias):
+                    if word not in STOP_WORDS:
+                        postings.setdefault(word, {}).setdefault(entry, False)
+        self.keys = sorted(postings)
+        # Postings of key i are flat[offsets[i]:offsets[i + 1]]; `is_symbol` marks the entry's own symbol
+        self.offsets = np.cumsum([0] + [len(postings[k]) for k in self.keys]).astype(np.int64)
+        self.flat = np.array([e for k in self.keys for e in postings[k]], dtype=np.int32)
+        self.is_symbol = np.array([s for k in self.keys for s in postings[k].values()], dtype=bool)
+
+        grams = {}
+        for key_id, key in enumerate(self.keys):
+            for gram in _trigrams(key):
+                grams.setdefault(gram, []).append(key_id)
+        self.grams = {g: np.array(ids, dtype=np.int32) for g, ids in grams.items()}
+        self.codes = np.vstack([_codes(k, self.WIDTH) for k in self.keys]) if self.keys else \
+            np.zeros((0, self.WIDTH), dtype=np.uint8)
+        self.lengths = np.array([len(k) for k in self.keys], dtype=np.int16)
+        # Keys with their second letter dropped, for typos in that letter
+        skipped = sorted((k[0] + k[2:], key_id) for key_id, k in enumerate(self.keys) if len(k) > 2)
+        self.skip_keys = [k for k, _ in skipped]
+        self.skip_ids = np.array([key_id for _, key_id in skipped], dtype=np.int64)
+
+        order = sorted(range(len(self.tickers)),
+                       key=lambda e: (self.tickers[e] not in popular_set, len(self.symbols[e]), self.symbols[e]))
+        self.rank = np.empty(len(self.tickers), dtype=np.int64)
+        self.rank[order] = np.arange(len(self.tickers))
+        self._memo = OrderedDict()
+        self._memo_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.tickers)
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        del state['_memo'], state['_memo_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._memo = OrderedDict()
+        self._memo_lock = threading.Lock()
+
+    def _key_range(self, prefix, keys=None):
+        keys = self.keys if keys is None else keys
+        lo = bisect_left(keys, prefix)
+        return lo, bisect_left(keys, prefix + '\x7f', lo)
+
+    def _typo_candidates(self, word):
+        """Key ids that could be one edit from `word`: those starting with one of the first letters the edit
+        can leave in place, plus keys whose second letter is the one substituted or missing"""
+        spans = [np.arange(*self._key_range(pair)) for pair in {word[:2], word[0] + word[2], word[1] + word[0],
+                                                                 word[1:3]}]
+        for rest in {word[0] + word[2:], word}:
+            lo, hi = self._key_range(rest, self.skip_keys)
+            spans.append(self.skip_ids[lo:hi])
+        return np.unique(np.concatenate(spans))
+
+    def _mark(self, scores, key_ids, kind):
+        """Lower `scores` of the entries posted under `key_ids` to `kind`"""
+        starts = self.offsets[key_ids]
+        counts = self.offsets[key_ids + 1] - starts
+        positions = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        entries = self.flat[positions]
+        scores[entries] = np.minimum(scores[entries], kind)
+
+    def _enough(self, scores, alive, limit):
+        matched = scores < self.NONE
+        return np.count_nonzero(matched if alive is None else matched & alive) >= limit
+
+    def _word_scores(self, word, limit, alive=None):
+        """Best match kind per entry for one query word (NONE where it does not match).
+
+        Prefix matches are always complete; substring and typo matches are only
+        looked for while fewer than `limit` entries match, counting only the
+        `alive` ones (entries earlier words of the query matched).
+        """
+        scores = np.full(len(self.tickers), self.NONE, dtype=np.int64)
+        lo, hi = self._key_range(word)
+        if hi > lo:
+            span = slice(self.offsets[lo], self.offsets[hi])
+            entries, symbol = self.flat[span], self.is_symbol[span]
+            exact = self.offsets[lo + 1] - self.offsets[lo] if self.keys[lo] == word else 0
+            # Worst kind first, so an entry posted under several keys ends with its best
+            scores[entries[~symbol]] = WORD_PREFIX
+            scores[entries[:exact][~symbol[:exact]]] = EXACT_WORD
+            scores[entries[symbol]] = SYMBOL_PREFIX
+            scores[entries[:exact][symbol[:exact]]] = EXACT_SYMBOL
+        if len(word) < 3 or self._enough(scores, alive, limit):
+            return scores
+
+        grams = [self.grams.get(g) for g in _trigrams(word)]
+        if all(g is not None for g in grams):
+            candidates = grams[0]
+            for g in grams[1:]:
+                candidates = np.intersect1d(candidates, g, assume_unique=True)
+            if len(word) > 3:  # sharing every trigram does not yet mean containing the word
+                candidates = np.array([k for k in candidates.tolist() if word in self.keys[k]], dtype=np.int64)
+            self._mark(scores, candidates, SUBSTRING)
+        if not 4 <= len(word) <= self.WIDTH - 2 or self._enough(scores, alive, limit):
+            return scores
+
+        key_ids = self._typo_candidates(word)
+        close = _one_edit_prefix(self.codes[key_ids], self.lengths[key_ids], word)
+        self._mark(scores, key_ids[close], FUZZY)
+        return scores
+
+    def search(self, query, limit=50):
+        """[(ticker, name)] best first: symbol, then word prefix, substring and typo matches.
+
+        A trailing .NS / .BO is ignored. Every word of a multi-word query must
+        match; the words run together also count as a symbol prefix
+        ("tata mot" -> TATAMOTORS). Popular tickers and shorter symbols win ties.
+        """
+        words = normalize(_bare(query.strip().upper()))
+        if not words:
+            return []
+        memo_key = (' '.join(words), limit)
+        with self._memo_lock:
+            if memo_key in self._memo:
+                self._memo.move_to_end(memo_key)
+                return self._memo[memo_key]
+
+        total = np.zeros(len(self.tickers), dtype=np.int64)
+        for i, word in enumerate(words):
+            scores = self._word_scores(word, limit, total < self.NONE if i else None)
+            total = np.where(scores < self.NONE, total + scores, self.NONE)
+        if len(words) > 1:
+            joined = ''.join(words)
+            lo, hi = self._key_range(joined)
+            if hi > lo:
+                span = slice(self.offsets[lo], self.offsets[hi])
+                symbols = self.flat[span][self.is_symbol[span]]
+                total[symbols] = np.minimum(total[symbols], SYMBOL_PREFIX)
+
+        matched = np.flatnonzero(total < self.NONE)
+        order = total[matched] * len(self.tickers) + self.rank[matched]
+        if len(matched) > limit:
+            keep = np.argpartition(order, limit)[:limit]
+            matched, order = matched[keep], order[keep]
+        result = [(self.tickers[e], self.names[e]) for e in matched[np.argsort(order)].tolist()]
+
+        with self._memo_lock:
+            self._memo[memo_key] = result
+            if len(self._memo) > MEMO_SIZE:
+                self._memo.popitem(last=False)
+        return result
+
+
+def load_index(path=None):
+    """SearchIndex over the master at `path` plus POPULAR_STOCKS, from the prebuilt pickle when still current"""
+    path = path or default_instruments_path()
+    if not os.path.exists(path):
+        return SearchIndex([], ALL_STOCKS.items())
+    stat = os.stat(path)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    prebuilt = f"{path}.index.pkl"
+    try:
+        with open(prebuilt, 'rb') as f:
+            saved_stamp, index = pickle.load(f)
+        if saved_stamp == stamp:
+            return index
+    except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError, AttributeError):
+        pass
+    index = SearchIndex(load_instruments(path), ALL_STOCKS.items())
+    tmp = f"{prebuilt}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, 'wb') as f:
+            pickle.dump((stamp, index), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, prebuilt)
+    except OSError:  # read-only next to the master: the index just is not persisted
+        pass
+    return index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or query the ticker search index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="Index a listings CSV and save it next to the file")
+    build.add_argument("path", nargs="?", help="Instrument master (default: $NYZTRADE_INSTRUMENTS)")
+    query = commands.add_parser("query")
+    query.add_argument("text")
+    query.add_argument("--path", help="Instrument master (default: $NYZTRADE_INSTRUMENTS)")
+    query.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    index = load_index(args.path)
+    loaded = time.perf_counter() - start
+    if args.command == "build":
+        print(f"Indexed {len(index)} instruments, {len(index.keys)} keys in {loaded * 1000:.0f} ms")
+        return
+    start = time.perf_counter()
+    results = index.search(args.text, args.limit)
+    took = time.perf_counter() - start
+    for ticker, name in results:
+        print(f"{ticker:<16} {name}")
+    print(f"\n{len(results)} matches in {took * 1e6:.0f} us (index loaded in {loaded * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
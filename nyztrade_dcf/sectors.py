@@ -0,0 +1,185 @@
+"""Sector parameter index: peer medians computed from the fundamentals cache.
+
+    python -m nyztrade_dcf.sectors                 # recompute and publish a new version
+    python -m nyztrade_dcf.sectors --min-peers 5
+
+The published index replaces the hand-maintained INDUSTRY_PARAMS as the
+source of sector fallbacks. A sector with fewer than `min_peers` usable
+values for a metric keeps the static value for it, and everything stays
+static until an index has been published.
+"""
+import argparse
+import hashlib
+import json
+import os
+import tempfile
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .cache import FundamentalsCache, default_cache_path
+from .universe import INDUSTRY_PARAMS, universe_tickers
+
+SCHEMA = 1
+METRICS = ('beta', 'debt_equity', 'tax_rate', 'ev_ebitda')
+COLUMNS = ('beta', 'debt_equity', 'tax_rate', 'terminal_growth', 'ev_ebitda', 'peers')
+MIN_PEERS = 3
+
+# Values outside these ranges are data errors or distressed outliers, not peers
+VALID_RANGES = {'beta': (0.0, 3.0), 'debt_equity': (0.0, 5.0), 'tax_rate': (0.0, 0.5), 'ev_ebitda': (0.0, 100.0)}
+
+_INFO_KEYS = ('sector', 'beta', 'totalDebt', 'marketCap', 'enterpriseValue', 'ebitda')
+
+_index = None
+
+
+def default_index_path():
+    """$NYZTRADE_SECTOR_PARAMS, else sector_params.json next to the fundamentals cache"""
+    return (os.environ.get('NYZTRADE_SECTOR_PARAMS') or
+            os.path.join(os.path.dirname(default_cache_path()), 'sector_params.json'))
+
+
+def _effective_tax_rate(income_stmt):
+    """Latest reported tax rate, else tax provision over pre-tax income"""
+    if income_stmt is None or income_stmt.empty:
+        return np.nan
+    if 'Tax Rate For Calcs' in income_stmt.index:
+        return income_stmt.loc['Tax Rate For Calcs'].iloc[0]
+    if 'Tax Provision' in income_stmt.index and 'Pretax Income' in income_stmt.index:
+        pretax = income_stmt.loc['Pretax Income'].iloc[0]
+        return income_stmt.loc['Tax Provision'].iloc[0] / pretax if pretax and pretax > 0 else np.nan
+    return np.nan
+
+
+def peer_metrics(data):
+    """One row per ticker with its sector and raw METRICS, from {ticker: {field: value}}"""
+    records = [{key: (fields.get('info') or {}).get(key) for key in _INFO_KEYS} for fields in data.values()]
+    frame = pd.DataFrame.from_records(records, index=list(data), columns=_INFO_KEYS)
+    numeric = frame[list(_INFO_KEYS[1:])].apply(pd.to_numeric, errors='coerce')
+
+    market_cap, ebitda = numeric['marketCap'], numeric['ebitda']
+    peers = pd.DataFrame({
+        'sector': frame['sector'].fillna('Default'),
+        'beta': numeric['beta'],
+        'debt_equity': numeric['totalDebt'].fillna(0) / market_cap.where(market_cap > 0),
+        'tax_rate': pd.to_numeric(pd.Series([_effective_tax_rate(fields.get('income_stmt'))
+                                             for fields in data.values()], index=frame.index), errors='coerce'),
+        'ev_ebitda': numeric['enterpriseValue'] / ebitda.where(ebitda > 0)
+    })
+    for metric, (low, high) in VALID_RANGES.items():
+        peers[metric] = peers[metric].where(peers[metric].between(low, high))
+    return peers
+
+
+def compute_index(peers, min_peers=MIN_PEERS):
+    """Sector medians as a DataFrame indexed by sector with COLUMNS.
+
+    One grouped pass computes every median and peer count. Medians backed by
+    fewer than `min_peers` values fall back to INDUSTRY_PARAMS. 'Default'
+    takes the medians of the whole universe.
+    """
+    grouped = peers.groupby('sector')[list(METRICS)].agg(['median', 'count'])
+    medians = grouped.xs('median', axis=1, level=1)
+    counts = grouped.xs('count', axis=1, level=1)
+    medians = medians.where(counts >= min_peers)
+    medians.loc['Default'] = peers[list(METRICS)].median().where(peers[list(METRICS)].count() >= min_peers)
+
+    static = pd.DataFrame.from_dict(INDUSTRY_PARAMS, orient='index')
+    sectors = static.index.union(medians.index)
+    fallback = static.reindex(sectors).fillna(static.loc['Default'])
+    table = medians.reindex(sectors).combine_first(fallback)
+    table['peers'] = peers.groupby('sector').size().reindex(sectors).fillna(0).astype(int)
+    table.loc['Default', 'peers'] = len(peers)
+    return table[list(COLUMNS)]
+
+
+def publish_index(table, path=None, tickers=None):
+    """Write `table` as the current index plus an archived copy; returns the version string"""
+    path = path or default_index_path()
+    rows = {sector: [round(float(v), 6) for v in values] for sector, values in zip(table.index, table.to_numpy())}
+    digest = hashlib.sha256(json.dumps(rows, sort_keys=True).encode()).hexdigest()[:8]
+    version = f"{datetime.now().strftime('%Y%m%d')}-{digest}"
+    payload = {'schema': SCHEMA, 'version': version, 'computed_at': datetime.now().isoformat(timespec='seconds'),
+               'tickers': tickers if tickers is not None else int(table.loc['Default', 'peers']),
+               'columns': list(table.columns), 'sectors': rows}
+
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    stem, ext = os.path.splitext(path)
+    with open(f"{stem}.{version}{ext}", 'w') as f:
+        json.dump(payload, f, separators=(',', ':'))
+    # Readers never see a half-written current index
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'w') as f:
+        json.dump(payload, f, separators=(',', ':'))
+    os.replace(tmp, path)
+    return version
+
+
+def load_index(path=None):
+    """{'version', 'params': {sector: {column: value}}} from a published index, or None"""
+    path = path or default_index_path()
+    try:
+        with open(path) as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if payload.get('schema') != SCHEMA:
+        return None
+    columns = payload['columns']
+    params = {sector: dict(zip(columns, values)) for sector, values in payload['sectors'].items()}
+    return {'version': payload['version'], 'params': params}
+
+
+def _current():
+    global _index
+    if _index is None:
+        _index = load_index() or {'version': 'static', 'params': INDUSTRY_PARAMS}
+    return _index
+
+
+def sector_params(sector):
+    """Parameters for `sector` (else 'Default'); the published index is loaded once per process"""
+    params = _current()['params']
+    return params.get(sector) or params['Default']
+
+
+def index_version():
+    """Version of the index in use, or 'static' for the built-in INDUSTRY_PARAMS"""
+    return _current()['version']
+
+
+def reload_index():
+    """Drop the loaded index so the next lookup reads the latest published version"""
+    global _index
+    _index = None
+
+
+def build_index(cache=None, tickers=None, min_peers=MIN_PEERS):
+    """Sector table from whatever the cache holds for `tickers` (default: the universe)"""
+    cache = cache or FundamentalsCache()
+    tickers = tickers or universe_tickers()
+    data = {}
+    for ticker in tickers:
+        fields = {f: value for f, (value, _) in cache.entries(ticker, ('info', 'income_stmt')).items()}
+        if fields.get('info'):
+            data[ticker] = fields
+    return compute_index(peer_metrics(data), min_peers), len(data)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Recompute sector parameters from cached fundamentals")
+    parser.add_argument("--tickers", help="Comma-separated tickers (default: the whole universe)")
+    parser.add_argument("--min-peers", type=int, default=MIN_PEERS, help="Peers needed before a median is used")
+    parser.add_argument("--output", help="Index path (default: next to the fundamentals cache)")
+    args = parser.parse_args(argv)
+
+    table, n = build_index(tickers=args.tickers.split(",") if args.tickers else None, min_peers=args.min_peers)
+    version = publish_index(table, args.output, tickers=n)
+    print(table.to_string(float_format=lambda v: f"{v:,.3f}"))
+    print(f"\nPublished {version} from {n} tickers to {args.output or default_index_path()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""Per-request stage timing, counters and on-demand profiling.
+
+    NYZTRADE_TIMING_LOG=1 streamlit run dcf_valuation_app.py    # one JSON line per analysis
+
+A Trace belongs to one request. While it is active on a thread, `stage`,
+`add` and `count` report to it. With no active trace they return at once
+(a shared no-op context, or a thread-local lookup), so instrumented code
+costs next to nothing when timing is off. Work handed to another thread
+(the async fetch, the PDF build) gets the caller's trace passed explicitly.
+"""
+import cProfile
+import io
+import json
+import logging
+import marshal
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from datetime import datetime
+
+LOG_ENV = 'NYZTRADE_TIMING_LOG'
+PROFILERS = ('cprofile', 'pyinstrument')
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+_NULL = nullcontext()
+
+
+class Trace:
+    """Stage durations and counters for one request, optionally under a profiler"""
+
+    def __init__(self, name, profile=None):
+        if profile is not None and profile not in PROFILERS:
+            raise ValueError(f"Unknown profiler {profile!r}; expected one of {PROFILERS}")
+        self.name = name
+        self.started_at = datetime.now()
+        self.stages = []
+        self.counters = {}
+        self.elapsed = None
+        self.profile = profile
+        self._profiler = None
+        self._lock = threading.Lock()
+        self._start = time.perf_counter()
+
+    def add(self, name, seconds, **extra):
+        """Record a stage measured elsewhere"""
+        offset = time.perf_counter() - self._start - seconds
+        with self._lock:
+            self.stages.append({'stage': name, 'ms': seconds * 1000, 'at_ms': offset * 1000,
+                                'thread': threading.current_thread().name, **extra})
+
+    @contextmanager
+    def stage(self, name, **extra):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, **extra)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def start_profiler(self, profile=None):
+        """Start `profile` (default: the one given at construction) from this point of the request"""
+        if profile is not None:
+            if profile not in PROFILERS:
+                raise ValueError(f"Unknown profiler {profile!r}; expected one of {PROFILERS}")
+            self.profile = profile
+        if self.profile == 'cprofile':
+            self._profiler = cProfile.Profile()
+            try:
+                self._profiler.enable()
+            except ValueError:  # another profiler already owns this thread
+                self.count('profiler_unavailable')
+                self._profiler = self.profile = None
+        elif self.profile == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                self.count('profiler_unavailable')
+                self.profile = None
+                return
+            self._profiler = Profiler()
+            self._profiler.start()
+
+    def finish(self):
+        """Stop the clock and the profiler; returns self"""
+        if self.elapsed is None:
+            self.elapsed = time.perf_counter() - self._start
+            if self.profile == 'cprofile' and self._profiler is not None:
+                self._profiler.disable()
+            elif self.profile == 'pyinstrument' and self._profiler is not None:
+                self._profiler.stop()
+        return self
+
+    def totals(self):
+        """{stage: total ms}, summed over repeats, slowest first"""
+        with self._lock:
+            stages = list(self.stages)
+        totals = {}
+        for s in stages:
+            totals[s['stage']] = totals.get(s['stage'], 0.0) + s['ms']
+        return dict(sorted(totals.items(), key=lambda item: -item[1]))
+
+    def record(self):
+        """JSON-ready summary of the request"""
+        with self._lock:
+            stages, counters = list(self.stages), dict(self.counters)
+        return {'request': self.name, 'started_at': self.started_at.isoformat(timespec='milliseconds'),
+                'total_ms': None if self.elapsed is None else self.elapsed * 1000,
+                'stages': stages, 'counters': counters}
+
+    def log(self):
+        logger.info(json.dumps(self.record(), default=str))
+
+    def profile_text(self, limit=30):
+        """Top of the profile as text, or None without one"""
+        if self._profiler is None:
+            return None
+        if self.profile == 'cprofile':
+            out = io.StringIO()
+            pstats.Stats(self._profiler, stream=out).sort_stats('cumulative').print_stats(limit)
+            return out.getvalue()
+        return self._profiler.output_text(unicode=True, color=False)
+
+    def profile_dump(self):
+        """(filename, bytes): a .prof file for snakeviz / pstats, or pyinstrument's HTML"""
+        if self._profiler is None:
+            return None
+        stamp = self.started_at.strftime('%Y%m%d_%H%M%S')
+        if self.profile == 'cprofile':
+            self._profiler.create_stats()
+            return f"{self.name}_{stamp}.prof", marshal.dumps(self._profiler.stats)
+        return f"{self.name}_{stamp}.html", self._profiler.output_html().encode()
+
+
+def start(name, profile=None):
+    """Begin a trace on this thread, replacing any left over from an interrupted request"""
+    trace = Trace(name, profile)
+    _local.trace = trace
+    trace.start_profiler()
+    return trace
+
+
+def stop():
+    """Finish and detach this thread's trace; returns it, or None when timing was off"""
+    trace = getattr(_local, 'trace', None)
+    _local.trace = None
+    return trace.finish() if trace is not None else None
+
+
+def current():
+    """The trace active on this thread, or None"""
+    return getattr(_local, 'trace', None)
+
+
+@contextmanager
+def activate(trace):
+    """Make `trace` current on this thread for the block (None switches timing off)"""
+    previous = getattr(_local, 'trace', None)
+    _local.trace = trace
+    try:
+        yield trace
+    finally:
+        _local.trace = previous
+
+
+def bind(trace, func):
+    """`func` wrapped to run with `trace` active, for handing work to another thread"""
+    if trace is None:
+        return func
+
+    def bound(*args, **kwargs):
+        with activate(trace):
+            return func(*args, **kwargs)
+    return bound
+
+
+def stage(name, **extra):
+    """Time a block against the current trace; a no-op without one"""
+    trace = getattr(_local, 'trace', None)
+    return _NULL if trace is None else trace.stage(name, **extra)
+
+
+def add(name, seconds, **extra):
+    trace = getattr(_local, 'trace', None)
+    if trace is not None:
+        trace.add(name, seconds, **extra)
+
+
+def count(name, n=1):
+    trace = getattr(_local, 'trace', None)
+    if trace is not None:
+        trace.count(name, n)
+
+
+def logging_requested():
+    """Whether $NYZTRADE_TIMING_LOG asks for a timing log line per request"""
+    return os.environ.get(LOG_ENV, '').lower() not in ('', '0', 'false', 'no')
+
+
+def enable_logging(stream=None):
+    """Send timing records to `stream` (default stderr) at INFO, once per process"""
+    if not any(getattr(h, '_nyztrade_timing', False) for h in logger.handlers):
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        handler._nyztrade_timing = True
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
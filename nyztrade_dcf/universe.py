@@ -0,0 +1,71 @@
+"""Stock universe and sector fallback parameters"""
+
+POPULAR_STOCKS = {
+    "🔵 Large Cap - Nifty 50": {
+        "RELIANCE.NS": "Reliance Industries", "TCS.NS": "TCS", "HDFCBANK.NS": "HDFC Bank",
+        "INFY.NS": "Infosys", "ICICIBANK.NS": "ICICI Bank", "HINDUNILVR.NS": "Hindustan Unilever",
+        "ITC.NS": "ITC", "SBIN.NS": "State Bank of India", "BHARTIARTL.NS": "Bharti Airtel",
+        "KOTAKBANK.NS": "Kotak Mahindra Bank", "LT.NS": "Larsen & Toubro", "AXISBANK.NS": "Axis Bank",
+        "ASIANPAINT.NS": "Asian Paints", "MARUTI.NS": "Maruti Suzuki", "TITAN.NS": "Titan Company",
+        "BAJFINANCE.NS": "Bajaj Finance", "WIPRO.NS": "Wipro", "SUNPHARMA.NS": "Sun Pharma",
+        "ULTRACEMCO.NS": "UltraTech Cement", "NESTLEIND.NS": "Nestle India", "HCLTECH.NS": "HCL Technologies",
+        "TATAMOTORS.NS": "Tata Motors", "POWERGRID.NS": "Power Grid", "NTPC.NS": "NTPC",
+        "ONGC.NS": "ONGC", "M&M.NS": "Mahindra & Mahindra", "JSWSTEEL.NS": "JSW Steel",
+        "TATASTEEL.NS": "Tata Steel", "ADANIENT.NS": "Adani Enterprises", "ADANIPORTS.NS": "Adani Ports"
+    },
+    "🟢 Mid Cap - Growth": {
+        "JINDALSTEL.NS": "Jindal Steel", "TRENT.NS": "Trent", "PERSISTENT.NS": "Persistent Systems",
+        "PIIND.NS": "PI Industries", "DIXON.NS": "Dixon Technologies", "VOLTAS.NS": "Voltas",
+        "MPHASIS.NS": "Mphasis", "COFORGE.NS": "Coforge", "LTIM.NS": "LTIMindtree",
+        "AUROPHARMA.NS": "Aurobindo Pharma", "TORNTPHARM.NS": "Torrent Pharma", "ALKEM.NS": "Alkem Lab",
+        "POLYCAB.NS": "Polycab India", "HAVELLS.NS": "Havells India", "CROMPTON.NS": "Crompton Greaves",
+        "ASTRAL.NS": "Astral Ltd", "SUPREMEIND.NS": "Supreme Industries", "APLAPOLLO.NS": "APL Apollo"
+    },
+    "🟡 Small Cap - High Growth": {
+        "AMBER.NS": "Amber Enterprises", "AETHER.NS": "Aether Industries", "ANGELONE.NS": "Angel One",
+        "CAMPUS.NS": "Campus Activewear", "DATAPATTNS.NS": "Data Patterns", "EASEMYTRIP.NS": "EaseMyTrip",
+        "FIVESTAR.NS": "Five Star Business", "GLAND.NS": "Gland Pharma", "HAPPSTMNDS.NS": "Happiest Minds",
+        "HOMEFIRST.NS": "Home First Finance", "INDIAMART.NS": "IndiaMART", "JUSTDIAL.NS": "Just Dial",
+        "LATENTVIEW.NS": "LatentView Analytics", "NAZARA.NS": "Nazara Technologies"
+    },
+    "🏦 Banking & Finance": {
+        "HDFCBANK.NS": "HDFC Bank", "ICICIBANK.NS": "ICICI Bank", "SBIN.NS": "SBI",
+        "KOTAKBANK.NS": "Kotak Bank", "AXISBANK.NS": "Axis Bank", "INDUSINDBK.NS": "IndusInd Bank",
+        "BANDHANBNK.NS": "Bandhan Bank", "FEDERALBNK.NS": "Federal Bank", "AUBANK.NS": "AU Small Finance"
+    },
+    "💻 IT & Technology": {
+        "TCS.NS": "TCS", "INFY.NS": "Infosys", "WIPRO.NS": "Wipro", "HCLTECH.NS": "HCL Tech",
+        "TECHM.NS": "Tech Mahindra", "LTIM.NS": "LTIMindtree", "MPHASIS.NS": "Mphasis",
+        "COFORGE.NS": "Coforge", "PERSISTENT.NS": "Persistent", "TATAELXSI.NS": "Tata Elxsi"
+    },
+    "💊 Pharma & Healthcare": {
+        "SUNPHARMA.NS": "Sun Pharma", "DRREDDY.NS": "Dr Reddy's", "CIPLA.NS": "Cipla",
+        "DIVISLAB.NS": "Divi's Labs", "AUROPHARMA.NS": "Aurobindo Pharma", "LUPIN.NS": "Lupin",
+        "TORNTPHARM.NS": "Torrent Pharma", "ALKEM.NS": "Alkem Lab", "BIOCON.NS": "Biocon"
+    }
+}
+
+# Every popular ticker once, under the name its last category gives it
+ALL_STOCKS = {ticker: name for stocks in POPULAR_STOCKS.values() for ticker, name in stocks.items()}
+
+# Industry parameters; static fallbacks until a sector index is published (see sectors.py)
+INDUSTRY_PARAMS = {
+    'Technology': {'beta': 1.15, 'debt_equity': 0.1, 'tax_rate': 0.25, 'terminal_growth': 0.04, 'ev_ebitda': 18},
+    'Financial Services': {'beta': 1.0, 'debt_equity': 0.8, 'tax_rate': 0.25, 'terminal_growth': 0.035, 'ev_ebitda': 12},
+    'Consumer Cyclical': {'beta': 1.2, 'debt_equity': 0.4, 'tax_rate': 0.25, 'terminal_growth': 0.04, 'ev_ebitda': 15},
+    'Consumer Defensive': {'beta': 0.7, 'debt_equity': 0.3, 'tax_rate': 0.25, 'terminal_growth': 0.03, 'ev_ebitda': 20},
+    'Healthcare': {'beta': 0.9, 'debt_equity': 0.2, 'tax_rate': 0.25, 'terminal_growth': 0.04, 'ev_ebitda': 16},
+    'Industrials': {'beta': 1.1, 'debt_equity': 0.5, 'tax_rate': 0.25, 'terminal_growth': 0.035, 'ev_ebitda': 12},
+    'Energy': {'beta': 1.3, 'debt_equity': 0.4, 'tax_rate': 0.25, 'terminal_growth': 0.02, 'ev_ebitda': 8},
+    'Basic Materials': {'beta': 1.25, 'debt_equity': 0.35, 'tax_rate': 0.25, 'terminal_growth': 0.025, 'ev_ebitda': 10},
+    'Real Estate': {'beta': 0.9, 'debt_equity': 0.7, 'tax_rate': 0.25, 'terminal_growth': 0.03, 'ev_ebitda': 14},
+    'Utilities': {'beta': 0.6, 'debt_equity': 0.8, 'tax_rate': 0.25, 'terminal_growth': 0.025, 'ev_ebitda': 10},
+    'Communication Services': {'beta': 1.0, 'debt_equity': 0.5, 'tax_rate': 0.25, 'terminal_growth': 0.035, 'ev_ebitda': 12},
+    'Default': {'beta': 1.0, 'debt_equity': 0.4, 'tax_rate': 0.25, 'terminal_growth': 0.03, 'ev_ebitda': 12}
+}
+
+
+def universe_tickers(categories=None):
+    """Unique tickers across `categories` (default: all), in first-seen order"""
+    categories = POPULAR_STOCKS.keys() if categories is None else categories
+    return list(dict.fromkeys(ticker for category in categories for ticker in POPULAR_STOCKS[category]))
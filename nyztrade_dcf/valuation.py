@@ -0,0 +1,361 @@
+"""Finance core: FCF extraction, WACC, projection, terminal value, DCF, sensitivity and reverse DCF.
+
+Imports only NumPy and pandas so batch jobs and tests can use it without
+Streamlit, Plotly or ReportLab.
+"""
+import numpy as np
+import pandas as pd
+
+from .engine import (fade_growth_path, growth_path, implied_growth_batch, implied_terminal_growth_batch,
+                     implied_wacc_batch, linear_path, project_drivers_batch, project_fcf_batch, sensitivity_axis,
+                     sensitivity_grid, terminal_value_gordon_batch, value_dcf_batch)
+from .sectors import sector_params
+
+# Cash-flow statement labels, in order of preference
+FCF_LABELS = ('Free Cash Flow',)
+OCF_LABELS = ('Operating Cash Flow', 'Total Cash From Operating Activities')
+CAPEX_LABELS = ('Capital Expenditure', 'Capital Expenditures', 'Purchase Of PPE')
+
+# Lower bounds on upside (%) for each band, best first; anything else is AVOID
+RECOMMENDATION_BANDS = (
+    ('STRONG BUY', 40),
+    ('BUY', 20),
+    ('ACCUMULATE', 0),
+    ('HOLD', -15)
+)
+
+
+def _statement_row(cash_flow, labels):
+    """First row under the first of `labels` present, as numbers (non-numeric cells become NaN), else None"""
+    for label in labels:
+        if label in cash_flow.index:
+            return pd.to_numeric(cash_flow.loc[[label]].iloc[0], errors='coerce')
+    return None
+
+
+def _year(col):
+    return str(col.year if hasattr(col, 'year') else str(col)[:4])
+
+
+def calculate_fcf_from_financials(info, income_stmt, cash_flow):
+    """Calculate FCF - Chronological order"""
+    fcf_data = {}
+
+    if cash_flow is not None and not cash_flow.empty:
+        fcf_row = _statement_row(cash_flow, FCF_LABELS)
+        if fcf_row is not None:
+            for col in fcf_row.index[:4]:
+                if pd.notna(fcf_row[col]):
+                    fcf_data[_year(col)] = float(fcf_row[col])
+        else:
+            ocf_row = _statement_row(cash_flow, OCF_LABELS)
+            capex_row = _statement_row(cash_flow, CAPEX_LABELS)
+            if ocf_row is not None and capex_row is not None:
+                for col in ocf_row.index[:4]:
+                    ocf = float(ocf_row[col]) if pd.notna(ocf_row[col]) else 0
+                    capex = float(capex_row[col]) if pd.notna(capex_row[col]) else 0
+                    fcf_data[_year(col)] = ocf + capex if capex < 0 else ocf - abs(capex)
+
+    if not fcf_data:
+        operating_cf = info.get('operatingCashflow', 0) or 0
+        capex = abs(info.get('capitalExpenditures', 0) or 0)
+        if operating_cf > 0:
+            fcf_data['TTM'] = operating_cf - capex
+
+    return dict(sorted(fcf_data.items(), key=lambda x: x[0]))
+
+
+def extract_fcf_bulk(statements, info=None, max_years=4):
+    """calculate_fcf_from_financials for many tickers at once, from a long statement table.
+
+    `statements` has ticker, line_item, period and value columns (plus
+    `statement`, as in SnapshotProvider.statements, to pick out cash_flow);
+    `info` is an optional {ticker: info} for the TTM fallback. Returns
+    (fcf, diagnostics): a ticker x year frame and one row per ticker with
+    the path taken ('direct', 'ocf_capex', 'ttm' or 'none'), the labels
+    used and any issue that would have been swallowed silently.
+    """
+    cf = statements[statements['statement'] == 'cash_flow'] if 'statement' in statements else statements
+    tickers = pd.Index(pd.unique(statements['ticker']).tolist() + list(info or ())).unique()
+    values = pd.to_numeric(cf['value'], errors='coerce')
+    # Categorical codes keep the alias lookups and groupings off the string columns
+    line_item = pd.Categorical(cf['line_item'])
+    cf = pd.DataFrame({'ticker': pd.Categorical(cf['ticker'], categories=tickers),
+                       'line_item': line_item, 'period': pd.to_datetime(cf['period']).to_numpy(),
+                       'value': values.to_numpy(), 'bad': (values.isna() & cf['value'].notna()).to_numpy()})
+
+    has_statement = pd.Series(np.bincount(cf['ticker'].cat.codes, minlength=len(tickers)) > 0, index=tickers)
+
+    # The most recent `max_years` statement periods per ticker, newest first
+    cf = cf.sort_values(['ticker', 'period'], ascending=[True, False], kind='stable')
+    first = ~cf.duplicated(['ticker', 'period'])
+    cf['order'] = first.groupby(cf['ticker'], observed=True).cumsum().to_numpy()
+    cf = cf[cf['order'] <= max_years]
+
+    # First available alias of each kind per ticker
+    aliases = {label: (kind, rank) for kind, labels in (('fcf', FCF_LABELS), ('ocf', OCF_LABELS),
+                                                        ('capex', CAPEX_LABELS))
+               for rank, label in enumerate(labels)}
+    kinds = pd.Series([aliases.get(c, (None, 0))[0] for c in line_item.categories], dtype=object)
+    ranks = pd.Series([aliases.get(c, (None, 0))[1] for c in line_item.categories])
+    codes = cf['line_item'].cat.codes.to_numpy()
+    cf['kind'] = kinds.to_numpy()[codes]
+    cf['rank'] = ranks.to_numpy()[codes]
+    present = cf.loc[cf['kind'].notna(), ['ticker', 'kind', 'rank', 'line_item']]
+    chosen = present.sort_values('rank', kind='stable').drop_duplicates(['ticker', 'kind'])
+    chosen = chosen.pivot(index='ticker', columns='kind', values='line_item').astype(object)
+    chosen = chosen.reindex(index=tickers, columns=['fcf', 'ocf', 'capex'])
+    direct = chosen['fcf'].notna()
+    fallback = ~direct & chosen['ocf'].notna() & chosen['capex'].notna()
+    chosen_ocf = cf['ticker'].map(chosen['ocf']).astype(object)
+    chosen_capex = cf['ticker'].map(chosen['capex']).astype(object)
+    paths = pd.Series(np.where(direct, 'direct', np.where(fallback, 'ocf_capex', 'none')), index=tickers)
+    path = paths.to_numpy()[cf['ticker'].cat.codes.to_numpy()]
+    line = cf['line_item'].astype(object)
+
+    # Direct: reported FCF, skipping missing cells
+    rows = cf[(path == 'direct') & (cf['kind'] == 'fcf').to_numpy()]
+    direct_fcf = rows.dropna(subset=['value'])[['ticker', 'period', 'order', 'value']]
+
+    # Fallback: OCF less |capex|, missing cells counted as 0
+    fb = path == 'ocf_capex'
+    is_ocf = fb & (line == chosen_ocf).to_numpy()
+    is_capex = fb & (line == chosen_capex).to_numpy()
+    picked = cf[is_ocf | is_capex].assign(kind=np.where(is_ocf, 'ocf', 'capex')[is_ocf | is_capex])
+    wide = picked.assign(value=picked['value'].fillna(0)).pivot_table(
+        index=['ticker', 'period', 'order'], columns='kind', values='value', aggfunc='first', observed=True)
+    wide = wide.reindex(columns=['ocf', 'capex']).fillna(0)
+    ocf_capex = (wide['ocf'] - wide['capex'].abs()).rename('value').reset_index()
+
+    long = pd.concat([direct_fcf, ocf_capex], ignore_index=True)
+    long['year'] = pd.DatetimeIndex(long['period']).year.astype(str)
+    # Same year twice: the older period wins, as the scalar loop overwrites newest-first
+    long = long.sort_values('order').drop_duplicates(['ticker', 'year'], keep='last')
+    fcf = long.pivot(index='ticker', columns='year', values='value').reindex(tickers)
+
+    diagnostics = pd.DataFrame({
+        'path': paths,
+        'fcf_label': chosen['fcf'], 'ocf_label': chosen['ocf'], 'capex_label': chosen['capex'],
+        'non_numeric': cf.groupby('ticker')['bad'].sum().reindex(tickers).fillna(0).astype(int)
+    }, index=tickers)
+    diagnostics['years'] = fcf.notna().sum(axis=1)
+
+    # TTM from `info` where the statements gave nothing
+    empty = diagnostics['years'] == 0
+    ttm = pd.Series({t: (info or {}).get(t, {}).get('operatingCashflow', 0) or 0 for t in tickers[empty]}, dtype=float)
+    capex = pd.Series({t: abs((info or {}).get(t, {}).get('capitalExpenditures', 0) or 0) for t in tickers[empty]},
+                      dtype=float)
+    ttm_ok = ttm[ttm > 0].index
+    if len(ttm_ok):
+        fcf['TTM'] = (ttm - capex)[ttm_ok].reindex(tickers)
+        diagnostics.loc[ttm_ok, 'path'] = 'ttm'
+        diagnostics.loc[ttm_ok, 'years'] = 1
+
+    diagnostics['issue'] = np.select(
+        [diagnostics['path'] == 'ttm',
+         (diagnostics['path'] == 'none') & ~has_statement,
+         (diagnostics['path'] == 'none') & chosen['ocf'].notna(),
+         (diagnostics['path'] == 'none') & chosen['capex'].notna(),
+         diagnostics['path'] == 'none',
+         (diagnostics['path'] == 'direct') & (diagnostics['years'] == 0),
+         diagnostics['non_numeric'] > 0],
+        ['no usable statement rows; used TTM from info',
+         'no cash flow statement',
+         'no capex row',
+         'no operating cash flow row',
+         'no FCF, OCF or capex rows',
+         'Free Cash Flow row has no values',
+         'non-numeric cells ignored'],
+        None
+    )
+    fcf = fcf.reindex(columns=sorted(fcf.columns))
+    return fcf, diagnostics.rename_axis('ticker')
+
+
+def calculate_wacc(info, risk_free_rate=0.07, market_premium=0.06):
+    """WACC using CAPM"""
+    sector = info.get('sector', 'Default')
+    params = sector_params(sector)
+
+    beta = info.get('beta', params['beta']) or params['beta']
+    beta = max(0.5, min(2.0, beta))
+
+    cost_of_equity = risk_free_rate + beta * market_premium
+
+    total_debt = info.get('totalDebt', 0) or 0
+    interest_expense = info.get('interestExpense', 0) or 0
+
+    if total_debt > 0 and interest_expense > 0:
+        cost_of_debt = abs(interest_expense) / total_debt
+    else:
+        cost_of_debt = risk_free_rate + 0.02
+    cost_of_debt = min(cost_of_debt, 0.15)
+
+    tax_rate = params['tax_rate']
+    market_cap = info.get('marketCap', 0) or 0
+
+    if market_cap > 0 and total_debt > 0:
+        total_value = market_cap + total_debt
+        equity_weight = market_cap / total_value
+        debt_weight = total_debt / total_value
+    else:
+        debt_equity = params['debt_equity']
+        equity_weight = 1 / (1 + debt_equity)
+        debt_weight = debt_equity / (1 + debt_equity)
+
+    wacc = (equity_weight * cost_of_equity) + (debt_weight * cost_of_debt * (1 - tax_rate))
+
+    return {
+        'wacc': wacc,
+        'cost_of_equity': cost_of_equity,
+        'cost_of_debt': cost_of_debt,
+        'beta': beta,
+        'equity_weight': equity_weight,
+        'debt_weight': debt_weight,
+        'tax_rate': tax_rate,
+        'risk_free_rate': risk_free_rate,
+        'market_premium': market_premium
+    }
+
+
+def manual_wacc_data(wacc, info, risk_free_rate=0.07, market_premium=0.06):
+    """WACC breakdown for a user-supplied WACC override"""
+    return {'wacc': wacc, 'cost_of_equity': wacc, 'cost_of_debt': wacc * 0.7,
+            'beta': info.get('beta', 1.0) or 1.0, 'equity_weight': 0.8, 'debt_weight': 0.2,
+            'tax_rate': 0.25, 'risk_free_rate': risk_free_rate, 'market_premium': market_premium}
+
+
+def project_fcf(base_fcf, growth_rates, years=5):
+    """Project FCF"""
+    growth = growth_path(growth_rates, years)
+    fcfs = project_fcf_batch(base_fcf, growth, years)
+    return [{'year': i + 1, 'fcf': float(fcf), 'growth_rate': float(g)}
+            for i, (fcf, g) in enumerate(zip(fcfs, growth))]
+
+
+def project_fcf_multistage(base_fcf, growth_rates, terminal_growth, years=10, high_years=None):
+    """Project FCF: `growth_rates` for the high-growth phase, then a linear fade to terminal growth"""
+    growth = fade_growth_path(growth_rates, terminal_growth, years, high_years)
+    fcfs = project_fcf_batch(base_fcf, growth, years)
+    return [{'year': i + 1, 'fcf': float(fcf), 'growth_rate': float(g)}
+            for i, (fcf, g) in enumerate(zip(fcfs, growth))]
+
+
+def project_fcf_drivers(base_revenue, growth_rates, terminal_growth, start_margin, target_margin, sales_to_capital,
+                        years=10, high_years=None):
+    """Project FCF as revenue x after-tax margin - reinvestment.
+
+    Revenue growth follows the multi-stage path; the margin moves linearly
+    from `start_margin` to `target_margin` over the horizon.
+    """
+    growth = fade_growth_path(growth_rates, terminal_growth, years, high_years)
+    margin = linear_path(start_margin, target_margin, years)
+    drivers = project_drivers_batch(base_revenue, growth, margin, sales_to_capital)
+    return [{'year': i + 1, 'fcf': float(fcf), 'growth_rate': float(g), 'revenue': float(rev),
+             'margin': float(m), 'reinvestment': float(r)}
+            for i, (fcf, g, rev, m, r) in enumerate(zip(drivers['fcf'], growth, drivers['revenue'], margin,
+                                                          drivers['reinvestment']))]
+
+
+def calculate_terminal_value_gordon(final_fcf, wacc, terminal_growth):
+    """Gordon Growth Model"""
+    return float(terminal_value_gordon_batch(final_fcf, wacc, terminal_growth))
+
+
+def calculate_terminal_value_exit_multiple(final_ebitda, exit_multiple):
+    """Exit Multiple Method"""
+    return final_ebitda * exit_multiple
+
+
+def calculate_terminal_value(projected_fcf, wacc, terminal_growth, exit_multiple=None, ebitda=0, growth_rates=()):
+    """Gordon Growth Model, or an exit EV/EBITDA multiple when `exit_multiple` is given"""
+    if exit_multiple is None:
+        return calculate_terminal_value_gordon(projected_fcf[-1]['fcf'], wacc, terminal_growth)
+    final_ebitda = ebitda * np.prod([1 + g for g in growth_rates])
+    return calculate_terminal_value_exit_multiple(final_ebitda, exit_multiple)
+
+
+def calculate_dcf_value(projected_fcf, terminal_value, wacc, net_debt, shares_outstanding):
+    """Calculate DCF fair value"""
+    fcfs = [item['fcf'] for item in projected_fcf]
+    result = value_dcf_batch(fcfs, terminal_value, wacc, net_debt, shares_outstanding)
+    return {k: float(v) for k, v in result.items()}
+
+
+def run_sensitivity_analysis(base_fcf, growth_rates, wacc_base, terminal_growth_base, net_debt, shares, years=5,
+                             wacc_span=0.02, growth_span=0.01, wacc_points=5, growth_points=5, projected_fcf=None):
+    """Sensitivity matrix; `projected_fcf` (as from project_fcf*) overrides the base FCF projection"""
+    wacc_range = sensitivity_axis(wacc_base, wacc_span, wacc_points)
+    growth_range = sensitivity_axis(terminal_growth_base, growth_span, growth_points)
+    projected = None if projected_fcf is None else [item['fcf'] for item in projected_fcf]
+    matrix = sensitivity_grid(base_fcf, growth_rates, wacc_range, growth_range, net_debt, shares, years, projected)
+    return {'matrix': matrix, 'wacc_range': wacc_range, 'growth_range': growth_range}
+
+
+def _solved(value):
+    value = float(value)
+    return None if np.isnan(value) else value
+
+
+def implied_growth(current_price, base_fcf, wacc, terminal_growth, net_debt, shares, years=5):
+    """Uniform FCF growth the price implies, or None when outside -50%..100%"""
+    return _solved(implied_growth_batch(current_price, base_fcf, wacc, terminal_growth, net_debt, shares, years))
+
+
+def implied_terminal_growth(current_price, base_fcf, growth_rates, wacc, net_debt, shares, years=5):
+    """Perpetual growth the price implies, or None when no rate below WACC fits"""
+    return _solved(implied_terminal_growth_batch(current_price, base_fcf, growth_rates, wacc, net_debt, shares, years))
+
+
+def implied_wacc(current_price, base_fcf, growth_rates, terminal_growth, net_debt, shares, years=5):
+    """Discount rate the price implies, or None when no rate up to 100% fits"""
+    return _solved(implied_wacc_batch(current_price, base_fcf, growth_rates, terminal_growth, net_debt, shares, years))
+
+
+def reverse_dcf(current_price, base_fcf, growth_rates, wacc, terminal_growth, net_debt, shares, years=5):
+    """Each input solved for in turn, holding the other two at their assumed values; all None without a price"""
+    return {
+        'implied_growth': implied_growth(current_price, base_fcf, wacc, terminal_growth, net_debt, shares, years),
+        'implied_terminal_growth': implied_terminal_growth(current_price, base_fcf, growth_rates, wacc, net_debt,
+                                                           shares, years),
+        'implied_wacc': implied_wacc(current_price, base_fcf, growth_rates, terminal_growth, net_debt, shares, years)
+    }
+
+
+def estimate_base_fcf(info, historical_fcf):
+    """Latest FCF, falling back to 50% of EBITDA (or 5% of market cap) when it is not positive.
+
+    Returns (base_fcf, estimated).
+    """
+    if historical_fcf:
+        base_fcf = list(historical_fcf.values())[-1]
+    else:
+        base_fcf = (info.get('operatingCashflow', 0) or 0) - abs(info.get('capitalExpenditures', 0) or 0)
+
+    if base_fcf > 0:
+        return base_fcf, False
+
+    ebitda = info.get('ebitda', 0) or 0
+    market_cap = info.get('marketCap', 0) or 0
+    return (ebitda * 0.5 if ebitda > 0 else market_cap * 0.05), True
+
+
+def shares_outstanding(info):
+    """`sharesOutstanding` from info, or None when missing or not positive: no per-share value is possible then"""
+    shares = info.get('sharesOutstanding')
+    return float(shares) if isinstance(shares, (int, float)) and shares > 0 else None
+
+
+def recommendation(upside):
+    """Recommendation band for an upside in percent"""
+    for band, threshold in RECOMMENDATION_BANDS:
+        if upside > threshold:
+            return band
+    return 'AVOID'
+
+
+def recommendations(upside):
+    """Vectorized recommendation() over an array of upsides"""
+    upside = np.asarray(upside, dtype=float)
+    conditions = [upside > threshold for _, threshold in RECOMMENDATION_BANDS]
+    return np.select(conditions, [band for band, _ in RECOMMENDATION_BANDS], 'AVOID')
@@ -0,0 +1,353 @@
+"""Persistent watchlist with scheduled background revaluation and band-change alerts.
+
+    python -m nyztrade_dcf.watchlist add niyas TCS.NS INFY.NS
+    python -m nyztrade_dcf.watchlist run                 # revalue everything now
+    python -m nyztrade_dcf.watchlist worker --window 18-8
+    python -m nyztrade_dcf.watchlist alerts niyas
+
+The worker is a plain local process: it sleeps until the off-peak window,
+refreshes watched tickers through the fundamentals cache, revalues every
+(user, ticker) with that user's saved assumptions and appends the result to
+a time series. A recommendation band that differs from the previous
+valuation raises an alert. The app only reads the stored results. From the
+command line, every valuation is also appended to the result store
+(nyztrade_dcf.results).
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import fcntl
+except ImportError:  # Windows: no guard against a second worker
+    fcntl = None
+
+from .cache import DAY, FundamentalsCache, default_cache_path
+from .fetcher import BatchFetcher
+from .results import ResultStore
+from .screener import DEFAULT_GROWTH, SCREEN_FIELDS
+from .valuation import (calculate_dcf_value, calculate_fcf_from_financials, calculate_terminal_value,
+                        calculate_wacc, estimate_base_fcf, manual_wacc_data, project_fcf_drivers,
+                        project_fcf_multistage, recommendation, shares_outstanding)
+
+# Sidebar defaults of the Streamlit app; saved assumptions override any of these
+DEFAULT_ASSUMPTIONS = {
+    'growth_rates': list(DEFAULT_GROWTH), 'risk_free_rate': 0.07, 'market_premium': 0.06,
+    'terminal_growth': 0.03, 'projection_years': 5, 'exit_multiple': None, 'manual_wacc': None,
+    'projection_model': "Compound FCF", 'target_margin': 0.15, 'sales_to_capital': 2.0
+}
+
+# NSE closes at 15:30 IST; refresh between the evening and the next open
+OFF_PEAK = (18, 8)
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS watchlist (
+    user TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    assumptions TEXT NOT NULL,
+    added_at REAL NOT NULL,
+    PRIMARY KEY (user, ticker)
+);
+CREATE TABLE IF NOT EXISTS valuations (
+    user TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    valued_at REAL NOT NULL,
+    price REAL,
+    fair_value REAL,
+    upside REAL,
+    recommendation TEXT,
+    wacc REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS valuations_by_ticker ON valuations (user, ticker, valued_at);
+CREATE TABLE IF NOT EXISTS alerts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    raised_at REAL NOT NULL,
+    previous TEXT NOT NULL,
+    current TEXT NOT NULL,
+    upside REAL,
+    seen INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def default_watchlist_path():
+    """$NYZTRADE_WATCHLIST, else watchlist.sqlite3 next to the fundamentals cache"""
+    return (os.environ.get('NYZTRADE_WATCHLIST') or
+            os.path.join(os.path.dirname(default_cache_path()), 'watchlist.sqlite3'))
+
+
+class Watchlist:
+    """SQLite store of watched tickers, their saved assumptions, valuation history and alerts"""
+
+    def __init__(self, path=None):
+        self.path = path or default_watchlist_path()
+        self._local = threading.local()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        conn.commit()
+
+    def _connect(self):
+        # sqlite3 connections must not be shared across threads
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            self._local.conn = conn
+        return conn
+
+    def add(self, user, ticker, assumptions=None):
+        """Watch `ticker` for `user`, replacing any assumptions saved before"""
+        conn = self._connect()
+        conn.execute("INSERT OR REPLACE INTO watchlist (user, ticker, assumptions, added_at) VALUES (?, ?, ?, ?)",
+                     (user, ticker, json.dumps(assumptions or {}), time.time()))
+        conn.commit()
+
+    def remove(self, user, ticker):
+        """Stop watching; the valuation history is kept"""
+        conn = self._connect()
+        conn.execute("DELETE FROM watchlist WHERE user = ? AND ticker = ?", (user, ticker))
+        conn.commit()
+
+    def entries(self, user=None):
+        """[(user, ticker, assumptions)] for one user, or everyone"""
+        query, args = "SELECT user, ticker, assumptions FROM watchlist", ()
+        if user is not None:
+            query, args = query + " WHERE user = ?", (user,)
+        return [(u, t, json.loads(a)) for u, t, a in self._connect().execute(query + " ORDER BY user, ticker", args)]
+
+    def record(self, user, ticker, result, valued_at=None):
+        """Append one valuation; returns the alert raised when its band differs from the previous one"""
+        valued_at = time.time() if valued_at is None else valued_at
+        conn = self._connect()
+        previous = conn.execute(
+            "SELECT recommendation FROM valuations WHERE user = ? AND ticker = ? AND error IS NULL "
+            "ORDER BY valued_at DESC LIMIT 1", (user, ticker)
+        ).fetchone()
+        conn.execute(
+            "INSERT INTO valuations (user, ticker, valued_at, price, fair_value, upside, recommendation, wacc, error) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (user, ticker, valued_at, result.get('price'), result.get('fair_value'), result.get('upside'),
+             result.get('recommendation'), result.get('wacc'), result.get('error'))
+        )
+        alert = None
+        current = result.get('recommendation')
+        if result.get('error') is None and previous is not None and previous[0] != current:
+            alert = {'user': user, 'ticker': ticker, 'previous': previous[0], 'current': current,
+                     'upside': result.get('upside')}
+            conn.execute("INSERT INTO alerts (user, ticker, raised_at, previous, current, upside) "
+                         "VALUES (?, ?, ?, ?, ?, ?)", (user, ticker, valued_at, previous[0], current,
+                                                       result.get('upside')))
+        conn.commit()
+        return alert
+
+    def latest(self, user):
+        """One row per watched ticker with its most recent valuation (NaN until the first run)"""
+        return pd.read_sql_query(
+            "SELECT w.ticker, v.valued_at, v.price, v.fair_value, v.upside, v.recommendation, v.wacc, v.error "
+            "FROM watchlist w LEFT JOIN valuations v ON v.rowid = ("
+            "  SELECT rowid FROM valuations WHERE user = w.user AND ticker = w.ticker "
+            "  ORDER BY valued_at DESC LIMIT 1) "
+            "WHERE w.user = ? ORDER BY w.ticker", self._connect(), params=(user,)
+        ).assign(valued_at=lambda f: pd.to_datetime(f['valued_at'], unit='s'))
+
+    def history(self, user, ticker):
+        """Fair value and upside time series for one watched ticker"""
+        return pd.read_sql_query(
+            "SELECT valued_at, price, fair_value, upside, recommendation, wacc, error FROM valuations "
+            "WHERE user = ? AND ticker = ? ORDER BY valued_at", self._connect(), params=(user, ticker)
+        ).assign(valued_at=lambda f: pd.to_datetime(f['valued_at'], unit='s'))
+
+    def alerts(self, user, unseen=True):
+        """Band-change alerts for `user`, newest first"""
+        query = "SELECT id, ticker, raised_at, previous, current, upside, seen FROM alerts WHERE user = ?"
+        if unseen:
+            query += " AND seen = 0"
+        return pd.read_sql_query(query + " ORDER BY raised_at DESC", self._connect(), params=(user,)).assign(
+            raised_at=lambda f: pd.to_datetime(f['raised_at'], unit='s'))
+
+    def acknowledge(self, user, ids=None):
+        """Mark `ids` (default: all) of `user`'s alerts as seen"""
+        conn = self._connect()
+        if ids is None:
+            conn.execute("UPDATE alerts SET seen = 1 WHERE user = ?", (user,))
+        else:
+            conn.executemany("UPDATE alerts SET seen = 1 WHERE user = ? AND id = ?", [(user, i) for i in ids])
+        conn.commit()
+
+    def last_run(self):
+        """Timestamp of the most recent valuation of any entry, or 0"""
+        row = self._connect().execute("SELECT MAX(valued_at) FROM valuations").fetchone()
+        return row[0] or 0.0
+
+
+def revalue(info, income_stmt, cash_flow, assumptions=None):
+    """Fair value, upside and band for one ticker under saved `assumptions`, as the app computes them"""
+    a = {**DEFAULT_ASSUMPTIONS, **(assumptions or {})}
+    historical_fcf = calculate_fcf_from_financials(info, income_stmt, cash_flow)
+    base_fcf, _ = estimate_base_fcf(info, historical_fcf)
+    if a['manual_wacc']:
+        wacc_data = manual_wacc_data(a['manual_wacc'], info, a['risk_free_rate'], a['market_premium'])
+    else:
+        wacc_data = calculate_wacc(info, a['risk_free_rate'], a['market_premium'])
+    wacc = wacc_data['wacc']
+
+    revenue = info.get('totalRevenue', 0) or 0
+    if a['projection_model'] == "Revenue × Margin" and revenue > 0:
+        start_margin = (info.get('operatingMargins', 0) or 0) * (1 - wacc_data['tax_rate'])
+        projected = project_fcf_drivers(revenue, a['growth_rates'], a['terminal_growth'], start_margin,
+                                        a['target_margin'], a['sales_to_capital'], a['projection_years'])
+    else:
+        projected = project_fcf_multistage(base_fcf, a['growth_rates'], a['terminal_growth'], a['projection_years'])
+
+    tv = calculate_terminal_value(projected, wacc, a['terminal_growth'], a['exit_multiple'],
+                                  info.get('ebitda', 0) or 0, [p['growth_rate'] for p in projected])
+    net_debt = (info.get('totalDebt', 0) or 0) - (info.get('totalCash', 0) or 0)
+    shares = shares_outstanding(info)
+    if shares is None:
+        raise ValueError("No shares outstanding")
+    dcf = calculate_dcf_value(projected, tv, wacc, net_debt, shares)
+    fair_value = dcf['fair_value']
+    price = info.get('currentPrice', 0) or info.get('regularMarketPrice', 0) or 0
+    upside = (fair_value - price) / price * 100 if price > 0 else 0
+    return {**wacc_data, **dcf, 'base_fcf': base_fcf, 'net_debt': net_debt, 'shares': shares,
+            'projected_fcf': projected, 'price': price, 'fair_value': fair_value, 'upside': upside,
+            'recommendation': recommendation(upside), 'wacc': wacc, 'error': None}
+
+
+def revalue_all(watchlist, fetcher=None, user=None, results=None, valued_at=None):
+    """Refresh every watched ticker once and record a valuation per entry; returns (valued, failed, alerts).
+
+    Successful valuations are also appended to `results` (a ResultStore) when given.
+    Failures are recorded as error rows and logged.
+    """
+    entries = watchlist.entries(user)
+    fetcher = fetcher or BatchFetcher(cache=FundamentalsCache())
+    reports = fetcher.fetch_many([ticker for _, ticker, _ in entries], SCREEN_FIELDS)
+    valued_at = time.time() if valued_at is None else valued_at
+    valued, failed, alerts = 0, 0, []
+    for owner, ticker, assumptions in entries:
+        report = reports[ticker]
+        info = (report.data or {}).get('info') if report.ok else None
+        try:
+            if info is None:
+                raise LookupError(report.error or "No data")
+            result = revalue(info, report.data.get('income_stmt'), report.data.get('cash_flow'), assumptions)
+            valued += 1
+            if results is not None:
+                results.append(ticker, {**DEFAULT_ASSUMPTIONS, **(assumptions or {}), **result},
+                               sector=info.get('sector'), user=owner, source='watchlist', valued_at=valued_at)
+        except Exception as e:
+            # Error rows raise no alert, so a bug in revalue would otherwise fail quietly every run
+            if info is None:
+                logger.warning("Watchlist %s/%s: fetch failed: %s", owner, ticker, e)
+            else:
+                logger.exception("Watchlist %s/%s: revaluation failed", owner, ticker)
+            result = {'error': str(e)[:100]}
+            failed += 1
+        alert = watchlist.record(owner, ticker, result, valued_at)
+        if alert is not None:
+            alerts.append(alert)
+    if results is not None:
+        results.flush()
+    return valued, failed, alerts
+
+
+def in_window(hour, window=OFF_PEAK):
+    """Whether `hour` falls in [start, end), wrapping past midnight when start > end"""
+    start, end = window
+    return start <= hour < end if start <= end else hour >= start or hour < end
+
+
+def run_worker(watchlist=None, fetcher=None, every=DAY, window=OFF_PEAK, poll=300, clock=time.time,
+               sleep=time.sleep, once=False, results=None):
+    """Revalue the watchlist whenever the off-peak `window` is open and `every` seconds have passed.
+
+    Holds an exclusive lock next to the store so only one worker runs per
+    watchlist; returns False straight away when another one already does.
+    """
+    watchlist = watchlist or Watchlist()
+    lock = open(f"{watchlist.path}.worker.lock", 'a')
+    try:
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return False
+        while True:
+            now = clock()
+            if in_window(datetime.fromtimestamp(now).hour, window) and now - watchlist.last_run() >= every:
+                valued, failed, alerts = revalue_all(watchlist, fetcher, results=results, valued_at=now)
+                print(f"{datetime.fromtimestamp(now):%Y-%m-%d %H:%M} revalued {valued}, failed {failed}, "
+                      f"{len(alerts)} band changes", flush=True)
+            if once:
+                return True
+            sleep(poll)
+    finally:
+        lock.close()
+
+
+def _window(text):
+    start, end = text.split("-")
+    return int(start), int(end)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Watchlist revaluation worker")
+    parser.add_argument("--path", help="Watchlist store (default: next to the fundamentals cache)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    add = commands.add_parser("add", help="Watch tickers with the default assumptions")
+    add.add_argument("user")
+    add.add_argument("tickers", nargs="+")
+    remove = commands.add_parser("remove")
+    remove.add_argument("user")
+    remove.add_argument("tickers", nargs="+")
+    show = commands.add_parser("list", help="Latest stored valuations")
+    show.add_argument("user")
+    alerts = commands.add_parser("alerts", help="Unseen band changes")
+    alerts.add_argument("user")
+    alerts.add_argument("--ack", action="store_true", help="Mark them as seen")
+    commands.add_parser("run", help="Revalue every entry now")
+    worker = commands.add_parser("worker", help="Revalue on a schedule inside the off-peak window")
+    worker.add_argument("--window", type=_window, default=OFF_PEAK, help="Local hours START-END (default 18-8)")
+    worker.add_argument("--every", type=float, default=24.0, help="Hours between runs")
+    worker.add_argument("--poll", type=float, default=300.0, help="Seconds between schedule checks")
+    args = parser.parse_args(argv)
+
+    watchlist = Watchlist(args.path)
+    if args.command == "add":
+        for ticker in args.tickers:
+            watchlist.add(args.user, ticker.upper())
+    elif args.command == "remove":
+        for ticker in args.tickers:
+            watchlist.remove(args.user, ticker.upper())
+    elif args.command == "list":
+        print(watchlist.latest(args.user).to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+    elif args.command == "alerts":
+        print(watchlist.alerts(args.user).to_string(index=False, float_format=lambda v: f"{v:,.2f}"))
+        if args.ack:
+            watchlist.acknowledge(args.user)
+    elif args.command == "run":
+        valued, failed, raised = revalue_all(watchlist, results=ResultStore())
+        print(f"Revalued {valued}, failed {failed}, {len(raised)} band changes")
+    elif not run_worker(watchlist, every=args.every * 3600, window=args.window, poll=args.poll,
+                        results=ResultStore()):
+        parser.exit(1, f"Another worker holds {watchlist.path}.worker.lock\n")
+
+
+if __name__ == "__main__":
+    main()
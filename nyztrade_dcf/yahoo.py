@@ -0,0 +1,55 @@
+"""Yahoo Finance loader; yfinance is imported on first use"""
+import time
+
+import pandas as pd
+
+FIELDS = ('info', 'income_stmt', 'balance_sheet', 'cash_flow')
+STATEMENT_FIELDS = ('income_stmt', 'balance_sheet', 'cash_flow')
+
+
+def load_fundamentals(ticker, fields=FIELDS, pause=1.5, on_field=None):
+    """Fetch the requested fields for one ticker as a dict.
+
+    Raises ValueError when `info` comes back empty. A statement that fails to
+    load is left out of the result rather than returned as an empty frame,
+    so callers can tell it apart from a genuinely empty statement.
+    `on_field(field, value)` is called as each field arrives, `info` first.
+    """
+    import yfinance as yf
+
+    if pause:
+        time.sleep(pause)
+    stock = yf.Ticker(ticker)
+    data = {}
+
+    if 'info' in fields:
+        info = stock.info
+        if not info or len(info) < 5:
+            raise ValueError("Unable to fetch data")
+        data['info'] = info
+        if on_field is not None:
+            on_field('info', info)
+
+    for field in fields:
+        if field in STATEMENT_FIELDS:
+            try:
+                data[field] = getattr(stock, field)
+            except Exception:
+                continue
+            if data[field] is None:
+                data[field] = pd.DataFrame()
+            if on_field is not None:
+                on_field(field, data[field])
+
+    return data
+
+
+def load_price_history(tickers, start, end=None):
+    """Adjusted daily closes as a (dates x tickers) DataFrame"""
+    import yfinance as yf
+
+    tickers = list(tickers)
+    closes = yf.download(tickers, start=start, end=end, auto_adjust=True, progress=False)['Close']
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(tickers[0])
+    return closes.dropna(how='all')
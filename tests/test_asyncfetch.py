@@ -0,0 +1,59 @@
+"""PendingFetch: one provider load per ticker, fields reported as they arrive."""
+import pandas as pd
+
+from nyztrade_dcf import providers
+from nyztrade_dcf.asyncfetch import start_fetch
+from nyztrade_dcf.cache import FundamentalsCache
+from nyztrade_dcf.providers import InMemoryProvider, YahooProvider
+from nyztrade_dcf.yahoo import FIELDS
+
+
+def test_one_load_per_ticker():
+    provider = InMemoryProvider()
+    pending = start_fetch(provider, 'A.NS')
+    result = pending.result(timeout=5)
+
+    assert result.ok
+    assert provider.calls == {'A.NS': 1}
+    assert pending.arrived == FIELDS
+
+
+def test_rate_limited_load_is_retried():
+    provider = InMemoryProvider(rate_limit_first={'A.NS': 1})
+    result = start_fetch(provider, 'A.NS', backoff=0.01).result(timeout=5)
+
+    assert result.ok
+    assert provider.calls['A.NS'] == 2
+
+
+def test_unknown_ticker_fails_without_retries():
+    provider = InMemoryProvider(missing=('GONE.NS',))
+    result = start_fetch(provider, 'GONE.NS', backoff=0.01).result(timeout=5)
+
+    assert result.error == "Unable to fetch data"
+    assert provider.calls['GONE.NS'] == 1
+
+
+def test_yahoo_fields_share_one_upstream_call(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_load(ticker, fields, pause=1.5, on_field=None):
+        calls.append(tuple(fields))
+        data = {f: ({'symbol': ticker, 'a': 1, 'b': 2, 'c': 3, 'd': 4} if f == 'info' else pd.DataFrame())
+                for f in fields}
+        for f, value in data.items():
+            on_field(f, value)
+        return data
+
+    monkeypatch.setattr(providers, 'load_fundamentals', fake_load)
+    provider = YahooProvider(FundamentalsCache(str(tmp_path / 'cache.sqlite3')), pause=0)
+    pending = start_fetch(provider, 'A.NS')
+    assert pending.result(timeout=5).ok
+
+    assert calls == [FIELDS]
+    assert pending.arrived == FIELDS
+    # Served from the cache the second time, still reported field by field
+    again = start_fetch(provider, 'A.NS')
+    assert again.result(timeout=5).ok and calls == [FIELDS]
+    assert again.arrived == FIELDS
+
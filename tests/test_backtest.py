@@ -0,0 +1,44 @@
+"""backtest: periods without a point-in-time share count are skipped unless today's count is opted in."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from nyztrade_dcf.backtest import backtest
+
+PERIODS = pd.date_range('2022-03-31', '2025-12-31', freq=pd.offsets.QuarterEnd())
+
+
+def statements(ticker, shares):
+    rows = []
+    for period in PERIODS:
+        rows += [(ticker, 'cash_flow', 'Free Cash Flow', period, 1e9),
+                 (ticker, 'balance_sheet', 'Total Debt', period, 2e9)]
+        if shares:
+            rows.append((ticker, 'balance_sheet', 'Ordinary Shares Number', period, shares))
+    return rows
+
+
+@pytest.fixture
+def data():
+    rows = statements('A.NS', 1e8) + statements('B.NS', None)
+    frame = pd.DataFrame(rows, columns=['ticker', 'statement', 'line_item', 'period', 'value'])
+    dates = pd.bdate_range('2022-01-01', '2026-06-30')
+    walk = np.exp(np.cumsum(np.random.default_rng(7).normal(0, 0.01, (len(dates), 2)), axis=0))
+    return frame, pd.DataFrame(100 * walk, index=dates, columns=['A.NS', 'B.NS'])
+
+
+def test_periods_without_shares_are_skipped_by_default(data):
+    result = backtest(*data, years=3)
+
+    assert set(result.panel['ticker']) == {'A.NS'}
+    assert result.skipped['no_shares'] > 0
+    assert not result.panel['shares_current'].any()
+
+
+def test_current_shares_fill_only_missing_periods_and_are_flagged(data):
+    result = backtest(*data, years=3, shares={'A.NS': 5e7, 'B.NS': 2e8})
+    panel = result.panel.set_index('ticker')
+
+    assert result.skipped['no_shares'] == 0
+    assert (panel.loc['A.NS', 'shares'] == 1e8).all() and not panel.loc['A.NS', 'shares_current'].any()
+    assert (panel.loc['B.NS', 'shares'] == 2e8).all() and panel.loc['B.NS', 'shares_current'].all()
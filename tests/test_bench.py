@@ -0,0 +1,59 @@
+"""The benchmark gate: pinned baselines and which runs get recorded."""
+import pytest
+
+from nyztrade_dcf import bench
+
+
+@pytest.fixture
+def timed(monkeypatch):
+    """bench.main with the measured median set by the test instead of timed"""
+    median = {'ms': 10.0}
+
+    def fake_run(patterns, scales, repeat, seed, progress):
+        return [{'case': 'dcf', 'scale': 'single', 'n': 1, 'median_ms': median['ms'], 'peak_kb': 100.0}]
+
+    monkeypatch.setattr(bench, 'run', fake_run)
+
+    def main(ms, history, *flags):
+        median['ms'] = ms
+        try:
+            bench.main(['--history', str(history), *flags])
+        except SystemExit as e:
+            return e.code
+        return 0
+    return main
+
+
+def test_first_run_is_pinned(timed, tmp_path):
+    history = tmp_path / 'history.json'
+    assert timed(10.0, history) == 0
+
+    runs = bench.load_history(str(history))
+    assert len(runs) == 1 and runs[0]['pinned']
+
+
+def test_failing_run_is_not_recorded_and_does_not_move_the_baseline(timed, tmp_path):
+    history = tmp_path / 'history.json'
+    timed(10.0, history)
+
+    assert timed(20.0, history) == 1
+    assert len(bench.load_history(str(history))) == 1
+    assert timed(10.5, history) == 0
+
+
+def test_small_slowdowns_do_not_creep_past_the_gate(timed, tmp_path):
+    history = tmp_path / 'history.json'
+    timed(10.0, history)
+
+    assert timed(11.5, history) == 0
+    assert timed(13.0, history) == 1
+    assert bench.pinned_baseline(bench.load_history(str(history)))['results'][0]['median_ms'] == 10.0
+
+
+def test_accept_records_and_pins_a_regression(timed, tmp_path):
+    history = tmp_path / 'history.json'
+    timed(10.0, history)
+
+    assert timed(20.0, history, '--accept') == 0
+    assert bench.pinned_baseline(bench.load_history(str(history)))['results'][0]['median_ms'] == 20.0
+    assert timed(22.0, history) == 0
@@ -0,0 +1,116 @@
+"""FundamentalsCache: TTL and stale windows, rate-limit fallback and single-flight loads, on a fake clock."""
+import threading
+import time
+
+import pytest
+
+from nyztrade_dcf.cache import DAY, HOUR, FundamentalsCache
+from nyztrade_dcf.retry import RateLimitError
+
+FIELDS = ('info', 'cash_flow')
+
+
+class Loader:
+    """Records each call; returns `{field: (field, n)}` for the nth call unless told to raise"""
+
+    def __init__(self, error=None, gate=None):
+        self.calls = []
+        self.error = error
+        self.gate = gate
+        self.entered = threading.Event()
+
+    def __call__(self, ticker, fields):
+        self.calls.append(tuple(fields))
+        self.entered.set()
+        if self.gate is not None:
+            self.gate.wait(5)
+        if self.error is not None:
+            raise self.error
+        return {f: (f, len(self.calls)) for f in fields}
+
+
+@pytest.fixture
+def now():
+    return [1_000_000.0]
+
+
+@pytest.fixture
+def cache(tmp_path, now):
+    return FundamentalsCache(str(tmp_path / 'cache.sqlite3'), process_lock=False, clock=lambda: now[0])
+
+
+def test_fresh_entries_are_hits(cache, now):
+    cache.put('A.NS', {'info': 'old info', 'cash_flow': 'old cf'})
+    now[0] += HOUR
+    loader = Loader()
+
+    assert cache.get('A.NS', loader, FIELDS) == {'info': 'old info', 'cash_flow': 'old cf'}
+    assert loader.calls == []
+    assert cache.stats()['hits'] == 1
+
+
+def test_only_expired_fields_go_upstream(cache, now):
+    cache.put('A.NS', {'info': 'old info', 'cash_flow': 'old cf'})
+    now[0] += 2 * DAY  # info is past TTL + stale window, cash flow still fresh
+    loader = Loader()
+
+    assert cache.get('A.NS', loader, FIELDS) == {'info': ('info', 1), 'cash_flow': 'old cf'}
+    assert loader.calls == [('info',)]
+
+
+def test_stale_entries_are_served_then_revalidated(cache, now):
+    cache.put('A.NS', {'info': 'old info', 'cash_flow': 'old cf'})
+    now[0] += 4 * HOUR  # info past its 3h TTL, inside the 1 day stale window
+    loader = Loader()
+
+    assert cache.get('A.NS', loader, FIELDS) == {'info': 'old info', 'cash_flow': 'old cf'}
+    assert loader.entered.wait(5)
+    for _ in range(50):
+        if cache.entries('A.NS', ('info',))['info'][0] == ('info', 1):
+            break
+        time.sleep(0.02)
+    assert loader.calls == [('info',)]
+    assert cache.entries('A.NS', ('info',))['info'][0] == ('info', 1)
+
+
+def test_expired_entries_are_served_while_rate_limited(cache, now):
+    cache.put('A.NS', {'info': 'old info', 'cash_flow': 'old cf'})
+    now[0] += 2 * DAY
+
+    assert cache.get('A.NS', Loader(RateLimitError()), FIELDS) == {'info': 'old info', 'cash_flow': 'old cf'}
+    assert cache.stats()['served_expired'] == 1
+    with pytest.raises(ConnectionError):
+        cache.get('A.NS', Loader(ConnectionError("reset")), FIELDS)
+
+
+def test_concurrent_misses_share_one_load(cache):
+    gate = threading.Event()
+    loader = Loader(gate=gate)
+    results = {}
+
+    def get(name):
+        results[name] = cache.get('A.NS', loader, FIELDS)
+
+    first = threading.Thread(target=get, args=('first',))
+    first.start()
+    assert loader.entered.wait(5)
+    second = threading.Thread(target=get, args=('second',))
+    second.start()
+    time.sleep(0.2)  # let the second get join the flight before the load finishes
+    gate.set()
+    first.join(5)
+    second.join(5)
+
+    assert loader.calls == [FIELDS]
+    assert results['first'] == results['second'] == {'info': ('info', 1), 'cash_flow': ('cash_flow', 1)}
+    assert cache.stats()['coalesced'] == 1
+    assert cache.stats()['misses'] == 1
+
+
+def test_listeners_see_every_put_and_cannot_break_it(cache):
+    seen = []
+    cache.subscribe(lambda ticker, values: 1 / 0)
+    cache.subscribe(lambda ticker, values: seen.append((ticker, sorted(values))))
+
+    cache.get('A.NS', Loader(), FIELDS)
+    assert seen == [('A.NS', ['cash_flow', 'info'])]
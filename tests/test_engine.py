@@ -0,0 +1,100 @@
+"""The vectorized engine against the original per-year loops, on fixed inputs."""
+import numpy as np
+import pytest
+
+from nyztrade_dcf.engine import (dcf_batch, implied_growth_batch, implied_terminal_growth_batch, implied_wacc_batch,
+                                 sensitivity_grid, solve_bracketed, terminal_value_gordon_batch)
+from nyztrade_dcf.valuation import run_sensitivity_analysis
+
+GROWTH = [0.15, 0.12, 0.10, 0.08, 0.06]
+
+
+# The loop implementations the engine replaced, kept as the reference
+def loop_fair_value(base_fcf, growth_rates, wacc, terminal_growth, net_debt, shares, years=5):
+    fcf, pv_fcfs = base_fcf, 0.0
+    for year in range(1, years + 1):
+        fcf *= 1 + (growth_rates[year - 1] if year <= len(growth_rates) else growth_rates[-1])
+        pv_fcfs += fcf / (1 + wacc) ** year
+    g = wacc - 0.02 if wacc <= terminal_growth else terminal_growth
+    tv = fcf * (1 + g) / (wacc - g)
+    equity = pv_fcfs + tv / (1 + wacc) ** years - net_debt
+    return max(0, equity / shares if shares > 0 else 0)
+
+
+def loop_sensitivity(base_fcf, growth_rates, wacc_range, growth_range, net_debt, shares, years=5):
+    return [[0 if w <= g else loop_fair_value(base_fcf, growth_rates, w, g, net_debt, shares, years)
+             for g in growth_range] for w in wacc_range]
+
+
+@pytest.mark.parametrize('base_fcf, wacc, tg, net_debt, shares, years', [
+    (5e10, 0.12, 0.04, 1e11, 4e9, 5),
+    (1e9, 0.09, 0.05, -2e9, 1e8, 10),
+    (3e8, 0.08, 0.09, 0.0, 5e7, 7),      # WACC below terminal growth: g capped at WACC - 2%
+    (2e9, 0.10, 0.03, 5e10, 1e8, 5),     # debt beyond EV: floored at 0
+    (2e9, 0.10, 0.03, 0.0, 0.0, 5),      # no shares
+])
+def test_dcf_batch_matches_the_loop(base_fcf, wacc, tg, net_debt, shares, years):
+    value = dcf_batch(base_fcf, GROWTH, wacc, tg, net_debt, shares, years)['fair_value']
+
+    assert float(value) == pytest.approx(loop_fair_value(base_fcf, GROWTH, wacc, tg, net_debt, shares, years),
+                                         rel=1e-12, abs=1e-9)
+
+
+def test_dcf_batch_broadcasts_tickers_against_scenarios():
+    base = np.array([[5e10], [1e9]])
+    wacc = np.array([[0.09, 0.12, 0.15]])
+    values = dcf_batch(base, GROWTH, wacc, 0.04, np.array([[1e11], [0.0]]), np.array([[4e9], [1e8]]))['fair_value']
+
+    expected = [[loop_fair_value(b, GROWTH, w, 0.04, d, s) for w in (0.09, 0.12, 0.15)]
+                for b, d, s in ((5e10, 1e11, 4e9), (1e9, 0.0, 1e8))]
+    np.testing.assert_allclose(values, expected, rtol=1e-12)
+
+
+def test_terminal_value_caps_growth_at_wacc_minus_two_points():
+    tv = terminal_value_gordon_batch([100.0, 100.0, 100.0], [0.05, 0.05, 0.10], [0.06, 0.05, 0.04])
+
+    np.testing.assert_allclose(tv, [100 * 1.03 / 0.02, 100 * 1.03 / 0.02, 100 * 1.04 / 0.06])
+
+
+@pytest.mark.parametrize('wacc, tg', [(0.12, 0.04), (0.05, 0.04), (0.045, 0.05)])
+def test_sensitivity_grid_matches_the_loop_cell_by_cell(wacc, tg):
+    # The low-WACC cases put some cells at or below terminal growth, which must be 0
+    wacc_range = np.linspace(wacc - 0.02, wacc + 0.02, 5)
+    growth_range = np.linspace(tg - 0.01, tg + 0.01, 5)
+    grid = sensitivity_grid(5e10, GROWTH, wacc_range, growth_range, 1e11, 4e9)
+    expected = loop_sensitivity(5e10, GROWTH, wacc_range, growth_range, 1e11, 4e9)
+
+    np.testing.assert_allclose(grid, expected, rtol=1e-9, atol=1e-9)
+    if wacc < 0.06:
+        assert (grid == 0).any()
+
+
+def test_run_sensitivity_analysis_matches_the_loop():
+    result = run_sensitivity_analysis(5e10, GROWTH, 0.05, 0.04, 1e11, 4e9)
+    expected = loop_sensitivity(5e10, GROWTH, result['wacc_range'], result['growth_range'], 1e11, 4e9)
+
+    np.testing.assert_allclose(result['matrix'], expected, rtol=1e-9, atol=1e-9)
+    assert result['matrix'][0][-1] == 0
+
+
+def test_solve_bracketed_converges_or_reports_no_root():
+    roots = solve_bracketed(lambda x: x ** 3 - np.array([2.0, 27.0, 100.0]), np.zeros(3), np.full(3, 4.0))
+
+    assert roots[:2] == pytest.approx([2 ** (1 / 3), 3.0], abs=1e-9)
+    assert np.isnan(roots[2])  # 100 ** (1/3) is outside [0, 4]
+
+
+def test_implied_inputs_recover_the_assumed_values():
+    base_fcf, net_debt, shares = 5e10, 1e11, 4e9
+    price = loop_fair_value(base_fcf, [0.08] * 5, 0.12, 0.04, net_debt, shares)
+
+    assert float(implied_growth_batch(price, base_fcf, 0.12, 0.04, net_debt, shares)) == pytest.approx(0.08)
+    assert float(implied_wacc_batch(price, base_fcf, [0.08] * 5, 0.04, net_debt, shares)) == pytest.approx(0.12)
+    assert float(implied_terminal_growth_batch(price, base_fcf, [0.08] * 5, 0.12, net_debt,
+                                               shares)) == pytest.approx(0.04)
+
+
+def test_implied_growth_outside_the_bounds_is_nan():
+    high = loop_fair_value(5e10, [1.5] * 5, 0.12, 0.04, 1e11, 4e9)
+
+    assert np.isnan(implied_growth_batch(high, 5e10, 0.12, 0.04, 1e11, 4e9))
@@ -0,0 +1,140 @@
+"""BatchFetcher against InMemoryProvider, on a fake clock so cooldowns cost no wall time."""
+import threading
+
+import pytest
+
+from nyztrade_dcf.cache import FundamentalsCache
+from nyztrade_dcf.fetcher import BatchFetcher, TokenBucket
+from nyztrade_dcf.providers import InMemoryProvider
+from nyztrade_dcf.retry import CircuitOpenError, RateLimitError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        with self._lock:
+            self.sleeps.append(seconds)
+            self.now += seconds
+
+
+class Flaky:
+    """Raises `errors` in turn, then returns a payload; records the clock at each call"""
+
+    def __init__(self, clock, *errors):
+        self.clock = clock
+        self.errors = list(errors)
+        self.called_at = []
+
+    def __call__(self, ticker, fields):
+        self.called_at.append(self.clock())
+        if self.errors:
+            raise self.errors.pop(0)
+        return {'info': {'symbol': ticker}}
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def fetcher(loader, clock, **kwargs):
+    return BatchFetcher(loader, max_workers=kwargs.pop('max_workers', 1), rate=1000, burst=1000, clock=clock,
+                        sleep=clock.sleep, **kwargs)
+
+
+def test_duplicates_are_fetched_once(clock):
+    provider = InMemoryProvider()
+    reports = fetcher(provider, clock, max_workers=4).fetch_many(['A.NS', 'B.NS', 'A.NS', 'B.NS', 'A.NS'])
+
+    assert list(reports) == ['A.NS', 'B.NS']
+    assert provider.calls == {'A.NS': 1, 'B.NS': 1}
+    assert all(r.ok and r.retries == 0 for r in reports.values())
+
+
+def test_rate_limits_retry_after_a_shared_cooldown(clock):
+    provider = InMemoryProvider(rate_limit_first={'A.NS': 2})
+    report = fetcher(provider, clock, cooldown=30).fetch_one('A.NS')
+
+    assert report.ok
+    assert provider.calls['A.NS'] == 3
+    assert (report.retries, report.rate_limited) == (2, 2)
+    assert sum(clock.sleeps) >= 60
+
+
+def test_cooldown_pauses_the_next_ticker(clock):
+    loader = Flaky(clock, RateLimitError())
+    reports = fetcher(loader, clock, cooldown=30).fetch_many(['A.NS', 'B.NS'])
+
+    assert all(r.ok for r in reports.values())
+    assert loader.called_at[0] == 0
+    assert all(t >= 30 for t in loader.called_at[1:])
+
+
+def test_retries_are_bounded(clock):
+    provider = InMemoryProvider(rate_limit_first={'A.NS': 10})
+    report = fetcher(provider, clock, max_retries=3).fetch_one('A.NS')
+
+    assert report.error == "RATE_LIMIT"
+    assert provider.calls['A.NS'] == 4
+    assert (report.retries, report.rate_limited) == (3, 3)
+
+
+def test_permanent_errors_are_not_retried(clock):
+    provider = InMemoryProvider(missing=('GONE.NS',))
+    report = fetcher(provider, clock).fetch_one('GONE.NS')
+
+    assert report.error == "Unable to fetch data"
+    assert provider.calls['GONE.NS'] == 1
+    assert report.retries == 0
+    assert clock.sleeps == []
+
+
+def test_transient_errors_back_off_without_a_cooldown(clock):
+    loader = Flaky(clock, ConnectionError("connection reset by peer"))
+    report = fetcher(loader, clock, cooldown=30, backoff=1.0).fetch_one('A.NS')
+
+    assert report.ok
+    assert (report.retries, report.rate_limited) == (1, 0)
+    assert sum(clock.sleeps) <= 1.0
+
+
+def test_retry_after_lengthens_the_cooldown(clock):
+    loader = Flaky(clock, RateLimitError(retry_after=120))
+    report = fetcher(loader, clock, cooldown=30).fetch_one('A.NS')
+
+    assert report.ok and report.rate_limited == 1
+    assert loader.called_at[1] >= 120
+
+
+def test_open_circuit_is_counted_and_cooled_down(clock):
+    loader = Flaky(clock, CircuitOpenError(retry_after=45))
+    report = fetcher(loader, clock, cooldown=30).fetch_one('A.NS')
+
+    assert report.ok
+    assert (report.retries, report.rate_limited) == (1, 1)
+    assert loader.called_at[1] >= 45
+
+
+def test_cached_tickers_skip_the_loader(clock, tmp_path):
+    provider = InMemoryProvider()
+    batch = fetcher(provider, clock, cache=FundamentalsCache(str(tmp_path / 'cache.sqlite3')))
+    batch.fetch_many(['A.NS', 'B.NS'])
+    reports = batch.fetch_many(['A.NS', 'B.NS'])
+
+    assert provider.calls == {'A.NS': 1, 'B.NS': 1}
+    assert reports['A.NS'].data['info']['symbol'] == 'A.NS'
+
+
+def test_token_bucket_paces_past_the_burst(clock):
+    bucket = TokenBucket(rate=2, burst=1, clock=clock, sleep=clock.sleep)
+    for _ in range(3):
+        bucket.acquire()
+
+    assert sum(clock.sleeps) == pytest.approx(1.0)
@@ -0,0 +1,50 @@
+"""ComputeGraph: what counts as a changed stage."""
+import pandas as pd
+
+from nyztrade_dcf.graph import ComputeGraph
+
+
+def double(x):
+    return x * 2
+
+
+def triple(x):
+    return x * 3
+
+
+def test_unchanged_inputs_are_reused():
+    graph = ComputeGraph()
+    first = graph.node('stage', double, [1, 2])
+    graph.begin()
+    assert graph.node('stage', double, [1, 2]) is first
+    assert graph.reused == ['stage']
+
+
+def test_a_different_function_under_the_same_name_recomputes():
+    graph = ComputeGraph()
+    graph.node('stage', double, 2)
+    graph.begin()
+    assert graph.node('stage', triple, 2) == 6
+    assert graph.recomputed == ['stage']
+
+
+def total(df):
+    return df['a'].sum()
+
+
+def growth(params):
+    return params['g']
+
+
+def test_inputs_mutated_in_place_recompute():
+    graph = ComputeGraph()
+    frame = pd.DataFrame({'a': [1.0, 2.0]})
+    params = {'g': 0.1}
+    graph.node('frame', total, frame)
+    graph.node('params', growth, params)
+
+    frame.loc[0, 'a'] = 10.0
+    params['g'] = 0.2
+    graph.begin()
+    assert graph.node('frame', total, frame) == 12.0
+    assert graph.node('params', growth, params) == 0.2
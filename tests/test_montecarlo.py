@@ -0,0 +1,20 @@
+"""Monte Carlo paths are centred on the WACC the valuation uses."""
+import pytest
+
+from nyztrade_dcf.montecarlo import simulate_fair_values
+from nyztrade_dcf.valuation import (calculate_dcf_value, calculate_terminal_value, calculate_wacc, manual_wacc_data,
+                                    project_fcf)
+
+INFO = {'beta': 0.9, 'marketCap': 6e12, 'totalDebt': 1e11, 'sector': 'Technology'}
+STILL = dict(n_paths=100, seed=1, growth_sd=0, beta_sd=0, premium_sd=0, terminal_growth_sd=0)
+
+
+@pytest.mark.parametrize('wacc_data', [calculate_wacc(INFO, 0.07, 0.06), manual_wacc_data(0.15, INFO, 0.07, 0.06)],
+                         ids=['capm', 'manual'])
+def test_zero_volatility_reproduces_the_point_value(wacc_data):
+    projected = project_fcf(1e10, [0.1] * 5)
+    tv = calculate_terminal_value(projected, wacc_data['wacc'], 0.04)
+    point = calculate_dcf_value(projected, tv, wacc_data['wacc'], 0, 1e9)['fair_value']
+
+    fair_values = simulate_fair_values(1e10, [0.1] * 5, wacc_data, 0.04, 0, 1e9, **STILL)
+    assert fair_values == pytest.approx(point)
@@ -0,0 +1,37 @@
+"""Snapshots: what write_snapshot keeps, and what it reports dropping."""
+import logging
+
+import pandas as pd
+
+from nyztrade_dcf.providers import SnapshotProvider, write_snapshot
+
+
+def test_snapshot_round_trip_logs_dropped_info_values(tmp_path, caplog):
+    cash_flow = pd.DataFrame([[5e10, 4e10]], index=['Free Cash Flow'],
+                             columns=pd.to_datetime(['2024-03-31', '2023-03-31']))
+    data = {
+        'A.NS': {'info': {'symbol': 'A.NS', 'currentPrice': 100.0, 'companyOfficers': [{'name': 'X'}],
+                          'beta': None},
+                 'cash_flow': cash_flow},
+        'B.NS': {'info': {'symbol': 'B.NS', 'companyOfficers': [], 'governance': {'audit': 1}}},
+    }
+    with caplog.at_level(logging.WARNING, logger='nyztrade_dcf.providers'):
+        write_snapshot(str(tmp_path), data, fmt='csv')
+
+    assert "dropped 3 non-scalar info values (companyOfficers x2, governance x1)" in caplog.text
+    loaded = SnapshotProvider(str(tmp_path)).load('A.NS')
+    assert loaded['info'] == {'symbol': 'A.NS', 'currentPrice': 100.0}
+    assert loaded['cash_flow'].loc['Free Cash Flow'].tolist() == [5e10, 4e10]
+
+
+def test_a_repeated_statement_line_keeps_its_last_value(tmp_path):
+    cash_flow = pd.DataFrame([[5e10, 4e10]], index=['Free Cash Flow'],
+                             columns=pd.to_datetime(['2024-03-31', '2023-03-31']))
+    write_snapshot(str(tmp_path), {'A.NS': {'info': {'symbol': 'A.NS'}, 'cash_flow': cash_flow}}, fmt='csv')
+    path = tmp_path / 'statements.csv'
+    statements = pd.read_csv(path)
+    repeated = statements[statements['period'].str.startswith('2024')].assign(value=6e10)
+    pd.concat([statements, repeated]).to_csv(path, index=False)
+
+    loaded = SnapshotProvider(str(tmp_path)).load('A.NS', ('cash_flow',))
+    assert loaded['cash_flow'].loc['Free Cash Flow'].tolist() == [6e10, 4e10]
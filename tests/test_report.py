@@ -0,0 +1,38 @@
+"""write_reports: a report pack survives rows that fail to render."""
+import os
+import zipfile
+
+import pandas as pd
+import pytest
+
+from nyztrade_dcf.report import report_filename, write_reports
+
+
+def screen(*tickers, broken=()):
+    rows = [{'ticker': t, 'company': t, 'sector': 'Technology', 'fair_value': 120.0,
+             'enterprise_value': 'n/a' if t in broken else 5e11, 'equity_value': 4.8e11, 'wacc': 0.12,
+             'cost_of_equity': 0.13, 'beta': 0.9, 'price': 100.0, 'upside': 20.0, 'terminal_growth': 0.04,
+             'projection_years': 5, 'net_debt': 2e10, 'error': None} for t in tickers]
+    return pd.DataFrame(rows)
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_reports_to_a_directory(tmp_path, processes):
+    written, failed = write_reports(screen('A.NS', 'B.NS'), str(tmp_path), processes=processes)
+
+    assert sorted(written) == [report_filename('A.NS'), report_filename('B.NS')]
+    assert failed == []
+    assert sorted(os.listdir(tmp_path)) == sorted(written)
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_a_failing_row_does_not_lose_the_zip(tmp_path, processes):
+    destination = str(tmp_path / 'reports.zip')
+    written, failed = write_reports(screen('A.NS', 'BAD.NS', 'B.NS', broken=('BAD.NS',)), destination,
+                                    processes=processes)
+
+    assert sorted(written) == [report_filename('A.NS'), report_filename('B.NS')]
+    assert [ticker for ticker, _ in failed] == ['BAD.NS']
+    with zipfile.ZipFile(destination) as archive:
+        assert sorted(archive.namelist()) == sorted(written)
+        assert all(archive.read(name).startswith(b'%PDF') for name in written)
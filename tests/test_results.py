@@ -0,0 +1,78 @@
+"""ResultStore: buffered appends, index-pruned queries, latest and monthly compaction."""
+import os
+
+import pandas as pd
+import pytest
+
+from nyztrade_dcf.results import ResultStore
+
+OCT = pd.Timestamp('2026-10-05').timestamp()
+NOV = pd.Timestamp('2026-11-05').timestamp()
+
+
+def valuation(fair_value, **extra):
+    return {'fair_value': fair_value, 'price': 100.0, 'wacc': 0.12, 'growth_rates': [0.1, 0.08],
+            'projected_fcf': [{'fcf': 1.0}, {'fcf': 2.0}], 'projection_years': 5, **extra}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ResultStore(str(tmp_path / 'results'), flush_rows=1000, flush_seconds=1e9)
+    store.append('A.NS', valuation(110.0), sector='Technology', valued_at=OCT)
+    store.append('B.NS', valuation(90.0), sector='Banking', valued_at=OCT + 60)
+    store.flush()
+    store.append('A.NS', valuation(120.0), sector='Technology', valued_at=NOV)
+    store.flush()
+    return store
+
+
+def test_buffered_rows_are_queryable_before_a_flush(tmp_path):
+    store = ResultStore(str(tmp_path / 'results'), flush_rows=1000, flush_seconds=1e9)
+    store.append('A.NS', valuation(110.0, ignored='not a column'), valued_at=OCT)
+
+    assert store.index() == {}
+    assert store.query(['A.NS'])['fair_value'].tolist() == [110.0]
+
+
+def test_flush_indexes_each_part(store):
+    index = store.index()
+
+    assert sorted(meta['rows'] for meta in index.values()) == [1, 2]
+    assert sorted(tuple(meta['tickers']) for meta in index.values()) == [('A.NS',), ('A.NS', 'B.NS')]
+    row = store.query(['A.NS']).iloc[-1]
+    assert list(row['growth_rates']) == [0.1, 0.08] and list(row['projected_fcf']) == [1.0, 2.0]
+
+
+def test_queries_only_open_files_the_index_allows(store):
+    # Removing the October part shows which queries still touch it
+    october = next(name for name, meta in store.index().items() if 'B.NS' in meta['tickers'])
+    os.remove(os.path.join(store.root, october))
+
+    assert store.query(start='2026-11-01')['fair_value'].tolist() == [120.0]
+    with pytest.raises(FileNotFoundError):
+        store.query(['B.NS'])
+
+
+def test_filters(store):
+    assert store.query(sectors=['Banking'])['ticker'].tolist() == ['B.NS']
+    assert store.query(['A.NS'], end='2026-10-31')['fair_value'].tolist() == [110.0]
+    assert store.query(['C.NS']).empty
+
+
+def test_latest_is_the_most_recent_row_per_ticker(store):
+    latest = store.latest(columns=['fair_value']).set_index('ticker')['fair_value']
+
+    assert latest.to_dict() == {'A.NS': 120.0, 'B.NS': 90.0}
+
+
+def test_compact_writes_one_file_per_month(store):
+    before = store.query()
+    store.append('B.NS', valuation(95.0), sector='Banking', valued_at=NOV + 60)
+
+    assert store.compact() == (3, 2)
+    assert sorted(store.index()) == [name for name in sorted(os.listdir(store.root)) if name.endswith('.parquet')]
+    assert [meta['rows'] for _, meta in sorted(store.index().items())] == [2, 2]
+    after = store.query()
+    assert len(after) == len(before) + 1
+    pd.testing.assert_frame_equal(after.iloc[:len(before)].drop(columns=['growth_rates', 'projected_fcf']),
+                                  before.drop(columns=['growth_rates', 'projected_fcf']))
@@ -0,0 +1,69 @@
+"""RetryPolicy delays and CircuitBreaker transitions."""
+import pytest
+
+from nyztrade_dcf.retry import (PERMANENT, RATE_LIMIT, TRANSIENT, CircuitBreaker, CircuitOpenError, RateLimitError,
+                                RetryPolicy, classify)
+
+
+def test_retry_after_beyond_cap_is_clamped_to_the_budget():
+    policy = RetryPolicy(max_attempts=3, cap=10, budget=20)
+
+    assert policy.delay(0, RateLimitError(retry_after=60)) == 20
+    assert policy.delay(1, RateLimitError(retry_after=60), slept=15) == 5
+    assert policy.delay(1, RateLimitError(retry_after=60), slept=20) is None
+
+
+def test_jittered_delay_stays_under_cap():
+    policy = RetryPolicy(max_attempts=10, base=1, cap=4, budget=100)
+
+    assert all(0 <= policy.delay(attempt, ConnectionError()) <= 4 for attempt in range(9))
+
+
+def test_permanent_and_open_circuit_errors_give_up():
+    policy = RetryPolicy()
+
+    assert policy.delay(0, ValueError("Unable to fetch data")) is None
+    assert policy.delay(0, CircuitOpenError(retry_after=5)) is None
+
+
+def test_call_retries_then_returns():
+    errors = [RateLimitError(retry_after=1), ConnectionError("timed out")]
+    slept = []
+
+    def flaky():
+        if errors:
+            raise errors.pop(0)
+        return 'ok'
+
+    assert RetryPolicy(max_attempts=3).call(flaky, sleep=slept.append) == 'ok'
+    assert slept[0] == 1 and len(slept) == 2
+
+
+def test_breaker_opens_then_probes_once():
+    now = [0.0]
+    breaker = CircuitBreaker(threshold=2, window=60, cooldown=30, clock=lambda: now[0])
+    for _ in range(2):
+        breaker.before()
+        breaker.failure(classify(RateLimitError()))
+
+    with pytest.raises(CircuitOpenError):
+        breaker.before()
+    now[0] = 31
+    breaker.before()  # the half-open probe
+    with pytest.raises(CircuitOpenError):
+        breaker.before()
+    breaker.success()
+    assert breaker.state()['state'] == 'closed'
+
+
+@pytest.mark.parametrize('message', ["429 Client Error", "Too Many Requests", "Rate limited. Try after a while.",
+                                     "YFRateLimitError: rate-limit reached", "ratelimit exceeded"])
+def test_rate_limit_messages_are_recognized(message):
+    assert classify(Exception(message)) == RATE_LIMIT
+
+
+@pytest.mark.parametrize('message, kind', [("failed to generate crumb", TRANSIENT),
+                                           ("separate request timed out", TRANSIENT),
+                                           ("Unable to fetch data: no accurate corporate actions", PERMANENT)])
+def test_words_containing_rate_are_not_rate_limits(message, kind):
+    assert classify(Exception(message)) == kind
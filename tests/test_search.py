@@ -0,0 +1,78 @@
+"""SearchIndex: prefix, substring and one-edit typo tiers, and the pickled index next to the master."""
+import os
+
+import pytest
+
+from nyztrade_dcf import search
+from nyztrade_dcf.search import SearchIndex, load_index, load_instruments
+
+MASTER = """SYMBOL,NAME OF COMPANY
+ZENLABS,Zenith Laboratories Limited
+ZENSOFT,Zenith Software Limited
+QUIXBIO,Quixotic Bioworks Limited
+MARVELDYE,Marvel Dyestuffs Limited
+"""
+
+
+@pytest.fixture
+def master(tmp_path):
+    path = tmp_path / 'EQUITY_L.csv'
+    path.write_text(MASTER)
+    return str(path)
+
+
+@pytest.fixture
+def index(master):
+    return SearchIndex(load_instruments(master))
+
+
+def tickers(index, query):
+    return [ticker for ticker, _ in index.search(query)]
+
+
+def test_exact_symbol_beats_prefix_matches(index):
+    assert tickers(index, 'zen') == ['ZENLABS.NS', 'ZENSOFT.NS']
+    assert tickers(index, 'zensoft.ns') == ['ZENSOFT.NS']
+    assert tickers(index, 'zenith soft') == ['ZENSOFT.NS']
+    assert tickers(index, 'marvel dye') == ['MARVELDYE.NS']  # the words run together are a symbol prefix
+
+
+def test_mid_word_substring(index):
+    assert tickers(index, 'iowor') == ['QUIXBIO.NS']
+    assert tickers(index, 'yestuf') == ['MARVELDYE.NS']
+
+
+@pytest.mark.parametrize('query', ['quixtoic', 'qiuxotic', 'quixxotic', 'quxotic', 'dyestufs', 'laboratries'])
+def test_one_letter_typos(index, query):
+    assert len(tickers(index, query)) == 1
+
+
+def test_two_letter_typos_do_not_match(index):
+    assert tickers(index, 'qixtoic') == []
+
+
+def test_pickle_is_reused_until_the_master_changes(master, monkeypatch):
+    first = load_index(master)
+    assert os.path.exists(master + '.index.pkl')
+    assert 'ZENLABS.NS' in first.tickers
+
+    def unexpected(path):
+        raise AssertionError("rebuilt a current index")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(search, 'load_instruments', unexpected)
+        assert load_index(master).tickers == first.tickers
+
+    with open(master, 'a') as f:
+        f.write("NEWCO,Newly Listed Corporation\n")
+    os.utime(master, ns=(os.stat(master).st_atime_ns, os.stat(master).st_mtime_ns + 10**9))
+    rebuilt = load_index(master)
+    assert 'NEWCO.NS' in rebuilt.tickers
+    assert tickers(rebuilt, 'newly') == ['NEWCO.NS']
+
+
+def test_a_corrupt_pickle_is_rebuilt(master):
+    with open(master + '.index.pkl', 'wb') as f:
+        f.write(b'not a pickle')
+
+    assert 'QUIXBIO.NS' in load_index(master).tickers
@@ -0,0 +1,72 @@
+"""FCF extraction: every diagnostics path, and the bulk screener path agreeing with the app's per-ticker one."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from nyztrade_dcf.providers import long_statement, stack_statements
+from nyztrade_dcf.valuation import calculate_fcf_from_financials, extract_fcf_bulk
+
+PERIODS = pd.to_datetime(['2024-03-31', '2023-03-31', '2022-03-31', '2021-03-31', '2020-03-31'])
+
+
+def statement(rows):
+    """A cash flow statement as yfinance shapes it: line items x periods, newest first"""
+    return pd.DataFrame.from_dict(rows, orient='index', columns=PERIODS)
+
+
+CASES = {
+    'DIRECT.NS': ({}, statement({'Free Cash Flow': [5e9, np.nan, 4e9, 3e9, 2e9],
+                                 'Operating Cash Flow': [9e9, 8e9, 7e9, 6e9, 5e9]})),
+    'FALLBACK.NS': ({}, statement({'Total Cash From Operating Activities': [9e9, 8e9, 7e9, 6e9, 5e9],
+                                   'Capital Expenditure': [-3e9, np.nan, 2e9, -1e9, -1e9]})),
+    'TTM.NS': ({'operatingCashflow': 8e9, 'capitalExpenditures': -3e9}, pd.DataFrame()),
+    'NOCAPEX.NS': ({}, statement({'Operating Cash Flow': [9e9, 8e9, 7e9, 6e9, 5e9]})),
+    'NOTHING.NS': ({'operatingCashflow': -1e9}, pd.DataFrame()),
+    'TEXT.NS': ({}, statement({'Free Cash Flow': [5e9, 'N/A', '4e9', None, 2e9]})),
+}
+EXPECTED = {
+    'DIRECT.NS': ('direct', None, {'2021': 3e9, '2022': 4e9, '2024': 5e9}),
+    'FALLBACK.NS': ('ocf_capex', None, {'2021': 5e9, '2022': 5e9, '2023': 8e9, '2024': 6e9}),
+    'TTM.NS': ('ttm', 'no usable statement rows; used TTM from info', {'TTM': 5e9}),
+    'NOCAPEX.NS': ('none', 'no capex row', {}),
+    'NOTHING.NS': ('none', 'no cash flow statement', {}),
+    'TEXT.NS': ('direct', 'non-numeric cells ignored', {'2022': 4e9, '2024': 5e9}),  # 2020 is a 5th year
+}
+
+
+@pytest.fixture(scope='module')
+def bulk():
+    parts = [long_statement(t, 'cash_flow', cf) for t, (_, cf) in CASES.items() if not cf.empty]
+    return extract_fcf_bulk(stack_statements(parts), {t: info for t, (info, _) in CASES.items()})
+
+
+@pytest.mark.parametrize('ticker', list(CASES))
+def test_per_ticker_fcf(ticker):
+    info, cash_flow = CASES[ticker]
+
+    assert calculate_fcf_from_financials(info, pd.DataFrame(), cash_flow) == EXPECTED[ticker][2]
+
+
+@pytest.mark.parametrize('ticker', list(CASES))
+def test_bulk_diagnostics(bulk, ticker):
+    _, diagnostics = bulk
+    path, issue, _ = EXPECTED[ticker]
+
+    assert diagnostics.loc[ticker, 'path'] == path
+    found = diagnostics.loc[ticker, 'issue']
+    assert (pd.isna(found) and issue is None) or found == issue
+
+
+def test_non_numeric_cells_are_counted(bulk):
+    _, diagnostics = bulk
+
+    assert diagnostics.loc['TEXT.NS', 'non_numeric'] == 1  # 'N/A'; '4e9' parses and None is just missing
+    assert diagnostics.loc['DIRECT.NS', 'non_numeric'] == 0
+
+
+@pytest.mark.parametrize('ticker', list(CASES))
+def test_bulk_equals_per_ticker(bulk, ticker):
+    fcf, _ = bulk
+    info, cash_flow = CASES[ticker]
+
+    assert fcf.loc[ticker].dropna().to_dict() == calculate_fcf_from_financials(info, pd.DataFrame(), cash_flow)
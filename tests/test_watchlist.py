@@ -0,0 +1,92 @@
+"""Watchlist: band-change alerts, the off-peak window and one scheduled worker pass."""
+import logging
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from nyztrade_dcf import watchlist as wl
+from nyztrade_dcf.fetcher import BatchFetcher
+from nyztrade_dcf.providers import InMemoryProvider
+from nyztrade_dcf.results import ResultStore
+from nyztrade_dcf.watchlist import Watchlist, in_window, run_worker
+
+EVENING = datetime(2026, 10, 18, 20).timestamp()
+NOON = datetime(2026, 10, 19, 12).timestamp()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return Watchlist(str(tmp_path / 'watchlist.sqlite3'))
+
+
+def fetcher(provider=None):
+    return BatchFetcher(provider or InMemoryProvider(missing=('GONE.NS',)), max_workers=1, rate=1000, burst=1000)
+
+
+def band(rec, error=None):
+    return {'price': 100.0, 'fair_value': 120.0, 'upside': 20.0, 'recommendation': rec, 'wacc': 0.12, 'error': error}
+
+
+def test_alerts_only_on_a_band_change_between_good_valuations(store):
+    assert store.record('u', 'A.NS', band('BUY'), valued_at=1) is None       # nothing to compare with
+    assert store.record('u', 'A.NS', band('BUY'), valued_at=2) is None       # same band
+    assert store.record('u', 'A.NS', band(None, error="No data"), valued_at=3) is None
+    alert = store.record('u', 'A.NS', band('HOLD'), valued_at=4)             # compared with BUY, not the error
+
+    assert (alert['previous'], alert['current']) == ('BUY', 'HOLD')
+    assert store.alerts('u')[['previous', 'current']].values.tolist() == [['BUY', 'HOLD']]
+    assert store.record('u', 'B.NS', band('HOLD'), valued_at=5) is None      # per ticker
+
+
+@pytest.mark.parametrize('hour, expected', [(17, False), (18, True), (23, True), (0, True), (7, True), (8, False),
+                                            (12, False)])
+def test_window_wraps_past_midnight(hour, expected):
+    assert in_window(hour, (18, 8)) is expected
+
+
+def test_window_within_a_day():
+    assert [h for h in range(24) if in_window(h, (9, 17))] == list(range(9, 17))
+
+
+def test_worker_runs_once_inside_the_window_and_not_again_until_due(store):
+    store.add('u', 'A.NS', {'terminal_growth': 0.04})
+    store.add('u', 'GONE.NS')
+    slept = []
+
+    assert run_worker(store, fetcher(), clock=lambda: NOON, sleep=slept.append, once=True)
+    assert store.last_run() == 0  # outside the window
+
+    assert run_worker(store, fetcher(), clock=lambda: EVENING, sleep=slept.append, once=True)
+    latest = store.latest('u').set_index('ticker')
+    assert pd.isna(latest.loc['A.NS', 'error']) and latest.loc['A.NS', 'fair_value'] > 0
+    assert latest.loc['GONE.NS', 'error'] == "Unable to fetch data"
+
+    assert run_worker(store, fetcher(), clock=lambda: EVENING + 3600, sleep=slept.append, once=True)
+    assert len(store.history('u', 'A.NS')) == 1  # ran an hour ago; next due tomorrow
+    assert slept == []
+
+
+def test_null_assumptions_and_revaluation_bugs_are_recorded_and_logged(store, monkeypatch, caplog, tmp_path):
+    store.add('u', 'A.NS')
+    store.add('u', 'B.NS')
+    store._connect().execute("UPDATE watchlist SET assumptions = 'null' WHERE ticker = 'A.NS'")
+    store._connect().commit()
+
+    def revalue(info, income_stmt, cash_flow, assumptions=None):
+        if info['symbol'] == 'B.NS':
+            raise RuntimeError("bug in revalue")
+        return original(info, income_stmt, cash_flow, assumptions)
+
+    original = wl.revalue
+    monkeypatch.setattr(wl, 'revalue', revalue)
+    with caplog.at_level(logging.WARNING, logger='nyztrade_dcf.watchlist'):
+        results = ResultStore(str(tmp_path / 'results'))
+        valued, failed, _ = wl.revalue_all(store, fetcher(), results=results)
+
+    assert (valued, failed) == (1, 1)
+    assert results.query()['ticker'].tolist() == ['A.NS']
+    assert store.latest('u').set_index('ticker').loc['B.NS', 'error'] == "bug in revalue"
+    record = next(r for r in caplog.records if 'B.NS' in r.getMessage())
+    assert record.exc_info is not None and "bug in revalue" in caplog.text
+